@@ -0,0 +1,241 @@
+"""
+Load-testing and latency benchmark for the activities API
+
+Boots the app under uvicorn on a free local port, preloads rosters through
+the file storage backend, then drives a mixed read/signup/unregister
+workload at a fixed concurrency and reports p50/p99 latency and requests per
+second, overall and per operation.
+
+Results can be saved as JSON and compared against an earlier run:
+
+    python run_tests.py --bench --save benchmarks/results/before.json
+    python run_tests.py --bench --compare benchmarks/results/before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+OPERATIONS = ("read", "signup", "unregister")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def write_seed(data_dir, activity_count, roster_size, shared=False):
+    """Seed storage with ``roster_size`` participants spread over the activities
+
+    Writes a file-backend snapshot, or with ``shared`` a SQLite database for
+    multi-worker mode.
+    """
+    activities = {}
+    for i in range(activity_count):
+        activities[f"Activity {i}"] = {
+            "description": f"Benchmark activity {i}",
+            "schedule": "Mondays and Wednesdays, 3:30 PM - 5:00 PM",
+            "max_participants": 10 ** 9,
+            "participants": [],
+        }
+    names = list(activities)
+    for n in range(roster_size):
+        activities[names[n % activity_count]]["participants"].append(f"seed{n}@mergington.edu")
+    if shared:
+        from shared import SharedActivityStore
+
+        store = SharedActivityStore(str(Path(data_dir) / "activities.db"), activities)
+        store.open()
+        store.close()
+    else:
+        with open(Path(data_dir) / "snapshot.json", "w", encoding="utf-8") as f:
+            json.dump({"lsn": 0, "activities": activities}, f)
+    return names
+
+
+def start_server(data_dir, port, workers, shared=False):
+    if workers > 1 and not shared:
+        raise ValueError("Several workers can only share the SQLite store")
+    if shared:
+        env = dict(os.environ, MERGINGTON_SHARED_DB=str(Path(data_dir) / "activities.db"))
+    else:
+        env = dict(os.environ, MERGINGTON_DATA_DIR=str(data_dir))
+    # Measure the store, not the signup rate limits
+    env.update(MERGINGTON_CLIENT_RATE="0", MERGINGTON_ACTIVITY_RATE="0")
+    cmd = [
+        sys.executable, "-m", "uvicorn", "app:app",
+        "--app-dir", str(ROOT / "src"),
+        "--port", str(port),
+        "--workers", str(workers),
+        "--log-level", "warning",
+        "--no-access-log",
+    ]
+    server = subprocess.Popen(cmd, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/activities?limit=1", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    count = len(latencies)
+    return {
+        "requests": count,
+        "rps": count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_workload(base_url, names, args):
+    weights = [args.read, args.signup, args.unregister]
+    latencies = {op: [] for op in OPERATIONS}
+    errors = 0
+    deadline = None
+
+    async def worker(worker_id, client):
+        nonlocal errors
+        rng = random.Random(worker_id)
+        signed_up = []
+        counter = 0
+        while time.perf_counter() < deadline:
+            op = rng.choices(OPERATIONS, weights)[0]
+            if op == "unregister" and not signed_up:
+                op = "signup"
+            activity = rng.choice(names)
+            if op == "read":
+                request = client.build_request("GET", "/activities")
+            elif op == "signup":
+                email = f"w{worker_id}-{counter}@mergington.edu"
+                counter += 1
+                signed_up.append((activity, email))
+                request = client.build_request("POST", f"/activities/{activity}/signup",
+                                               data={"email": email})
+            else:
+                activity, email = signed_up.pop(rng.randrange(len(signed_up)))
+                request = client.build_request("DELETE", f"/activities/{activity}/unregister",
+                                               params={"email": email})
+            start = time.perf_counter()
+            response = await client.send(request)
+            await response.aread()
+            latencies[op].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency,
+                          max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm up connections and caches before measuring
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(-i - 1, client) for i in range(args.concurrency)))
+        for samples in latencies.values():
+            samples.clear()
+        errors = 0
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(i, client) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {op: summarize(samples, elapsed) for op, samples in latencies.items()}
+    results["all"] = summarize([s for samples in latencies.values() for s in samples], elapsed)
+    results["all"]["errors"] = errors
+    return results
+
+
+def print_results(results, baseline=None):
+    print(f"{'operation':<12}{'requests':>10}{'rps':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for op in (*OPERATIONS, "all"):
+        row = results[op]
+        line = (f"{op:<12}{row['requests']:>10}{row['rps']:>12.1f}"
+                f"{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+        if baseline and op in baseline:
+            old = baseline[op]
+            changes = []
+            for key in ("rps", "p50_ms", "p99_ms"):
+                if old[key]:
+                    changes.append(f"{key} {100 * (row[key] - old[key]) / old[key]:+.1f}%")
+            line += "   " + ", ".join(changes)
+        print(line)
+    print(f"errors: {results['all']['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the activities API")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Number of concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Seconds to measure for")
+    parser.add_argument("--warmup", type=float, default=2.0,
+                        help="Seconds to run before measuring")
+    parser.add_argument("--activities", type=int, default=9,
+                        help="Number of activities to create")
+    parser.add_argument("--roster-size", type=int, default=1000,
+                        help="Total participants preloaded across all activities")
+    parser.add_argument("--read", type=float, default=80, help="Weight of GET /activities")
+    parser.add_argument("--signup", type=float, default=15, help="Weight of signups")
+    parser.add_argument("--unregister", type=float, default=5, help="Weight of unregisters")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes; more than one requires --shared")
+    parser.add_argument("--shared", action="store_true",
+                        help="Use the SQLite store shared between workers")
+    parser.add_argument("--save", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against results saved earlier")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and not args.shared:
+        # Workers would each replay and append to the same write-ahead log
+        parser.error("--workers above 1 requires --shared")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        names = write_seed(data_dir, args.activities, args.roster_size, args.shared)
+        port = free_port()
+        server = start_server(data_dir, port, args.workers, args.shared)
+        try:
+            results = asyncio.run(run_workload(f"http://127.0.0.1:{port}", names, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+    results["config"] = {key: value for key, value in vars(args).items()
+                         if key not in ("save", "compare")}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
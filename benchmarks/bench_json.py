@@ -0,0 +1,94 @@
+"""
+Serialization benchmark for the GET /activities body
+
+Builds a store with the given total number of participants spread over
+``--activities`` activities and times, per call:
+
+- ``jsonable_encoder``: FastAPI's generic path for a returned dict
+- ``json.dumps``: encoding ``to_dict()`` in one go, as before fragments
+- ``to_json cold``: every activity fragment encoded and spliced
+- ``to_json after signup``: one roster changed, so one fragment re-encoded
+
+    python benchmarks/bench_json.py --participants 100 10000 1000000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+import serialization  # noqa: E402
+from store import ActivityStore  # noqa: E402
+
+
+def make_store(participants, activity_count):
+    per_activity = max(participants // activity_count, 1)
+    data = {}
+    for i in range(activity_count):
+        data[f"Activity {i}"] = {
+            "description": f"Synthetic activity {i}",
+            "schedule": "Fridays, 3:30 PM - 5:00 PM",
+            "max_participants": per_activity * 2,
+            "participants": [f"student{i}-{n}@mergington.edu" for n in range(per_activity)],
+        }
+    return ActivityStore(data)
+
+
+def timed(setup, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def bench(participants, activity_count, repeat):
+    store = make_store(participants, activity_count)
+    counter = iter(range(10 ** 9))
+
+    def nothing():
+        pass
+
+    def forget_fragments():
+        for name in store:
+            store.get(name)._fragment = (None, b"")
+        store._json_cache = (None, b"")
+
+    def sign_up_one():
+        store.signup("Activity 0", f"new{next(counter)}@mergington.edu")
+
+    return {
+        "jsonable_encoder": timed(nothing, lambda: json.dumps(
+            jsonable_encoder(store.to_dict()), ensure_ascii=False).encode("utf-8"), repeat),
+        "json.dumps": timed(nothing, lambda: json.dumps(
+            store.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8"), repeat),
+        "to_json cold": timed(forget_fragments, store.to_json, repeat),
+        "to_json after signup": timed(sign_up_one, store.to_json, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--participants", type=int, nargs="+", default=[100, 10000, 1000000])
+    parser.add_argument("--activities", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    print(f"encoder: {encoder}, activities: {args.activities}, median of {args.repeat} runs (ms)")
+    columns = ("jsonable_encoder", "json.dumps", "to_json cold", "to_json after signup")
+    print(f"{'participants':>12}" + "".join(f"{column:>22}" for column in columns))
+    for participants in args.participants:
+        results = bench(participants, args.activities, args.repeat)
+        print(f"{participants:>12}" + "".join(f"{results[column]:>22.3f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
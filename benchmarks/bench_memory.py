@@ -0,0 +1,131 @@
+"""
+Roster memory benchmark
+
+Enrolls each of ``--students`` students in ``--per-student`` of
+``--activities`` activities and measures, with tracemalloc, the memory held
+by:
+
+- ``dict rosters``: the previous layout, a dict of email strings per roster
+  and a dict of activity names per student in the reverse index
+- ``store``: an ``ActivityStore``, with interned emails and id rosters
+
+Every enrollment arrives as its own email string, as it does from a request.
+
+It then times a signup plus unregister on single rosters of each of
+``--roster-sizes``, for a newly seen student (appended at the end of the
+sorted ids) and for one of the first students (the whole sorted array
+shifts), against a dict roster.
+
+    python benchmarks/bench_memory.py --students 200000 --per-student 5
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from store import ActivityStore  # noqa: E402
+from students import Roster, StudentRegistry  # noqa: E402
+
+
+def enrollments(students, per_student, activity_count):
+    for student in range(students):
+        for n in range(per_student):
+            yield f"Activity {(student * 7 + n) % activity_count}", \
+                f"student{student}@mergington.edu"
+
+
+def build_dict_rosters(students, per_student, activity_count):
+    rosters = {f"Activity {i}": {} for i in range(activity_count)}
+    index = {}
+    for name, email in enrollments(students, per_student, activity_count):
+        rosters[name][email] = None
+        index.setdefault(email, {})[name] = None
+    return rosters, index
+
+
+def build_store(students, per_student, activity_count):
+    store = ActivityStore({
+        f"Activity {i}": {"description": "", "schedule": "Fridays",
+                          "max_participants": students, "participants": []}
+        for i in range(activity_count)
+    })
+    for name, email in enrollments(students, per_student, activity_count):
+        store._add(store.get(name), email)
+    return store
+
+
+def measure(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(*args)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del built
+    return used
+
+
+def time_changes(size, repeat=1000):
+    """Return microseconds per add-and-remove for new ids, early ids and a dict"""
+    students = StudentRegistry()
+    emails = [f"student{i}@mergington.edu" for i in range(size)]
+    roster = Roster(students, emails)
+    rosters = dict.fromkeys(emails)
+    new = [f"new{i}@mergington.edu" for i in range(repeat)]
+    for email in new:
+        students.intern(email)
+    early = emails[:repeat]
+
+    def per_change(start):
+        return (time.perf_counter() - start) / repeat * 1e6
+
+    start = time.perf_counter()
+    for email in new:
+        roster.add(email)
+        roster.remove(email)
+    new_ids = per_change(start)
+    start = time.perf_counter()
+    for email in early:
+        roster.remove(email)
+        roster.add(email)
+    early_ids = per_change(start)
+    start = time.perf_counter()
+    for email in new:
+        rosters[email] = None
+        del rosters[email]
+    return new_ids, early_ids, per_change(start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--per-student", type=int, default=5)
+    parser.add_argument("--activities", type=int, default=50)
+    parser.add_argument("--roster-sizes", default="1000,10000,100000,1000000",
+                        help="Comma-separated roster sizes to time changes on")
+    args = parser.parse_args()
+
+    shape = (args.students, args.per_student, args.activities)
+    total = args.students * args.per_student
+    print(f"{total} enrollments: {args.students} students in {args.per_student} "
+          f"of {args.activities} activities each")
+    baseline = measure(build_dict_rosters, *shape)
+    compact = measure(build_store, *shape)
+    for label, used in (("dict rosters", baseline), ("store", compact)):
+        print(f"{label:>14}: {used / 2 ** 20:8.1f} MiB, {used / total:6.1f} bytes per enrollment")
+    print(f"{'reduction':>14}: {baseline / compact:8.1f}x")
+
+    print()
+    print(f"{'roster size':>12} {'new id us':>10} {'early id us':>12} {'dict us':>8}")
+    for size in (int(size) for size in args.roster_sizes.split(",")):
+        new_ids, early_ids, baseline = time_changes(size)
+        print(f"{size:>12} {new_ids:>10.2f} {early_ids:>12.2f} {baseline:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
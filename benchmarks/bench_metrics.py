@@ -0,0 +1,85 @@
+"""
+Overhead benchmark for the metrics middleware
+
+Calls a trivial ASGI app directly, with and without ``MetricsMiddleware``,
+and reports the extra time per request in microseconds. The middleware is
+also timed with a slow-request log attached but switched off, as it runs in
+production, and switched on with a threshold no request reaches. No server
+or network is involved, so the difference is the cost of recording alone.
+
+    python benchmarks/bench_metrics.py --requests 200000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from metrics import Metrics, MetricsMiddleware  # noqa: E402
+from profiling import SlowRequestLog  # noqa: E402
+
+
+class Route:
+    path = "/activities/{activity_name}/signup"
+
+
+ROUTE = Route()
+START = {"type": "http.response.start", "status": 200, "headers": []}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = ROUTE
+    await send(START)
+    await send(BODY)
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests):
+    scope = {"type": "http", "method": "POST", "path": "/activities/Chess Club/signup"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark metrics middleware overhead")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    slow_off = SlowRequestLog()
+    slow_on = SlowRequestLog(threshold=3600)
+    slow_on.configure(enabled=True)
+    apps = {
+        "bare": endpoint,
+        "instrumented": MetricsMiddleware(endpoint, Metrics()),
+        "slow log off": MetricsMiddleware(endpoint, Metrics(), slow_requests=slow_off),
+        "slow log on": MetricsMiddleware(endpoint, Metrics(), slow_requests=slow_on),
+    }
+    timings = {label: [] for label in apps}
+    for _ in range(args.rounds):
+        for label, app in apps.items():
+            timings[label].append(asyncio.run(run(app, args.requests)))
+
+    # Best of N rounds filters out scheduler noise
+    bare = min(timings["bare"])
+    for label, samples in timings.items():
+        per_request = min(samples) / args.requests * 1e6
+        overhead = (min(samples) - bare) / args.requests * 1e6
+        print(f"{label + ':':<14}{per_request:.2f} us/request, overhead {overhead:.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
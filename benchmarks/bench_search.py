@@ -0,0 +1,112 @@
+"""
+Search benchmark for GET /activities/search
+
+Builds a store of synthetic activities whose names and descriptions are drawn
+from a vocabulary with natural-language word frequencies and times ``store.search`` per query, for typeahead
+prefixes as a student types, whole words, and multi-word queries. Also times
+replacing one activity, which re-indexes only its words.
+
+    python benchmarks/bench_search.py --activities 1000 20000 50000
+"""
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from store import ActivityStore  # noqa: E402
+
+WORDS = (
+    "chess club robotics coding programming art studio painting drawing drama theater "
+    "debate team science olympiad math league basketball soccer volleyball tennis "
+    "swimming track field running choir band orchestra jazz guitar piano photography "
+    "film journalism newspaper yearbook gardening cooking baking chemistry physics "
+    "biology astronomy history geography languages spanish french german japanese "
+    "volunteering community service leadership entrepreneurship investing design "
+    "fashion dance ballet hiphop yoga fitness climbing cycling hiking outdoors "
+    "learn compete practice build create explore perform tournaments workshops projects"
+).split()
+
+QUERIES = {
+    "typeahead": ["c", "ch", "che", "ches", "chess", "ro", "rob", "robo"],
+    "word": ["chess", "robotics", "tournaments", "jazz"],
+    "multi-word": ["chess tour", "learn pro", "science olympiad team", "dance yoga fit"],
+}
+
+
+SYLLABLES = "ba ko ri tel mon sa vi dor lin pe qua zen chi ro ta mi ne fu gar sol".split()
+
+
+def make_vocabulary(rng, size):
+    """Return WORDS followed by made-up words, most frequent first"""
+    vocabulary = list(WORDS)
+    seen = set(vocabulary)
+    while len(vocabulary) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            vocabulary.append(word)
+    return vocabulary
+
+
+def make_store(activity_count, vocabulary_size, seed=0):
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, vocabulary_size)
+    # Word frequencies fall off as 1 / rank, as in natural text
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+    data = {}
+    for i in range(activity_count):
+        name = " ".join(rng.sample(WORDS, 2)).title() + f" {i}"
+        data[name] = {
+            "description": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=12)),
+            # No time range, so building the schedule index stays linear
+            "schedule": "Fridays",
+            "max_participants": 20,
+            "participants": [],
+        }
+    return ActivityStore(data)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def bench(activity_count, vocabulary_size, repeat):
+    store = make_store(activity_count, vocabulary_size)
+    results = {}
+    for kind, queries in QUERIES.items():
+        results[kind] = max(timed(lambda: store.search(query), repeat) for query in queries)
+    name = next(iter(store))
+    results["replace one"] = timed(
+        lambda: store._search.add(name, "a brand new description about chess"), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--activities", type=int, nargs="+", default=[1000, 20000, 50000])
+    parser.add_argument("--vocabulary", type=int, default=5000,
+                        help="distinct description words; smaller makes every word common")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"vocabulary: {args.vocabulary} words, "
+          f"slowest query of each kind, median of {args.repeat} runs (ms)")
+    columns = ("typeahead", "word", "multi-word", "replace one")
+    print(f"{'activities':>10}" + "".join(f"{column:>14}" for column in columns))
+    for activity_count in args.activities:
+        results = bench(activity_count, args.vocabulary, args.repeat)
+        print(f"{activity_count:>10}" + "".join(f"{results[column]:>14.3f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
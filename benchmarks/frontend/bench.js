@@ -0,0 +1,136 @@
+// Frontend rendering benchmark: the original full innerHTML rebuild against
+// the keyed, virtualized renderer in src/static/app.js, on synthetic data
+// with one very large roster. Serve the repository root and open this page:
+//
+//   python -m http.server 8001
+//   http://localhost:8001/benchmarks/frontend/?participants=10000
+//
+// Each timing includes a forced layout, so style and layout cost is counted.
+
+const params = new URLSearchParams(location.search);
+const PARTICIPANTS = Number(params.get("participants")) || 10000;
+const RUNS = Number(params.get("runs")) || 15;
+
+function makeDataset(participants) {
+  const activities = {};
+  for (let i = 0; i < 9; i++) {
+    const size = i === 0 ? participants : 20;
+    activities[`Activity ${i}`] = {
+      description: `Synthetic activity ${i}`,
+      schedule: "Fridays, 3:30 PM - 5:00 PM",
+      max_participants: size + 100,
+      participants: Array.from({ length: size }, (_, n) => `student${i}-${n}@mergington.edu`),
+    };
+  }
+  return activities;
+}
+
+// Run fn RUNS times (after setup each time) and return the median in ms
+function measure(setup, fn) {
+  const samples = [];
+  for (let run = 0; run < RUNS; run++) {
+    const context = setup(run);
+    const start = performance.now();
+    fn(context, run);
+    // Reading layout forces style and layout to finish inside the timing
+    void document.body.offsetHeight;
+    samples.push(performance.now() - start);
+  }
+  samples.sort((a, b) => a - b);
+  return samples[Math.floor(samples.length / 2)];
+}
+
+function benchLegacy(container) {
+  const results = {};
+  results["initial render"] = measure(
+    () => makeDataset(PARTICIPANTS),
+    (data) => legacyDisplayActivities(data, container)
+  );
+
+  const data = makeDataset(PARTICIPANTS);
+  legacyDisplayActivities(data, container);
+  results["one signup"] = measure(
+    () => data,
+    (data, run) => {
+      data["Activity 0"].participants.push(`new${run}@mergington.edu`);
+      legacyDisplayActivities(data, container);
+    }
+  );
+  results["one unregister"] = measure(
+    () => data,
+    (data) => {
+      data["Activity 0"].participants.splice(PARTICIPANTS / 2, 1);
+      legacyDisplayActivities(data, container);
+    }
+  );
+  container.textContent = "";
+  return results;
+}
+
+function benchKeyed(container) {
+  const results = {};
+  results["initial render"] = measure(
+    () => {
+      activityCards.clear();
+      container.textContent = "";
+      return makeDataset(PARTICIPANTS);
+    },
+    (data) => displayActivities(data)
+  );
+
+  state.activities = makeDataset(PARTICIPANTS);
+  activityCards.clear();
+  container.textContent = "";
+  displayActivities(state.activities);
+  results["one signup"] = measure(
+    () => null,
+    (_, run) => {
+      const change = { op: "signup", activity: "Activity 0", email: `new${run}@mergington.edu` };
+      if (applyChange(change)) {
+        updateActivityCard(change.activity);
+      }
+    }
+  );
+  results["one unregister"] = measure(
+    () => state.activities["Activity 0"].participants[PARTICIPANTS / 2],
+    (email) => {
+      const change = { op: "unregister", activity: "Activity 0", email };
+      if (applyChange(change)) {
+        updateActivityCard(change.activity);
+      }
+    }
+  );
+  container.textContent = "";
+  activityCards.clear();
+  return results;
+}
+
+function report(legacy, keyed) {
+  const rows = Object.keys(legacy).map((scenario) => ({
+    scenario,
+    "innerHTML rebuild (ms)": legacy[scenario].toFixed(2),
+    "keyed + virtualized (ms)": keyed[scenario].toFixed(2),
+    speedup: `${(legacy[scenario] / keyed[scenario]).toFixed(1)}x`,
+  }));
+  console.table(rows);
+
+  const table = document.getElementById("results");
+  for (const row of rows) {
+    const tr = table.insertRow();
+    for (const value of Object.values(row)) {
+      tr.insertCell().textContent = value;
+    }
+  }
+  document.getElementById("status").textContent =
+    `Median of ${RUNS} runs, ${PARTICIPANTS} participants in the largest activity.`;
+}
+
+document.getElementById("run").addEventListener("click", () => {
+  document.getElementById("status").textContent = "Running...";
+  // Let the status paint before the page blocks
+  setTimeout(() => {
+    const legacy = benchLegacy(document.getElementById("legacy-list"));
+    const keyed = benchKeyed(document.getElementById("activities-list"));
+    report(legacy, keyed);
+  }, 50);
+});
@@ -0,0 +1,46 @@
+// The original renderer, kept for comparison: every update clears the list
+// and rebuilds every card and participant row from an HTML string.
+function legacyDisplayActivities(activities, activitiesList) {
+  if (Object.keys(activities).length === 0) {
+    activitiesList.innerHTML = "<p>No activities available at this time.</p>";
+    return;
+  }
+
+  activitiesList.innerHTML = "";
+
+  for (const [name, activity] of Object.entries(activities)) {
+    const activityCard = document.createElement("div");
+    activityCard.className = "activity-card";
+
+    const participantsList = activity.participants
+      .map((email) => `
+        <div class="participant-item">
+          <span class="participant-email">${email}</span>
+          <button class="delete-btn" onclick="unregisterParticipant('${name}', '${email}')"
+                  title="Remove participant">
+            <span class="delete-icon">×</span>
+          </button>
+        </div>
+      `)
+      .join("");
+
+    const spotsRemaining = activity.max_participants - activity.participants.length;
+
+    activityCard.innerHTML = `
+          <h4>${name}</h4>
+          <p><strong>Description:</strong> ${activity.description}</p>
+          <p><strong>Schedule:</strong> ${activity.schedule}</p>
+          <p><strong>Spots:</strong> ${activity.participants.length}/${activity.max_participants} filled
+             <span class="spots-remaining">(${spotsRemaining} spots remaining)</span></p>
+          <div class="participants-section">
+              <h5>Current Participants:</h5>
+              ${activity.participants.length > 0 ?
+                  `<div class="participants-list">${participantsList}</div>` :
+                  '<p class="no-participants">No participants yet - be the first to sign up!</p>'
+              }
+          </div>
+      `;
+
+    activitiesList.appendChild(activityCard);
+  }
+}
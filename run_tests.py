@@ -27,6 +27,20 @@ def run_tests(coverage=False, verbose=False):
         print("\nTests interrupted by user")
         return 1
 
+def run_benchmarks(extra_args=()):
+    """Run the API load benchmark, passing any extra arguments through"""
+    script_dir = os.path.dirname(os.path.abspath(__file__)) if '__file__' in globals() else os.getcwd()
+    os.chdir(script_dir)
+    
+    cmd = [sys.executable, os.path.join('benchmarks', 'bench_api.py'), *extra_args]
+    
+    try:
+        result = subprocess.run(cmd, check=False)
+        return result.returncode
+    except KeyboardInterrupt:
+        print("\nBenchmarks interrupted by user")
+        return 1
+
 if __name__ == "__main__":
     import argparse
     
@@ -35,8 +49,16 @@ if __name__ == "__main__":
                        help='Run tests with coverage report')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Run tests in verbose mode')
+    parser.add_argument('--bench', action='store_true',
+                       help='Run the load benchmark instead of the tests; other '
+                            'arguments go to benchmarks/bench_api.py')
     
-    args = parser.parse_args()
+    args, extra_args = parser.parse_known_args()
     
-    exit_code = run_tests(coverage=args.coverage, verbose=args.verbose)
+    if args.bench:
+        exit_code = run_benchmarks(extra_args)
+    elif extra_args:
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
+    else:
+        exit_code = run_tests(coverage=args.coverage, verbose=args.verbose)
     sys.exit(exit_code)
\ No newline at end of file
@@ -2,25 +2,47 @@
 High School Management System API
 
 A super simple FastAPI application that allows students to view and sign up
-for extracurricular activities at Mergington High School.
+for extracurricular activities at Mergington High School, or at any number of
+schools, each served under ``/schools/{school_id}`` from its own store.
 """
 
-from fastapi import FastAPI, HTTPException, Query, Form
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Form, Header, Path, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (JSONResponse, PlainTextResponse, RedirectResponse, Response,
+                               StreamingResponse)
+import asyncio
+import base64
+import binascii
+import hmac
+import math
 import os
-from pathlib import Path
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path as FilePath
 
-app = FastAPI(title="Mergington High School API",
-              description="API for viewing and signing up for extracurricular activities")
+from assets import load_assets
+from bulk import ACTIONS, apply_rows, chunks, parse_rows
+from metrics import Metrics, MetricsMiddleware
+from models import (ActivitiesOut, ChangesOut, SchoolsOut, SearchResultsOut, StatsOut,
+                    StudentActivitiesOut)
+from persistence import StorageError
+from profiling import MAX_PROFILE_SECONDS, ProfilerBusyError, SamplingProfiler, SlowRequestLog
+from push import encode_event, parse_event_id
+from ratelimit import IdempotencyKeyReusedError
+from schedule import DAYS
+from school import School, load_schools, open_schools
+from search import TOP_K
+from serialization import dumps
+from store import (Activity, ActivityNotFoundError, AlreadySignedUpError, NotSignedUpError,
+                   AlreadyWaitlistedError, NotWaitlistedError, ScheduleConflictError)
 
-# Mount the static files directory
-current_dir = Path(__file__).parent
-app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
-          "static")), name="static")
 
-# In-memory activity database
-activities = {
+# Static files, fingerprinted and precompressed once at startup
+current_dir = FilePath(__file__).parent
+static_assets = load_assets(current_dir / "static")
+
+# Mergington's own activities, served when no MERGINGTON_SCHOOLS file is given
+initial_activities = {
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
@@ -77,50 +99,558 @@ activities = {
     }
 }
 
+DEFAULT_SCHOOLS = {
+    "mergington": {"name": "Mergington High School", "activities": initial_activities},
+}
+
+# Routes for one school's activities, served both at the top level for the
+# first school and under /schools/{school_id} for every school
+router = APIRouter()
+service = APIRouter()
+
+
+def create_app(schools=None, environ=None):
+    """Return an app serving ``schools``, each with its own store
+
+    ``schools`` maps school ids to ``{"name": ..., "activities": {...}}``; it
+    defaults to the JSON file named by MERGINGTON_SCHOOLS, or to Mergington
+    High School alone. Storage, rate limit and admin settings are read from
+    ``environ``, os.environ by default. Apps share no state, so several can
+    run side by side in one process.
+    """
+    if environ is None:
+        environ = os.environ
+    if schools is None:
+        path = environ.get("MERGINGTON_SCHOOLS")
+        schools = load_schools(path) if path else DEFAULT_SCHOOLS
+    if not schools:
+        raise ValueError("At least one school is required")
+    schools = open_schools(schools, environ)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        for school in schools.values():
+            await school.close()
+
+    app = FastAPI(title="Mergington High School API",
+                  description="API for viewing and signing up for extracurricular activities",
+                  lifespan=lifespan)
+    app.state.schools = schools
+    # The first school is also served without a /schools/{school_id} prefix
+    app.state.default_school = next(iter(schools.values()))
+
+    # Per-route latency and status metrics, served on /metrics, and the
+    # slowest recent requests, recorded only while switched on through /admin
+    app.state.metrics = Metrics()
+    app.state.slow_requests = SlowRequestLog(
+        app.state.default_school.activities,
+        schools={school_id: school.activities for school_id, school in schools.items()})
+    app.add_middleware(MetricsMiddleware, metrics=app.state.metrics,
+                       slow_requests=app.state.slow_requests)
+
+    # Runtime diagnostics under /admin, only available when
+    # MERGINGTON_ADMIN_TOKEN is set and sent back in the X-Admin-Token header
+    app.state.admin_token = environ.get("MERGINGTON_ADMIN_TOKEN")
+    app.state.profiler = SamplingProfiler()
+
+    app.include_router(service)
+    app.include_router(router)
+    app.include_router(router, prefix="/schools/{school_id}",
+                       dependencies=[Depends(school_id_parameter)])
+    return app
 
-@app.get("/")
-def root():
+
+async def school_id_parameter(school_id: str = Path(...)):
+    """Declares ``school_id`` for the prefixed routes' documentation"""
+
+
+async def current_school(request: Request) -> School:
+    """The school a request is for: the one in its path, or the default"""
+    school_id = request.path_params.get("school_id")
+    if school_id is None:
+        return request.app.state.default_school
+    school = request.app.state.schools.get(school_id)
+    if school is None:
+        raise HTTPException(status_code=404, detail="School not found")
+    return school
+
+
+@service.get("/")
+async def root():
     return RedirectResponse(url="/static/index.html")
 
 
-@app.get("/activities")
-def get_activities():
-    return activities
+@service.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_static_asset(request: Request, path: str):
+    """Serve a static file, compressed to match the client's Accept-Encoding"""
+    asset = static_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    encoding, body = asset.negotiate(request.headers.get("accept-encoding"))
+    # Each encoding is a different representation, so it gets its own ETag
+    etag = f'{asset.etag[:-1]}-{encoding}"' if encoding else asset.etag
+    headers = {"ETag": etag, "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=asset.media_type, headers=headers)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` encoded with orjson when available
+
+    Returning one directly skips FastAPI's generic ``jsonable_encoder`` pass,
+    which dominates the cost of large responses.
+    """
+
+    def render(self, content):
+        return dumps(content)
+
+
+def etag_matches(if_none_match, etag):
+    """Return True if an ``If-None-Match`` header matches ``etag``"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def encode_cursor(name):
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@service.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus metrics for requests and roster sizes"""
+    stores = {school_id: school.activities
+              for school_id, school in request.app.state.schools.items()}
+    return PlainTextResponse(request.app.state.metrics.render(stores),
+                             media_type="text/plain; version=0.0.4")
+
+
+@service.get("/schools", response_model=SchoolsOut)
+async def get_schools(request: Request):
+    """List the schools served, each under ``/schools/{school_id}``"""
+    return {"schools": [{"id": school.id, "name": school.name,
+                         "activities": len(school.activities)}
+                        for school in request.app.state.schools.values()]}
+
+
+@router.get("/stats", response_model=StatsOut)
+async def get_stats(top: int = Query(5, ge=1, le=100),
+                    school: School = Depends(current_school)):
+    """Enrollment statistics for a capacity dashboard
+
+    Returns totals, each activity's fill ratio, the ``top`` most subscribed
+    activities and signups per weekday. The counters are kept current as
+    rosters change, so no roster is read.
+    """
+    return FastJSONResponse(school.stats.snapshot(top))
+
+
+@router.get("/activities", response_model=ActivitiesOut)
+async def get_activities(request: Request,
+                         limit: int = Query(None, ge=1, le=1000),
+                         cursor: str = Query(None),
+                         day: str = Query(None),
+                         min_spots: int = Query(None, ge=0),
+                         fields: str = Query(None),
+                         as_of: datetime = Query(None),
+                         school: School = Depends(current_school)):
+    """List activities
+
+    With no parameters, every activity is returned keyed by name. Any of
+    ``limit``, ``cursor``, ``day``, ``min_spots`` or ``fields`` switch to a
+    paged listing: ``{"activities": [...], "next_cursor": ...}``, where
+    ``fields`` is a comma-separated projection such as
+    ``name,spots_remaining``. ``as_of`` (an ISO 8601 time, UTC unless
+    given) returns every activity as it was at that time instead.
+    """
+    paging = (limit, cursor, day, min_spots, fields)
+    if as_of is not None:
+        if any(value is not None for value in paging):
+            raise HTTPException(status_code=400,
+                                detail="as_of cannot be combined with paging or filtering")
+        return FastJSONResponse(await activities_as_of(school, as_of))
+    if all(value is None for value in paging):
+        return await full_activities_response(request, school.activities)
+
+    if day is not None:
+        day = day.lower().removesuffix("s")
+        if day not in DAYS:
+            raise HTTPException(status_code=400, detail="Unknown day")
+    if fields is None:
+        selected = ("name", "description", "schedule", "max_participants", "participants")
+    else:
+        selected = tuple(field.strip() for field in fields.split(",") if field.strip())
+        unknown = [field for field in selected if field not in Activity.FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    after = decode_cursor(cursor) if cursor is not None else None
+
+    activities = school.activities
+    try:
+        page, last_name = await activities.read_async(activities.page, after, limit, day,
+                                                      min_spots)
+    except ActivityNotFoundError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return FastJSONResponse({
+        "activities": [activity.project(selected) for activity in page],
+        "next_cursor": encode_cursor(last_name) if last_name is not None else None,
+    })
+
+
+async def activities_as_of(school, as_of):
+    if as_of.tzinfo is None:
+        as_of = as_of.replace(tzinfo=timezone.utc)
+    # Reads checkpoint and log files
+    past = await run_in_threadpool(school.history.as_of, as_of)
+    if past is None:
+        raise HTTPException(status_code=404, detail="No history recorded at that time")
+    return past
+
+
+async def full_activities_response(request, activities):
+    version, body = await activities.read_async(activities.to_json)
+    etag = f'"{activities.epoch}-{version}"'
+    # Clients may cache the body but must revalidate it with the ETag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Activities-Epoch": activities.epoch,
+        "X-Activities-Version": str(version),
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
-@app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str = Form(...)):
-    """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+@router.get("/activities/changes", response_model=ChangesOut)
+async def get_activity_changes(since: int = Query(...),
+                               school: School = Depends(current_school)):
+    """List roster changes made after version ``since``
 
-    # Get the specific activity
-    activity = activities[activity_name]
+    If those changes are no longer buffered, ``resync`` is true and the
+    client should fetch ``GET /activities`` again.
+    """
+    activities = school.activities
+    events = school.changes.since(since)
+    if events is None:
+        return FastJSONResponse({"epoch": activities.epoch, "version": activities.version,
+                                 "resync": True, "changes": []})
+    return FastJSONResponse({
+        "epoch": activities.epoch,
+        "version": events[-1]["version"] if events else since,
+        "resync": False,
+        "changes": events,
+    })
 
-    # Validate student is not already signed up
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
 
-    # Add student
-    activity["participants"].append(email)
+@router.get("/activities/search", response_model=SearchResultsOut)
+async def search_activities(q: str = Query(...), limit: int = Query(10, ge=1, le=TOP_K),
+                            school: School = Depends(current_school)):
+    """Find activities by keywords in their name or description, best first
+
+    Every word must match; the last may be the start of a word, so this
+    also serves typeahead.
+    """
+    activities = school.activities
+    found = await activities.read_async(activities.search, q, limit)
+    return FastJSONResponse({
+        "query": q,
+        "results": [{"name": activity.name, "score": round(score, 4),
+                     "description": activity.description, "schedule": activity.schedule,
+                     "spots_remaining": activity.spots_remaining}
+                    for activity, score in found],
+    })
+
+
+@router.get("/activities/stream")
+async def stream_activity_changes(request: Request, last_event_id: str = Query(None),
+                                  school: School = Depends(current_school)):
+    """Push roster changes as Server-Sent Events
+
+    Starts after the event id ``last_event_id`` (or the browser's
+    ``Last-Event-ID`` header when it reconnects); ids have the form
+    ``<epoch>-<version>``. A ``reset`` event tells the client to reload
+    everything.
+    """
+    last_event_id = request.headers.get("last-event-id", last_event_id)
+    activities, changes, broadcaster = school.activities, school.changes, school.broadcaster
+
+    def catch_up():
+        if last_event_id is None:
+            return []
+        since = parse_event_id(last_event_id, activities.epoch)
+        events = changes.since(since) if since is not None else None
+        if events is None or len(events) >= broadcaster.queue_size:
+            reset = {"version": activities.version, "op": "reset"}
+            return [encode_event(reset, activities.epoch)]
+        return [encode_event(event, activities.epoch) for event in events]
+
+    subscriber = broadcaster.connect(catch_up)
+
+    async def messages():
+        try:
+            while True:
+                message = await subscriber.next()
+                if message is None:
+                    # Dropped for falling behind; the browser will reconnect
+                    return
+                yield message
+        finally:
+            broadcaster.disconnect(subscriber)
+
+    return StreamingResponse(messages(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/activities/bulk")
+async def bulk_update_activities(request: Request, action: str = Query("signup"),
+                                 school: School = Depends(current_school)):
+    """Sign up or unregister many students from a streamed CSV or NDJSON body
+
+    Each row names an activity and an email. Results are returned per row,
+    in the order the rows were sent.
+    """
+    if action not in ACTIONS:
+        raise HTTPException(status_code=400, detail=f"Action must be one of: {', '.join(ACTIONS)}")
+
+    rows = parse_rows(request.stream(), request.headers.get("content-type"))
+    results = []
+    async for chunk in chunks(rows):
+        # Applying waits on storage commits, so keep it off the event loop
+        try:
+            results += await run_in_threadpool(apply_rows, school.activities, action, chunk,
+                                               len(results))
+        except StorageError as exc:
+            raise HTTPException(status_code=503, detail=exc.detail)
+    statuses = [result["status"] for result in results]
+    return {
+        "processed": len(results),
+        "succeeded": statuses.count("ok"),
+        "waitlisted": statuses.count("waitlisted"),
+        "failed": statuses.count("error"),
+        "results": results,
+    }
+
+
+@router.post("/activities/{activity_name}/signup")
+async def signup_for_activity(request: Request, activity_name: str, email: str = Form(...),
+                              check_conflicts: bool = Query(False),
+                              idempotency_key: str = Header(None),
+                              school: School = Depends(current_school)):
+    """Sign up a student for an activity, or join its waitlist if it is full
+
+    With ``check_conflicts``, refuse the signup if the activity's schedule
+    overlaps another activity the student is in. Duplicate submissions
+    still in flight share one response, and a request with an
+    ``Idempotency-Key`` header that already succeeded gets the same response
+    again instead of being reapplied.
+    """
+    if idempotency_key:
+        key = ("idempotency-key", idempotency_key)
+    else:
+        # Only identical requests share a response when no key was sent
+        key = ("signup", activity_name, email, check_conflicts)
+    try:
+        return await school.signups_in_flight.run_async(
+            key,
+            lambda: sign_up(request, school, activity_name, email, check_conflicts),
+            fingerprint=(activity_name, email, check_conflicts),
+            remember=bool(idempotency_key),
+        )
+    except IdempotencyKeyReusedError as exc:
+        raise HTTPException(status_code=400, detail=exc.detail)
+
+
+async def sign_up(request, school, activity_name, email, check_conflicts):
+    client = request.client.host if request.client else None
+    # Shed bursts before they queue on the activity lock
+    check_rate(school.client_limiter, (client, email))
+    check_rate(school.activity_limiter, activity_name)
+    try:
+        position = await school.activities.signup_async(activity_name, email,
+                                                        check_conflicts=check_conflicts)
+    except ActivityNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=exc.detail)
+    except (AlreadySignedUpError, AlreadyWaitlistedError, ScheduleConflictError) as exc:
+        raise HTTPException(status_code=400, detail=exc.detail)
+    except StorageError as exc:
+        raise HTTPException(status_code=503, detail=exc.detail)
+    if position is not None:
+        return {"message": f"Added {email} to the waitlist for {activity_name}",
+                "waitlisted": True, "position": position}
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
-@app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str = Query(...)):
-    """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+def check_rate(limiter, key):
+    retry_after = limiter.acquire(key)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many signup requests, try again shortly",
+                            headers={"Retry-After": str(math.ceil(retry_after))})
+
+
+@router.delete("/activities/{activity_name}/unregister")
+async def unregister_from_activity(activity_name: str, email: str = Query(...),
+                                   school: School = Depends(current_school)):
+    """Unregister a student from an activity
+
+    The student at the head of the waitlist, if any, takes the freed spot.
+    """
+    try:
+        promoted = await school.activities.unregister_async(activity_name, email)
+    except ActivityNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=exc.detail)
+    except NotSignedUpError as exc:
+        raise HTTPException(status_code=400, detail=exc.detail)
+    except StorageError as exc:
+        raise HTTPException(status_code=503, detail=exc.detail)
+    response = {"message": f"Unregistered {email} from {activity_name}"}
+    if promoted is not None:
+        response["promoted"] = promoted
+    return response
+
+
+@router.get("/activities/{activity_name}/waitlist")
+async def get_waitlist_position(activity_name: str, email: str = Query(...),
+                                school: School = Depends(current_school)):
+    """Return a student's 1-based position on an activity's waitlist"""
+    activities = school.activities
+    try:
+        position = await activities.waitlist_position_async(activity_name, email)
+    except ActivityNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=exc.detail)
+    if position is None:
+        raise HTTPException(status_code=404, detail=NotWaitlistedError.detail)
+    return {"activity": activity_name, "email": email, "position": position,
+            "waitlist_length": len(activities.get(activity_name).waitlist)}
+
+
+@router.delete("/activities/{activity_name}/waitlist")
+async def leave_waitlist(activity_name: str, email: str = Query(...),
+                         school: School = Depends(current_school)):
+    """Take a student off an activity's waitlist"""
+    try:
+        await school.activities.leave_waitlist_async(activity_name, email)
+    except ActivityNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=exc.detail)
+    except NotWaitlistedError as exc:
+        raise HTTPException(status_code=400, detail=exc.detail)
+    except StorageError as exc:
+        raise HTTPException(status_code=503, detail=exc.detail)
+    return {"message": f"Removed {email} from the waitlist for {activity_name}"}
+
+
+@router.get("/students/{email}/activities", response_model=StudentActivitiesOut)
+async def get_student_activities(email: str, as_of: datetime = Query(None),
+                                 school: School = Depends(current_school)):
+    """List the activities a student is signed up for, in signup order
+
+    With ``as_of``, list those the student was in at that time instead, in
+    activity order.
+    """
+    if as_of is not None:
+        past = await activities_as_of(school, as_of)
+        names = [name for name, activity in past.items() if email in activity["participants"]]
+        return FastJSONResponse({"email": email, "activities": names})
+    activities = school.activities
+    names = await activities.read_async(activities.activities_for, email)
+    return FastJSONResponse({"email": email, "activities": names})
+
+
+@router.get("/students/{email}/conflicts")
+async def get_student_conflicts(email: str, school: School = Depends(current_school)):
+    """List pairs of a student's activities whose schedules overlap"""
+    activities = school.activities
+    conflicts = []
+    for first, second in await activities.read_async(activities.conflicts_for, email):
+        days = activities.get(first).days & activities.get(second).days
+        conflicts.append({
+            "activities": [first, second],
+            "days": [day for day in DAYS if day in days],
+        })
+    return {"email": email, "conflicts": conflicts}
+
+
+def require_admin(request, token):
+    admin_token = request.app.state.admin_token
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@service.post("/admin/profile", include_in_schema=False)
+async def run_profiler(request: Request,
+                       seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+                       interval_ms: float = Query(5.0, ge=1, le=1000),
+                       x_admin_token: str = Header(None)):
+    """Sample every thread's stack for ``seconds`` and return collapsed stacks
+
+    The output can be fed straight to ``flamegraph.pl`` or speedscope.
+    """
+    require_admin(request, x_admin_token)
+    profiler = request.app.state.profiler
+    try:
+        profiler.start(interval_ms / 1000)
+    except ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=exc.detail)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = profiler.stop()
+    return PlainTextResponse(stacks, headers={"X-Profile-Samples": str(profiler.samples)})
+
+
+@service.get("/admin/slow-requests", include_in_schema=False)
+async def get_slow_requests(request: Request, x_admin_token: str = Header(None)):
+    """List the recorded slow requests, slowest first"""
+    require_admin(request, x_admin_token)
+    return slow_requests_response(request.app.state.slow_requests)
+
+
+@service.put("/admin/slow-requests", include_in_schema=False)
+async def configure_slow_requests(request: Request,
+                                  enabled: bool = Query(None),
+                                  threshold_ms: float = Query(None, ge=0),
+                                  capacity: int = Query(None, ge=1, le=10000),
+                                  x_admin_token: str = Header(None)):
+    """Switch slow-request recording on or off, or change its limits"""
+    require_admin(request, x_admin_token)
+    slow_requests = request.app.state.slow_requests
+    slow_requests.configure(enabled=enabled, capacity=capacity,
+                            threshold=threshold_ms / 1000 if threshold_ms is not None else None)
+    return slow_requests_response(slow_requests)
+
+
+@service.delete("/admin/slow-requests", include_in_schema=False)
+async def clear_slow_requests(request: Request, x_admin_token: str = Header(None)):
+    """Forget the recorded slow requests"""
+    require_admin(request, x_admin_token)
+    request.app.state.slow_requests.clear()
+    return slow_requests_response(request.app.state.slow_requests)
+
 
-    # Get the specific activity
-    activity = activities[activity_name]
+def slow_requests_response(slow_requests):
+    return FastJSONResponse({
+        "enabled": slow_requests.enabled,
+        "threshold_ms": slow_requests.threshold * 1000,
+        "capacity": slow_requests.capacity,
+        "requests": slow_requests.slowest(),
+    })
 
-    # Validate student is signed up for this activity
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student is not registered for this activity")
 
-    # Remove student
-    activity["participants"].remove(email)
-    return {"message": f"Unregistered {email} from {activity_name}"}
+app = create_app()
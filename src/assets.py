@@ -0,0 +1,123 @@
+"""
+Fingerprinted, precompressed static assets.
+
+At startup every file in the static directory is read into memory under a
+content-hashed name (``app.3f2a9c1b0d.js``) and compressed once with gzip,
+and with brotli when the optional ``brotli`` package is installed.
+References to those files in ``index.html`` are rewritten to the hashed
+names, so hashed assets can be cached forever and only the HTML needs
+revalidating on a repeat visit.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+#: Pages served under their own name and revalidated on every load
+PAGES = ("index.html",)
+#: Smaller files are not worth compressing
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+REFERENCE = re.compile(r'(\b(?:href|src)=")([^"]+)(")')
+
+
+class Asset:
+    """One servable file with its precompressed variants"""
+
+    __slots__ = ("body", "media_type", "etag", "cache_control", "encoded")
+
+    def __init__(self, body, media_type, cache_control):
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.cache_control = cache_control
+        # Content-Encoding -> body, only where it is actually smaller
+        self.encoded = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body)
+            for encoding, encoded in variants.items():
+                if len(encoded) < len(body):
+                    self.encoded[encoding] = encoded
+
+    def negotiate(self, accept_encoding):
+        """Return ``(encoding, body)`` for an Accept-Encoding header value"""
+        accepted = _parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding, self.encoded[encoding]
+        return None, self.body
+
+
+def _parse_accept_encoding(header):
+    accepted = {}
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def fingerprint(name, body):
+    """Return ``name`` with a content hash before its extension"""
+    path = Path(name)
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    return str(path.with_name(f"{path.stem}.{digest}{path.suffix}").as_posix())
+
+
+def _media_type(name):
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript",
+                                                         "application/json"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def load_assets(directory):
+    """Return a dict from URL path (relative to the mount) to :class:`Asset`
+
+    Assets are served under their hashed names with immutable caching, and
+    under their original names with revalidation, for pages that were not
+    rewritten. Pages are served under their original names only.
+    """
+    directory = Path(directory)
+    assets = {}
+    hashed = {}
+    for path in sorted(directory.rglob("*")):
+        name = path.relative_to(directory).as_posix()
+        if not path.is_file() or name in PAGES:
+            continue
+        body = path.read_bytes()
+        media_type = _media_type(name)
+        hashed[name] = fingerprint(name, body)
+        assets[hashed[name]] = Asset(body, media_type, IMMUTABLE)
+        assets[name] = Asset(body, media_type, REVALIDATE)
+
+    def rewrite(match):
+        return match.group(1) + hashed.get(match.group(2), match.group(2)) + match.group(3)
+
+    for name in PAGES:
+        path = directory / name
+        if path.is_file():
+            html = REFERENCE.sub(rewrite, path.read_text(encoding="utf-8"))
+            assets[name] = Asset(html.encode("utf-8"), _media_type(name), REVALIDATE)
+    return assets
@@ -0,0 +1,122 @@
+"""
+Bulk roster imports.
+
+Parses a stream of ``(activity, email)`` rows as the request body arrives,
+either CSV (``activity,email`` with an optional header line) or
+newline-delimited JSON objects with ``activity`` and ``email`` keys. Rows are
+applied ``CHUNK_ROWS`` at a time as they arrive; within a chunk they are
+grouped by activity and applied with one locked pass per activity, and the
+results come back in the original row order.
+"""
+
+import csv
+import json
+
+from store import ActivityNotFoundError, StoreError
+
+ACTIONS = ("signup", "unregister")
+INVALID_ROW = "Row must have an activity and an email"
+
+#: Rows parsed before they are applied
+CHUNK_ROWS = 1000
+
+
+async def iter_lines(chunks):
+    """Yield complete lines (as bytes) from an async iterator of byte chunks"""
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line
+    if tail:
+        yield tail
+
+
+def _parse_csv(text):
+    fields = next(csv.reader([text]), [])
+    if len(fields) != 2:
+        return None
+    return fields[0].strip(), fields[1].strip()
+
+
+def _parse_json(text):
+    try:
+        row = json.loads(text)
+        return row["activity"], row["email"]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+async def parse_rows(chunks, content_type):
+    """Yield ``(activity, email)`` per row, or ``None`` for a malformed row"""
+    is_csv = "csv" in (content_type or "")
+    first = True
+    async for line in iter_lines(chunks):
+        try:
+            text = line.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            first = False
+            yield None
+            continue
+        if not text:
+            continue
+        if is_csv:
+            row = _parse_csv(text)
+            if first and row and row[0].lower() == "activity" and row[1].lower() == "email":
+                first = False
+                continue
+        else:
+            row = _parse_json(text)
+        first = False
+        yield row
+
+
+async def chunks(rows, size=CHUNK_ROWS):
+    """Group an async iterator of rows into lists of up to ``size``"""
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def apply_rows(store, action, rows, start=0):
+    """Apply parsed rows to ``store`` and return one result dict per row
+
+    Rows are numbered from ``start``.
+    """
+    by_activity = {}
+    results = []
+    for index, row in enumerate(rows, start):
+        if row is None or not isinstance(row[0], str) or not isinstance(row[1], str):
+            results.append({"row": index, "status": "error", "detail": INVALID_ROW})
+            continue
+        activity, email = row
+        results.append({"row": index, "activity": activity, "email": email})
+        by_activity.setdefault(activity, []).append(index - start)
+
+    for activity, indexes in by_activity.items():
+        emails = [results[i]["email"] for i in indexes]
+        apply = store.signup_many if action == "signup" else store.unregister_many
+        try:
+            outcomes = apply(activity, emails)
+        except ActivityNotFoundError as exc:
+            outcomes = [exc] * len(emails)
+        for index, outcome in zip(indexes, outcomes):
+            result = results[index]
+            if isinstance(outcome, StoreError):
+                result["status"] = "error"
+                result["detail"] = outcome.detail
+            elif action == "signup" and outcome is not None:
+                result["status"] = "waitlisted"
+                result["position"] = outcome
+            else:
+                result["status"] = "ok"
+                if outcome is not None:
+                    result["promoted"] = outcome
+    return results
+
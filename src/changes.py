@@ -0,0 +1,45 @@
+"""
+Change feed for the activity store.
+
+Keeps the most recent roster changes in a bounded ring buffer so clients can
+ask for everything that happened after the version they last saw, instead of
+downloading every activity again.
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+
+
+class ChangeFeed:
+    """Ring buffer of the last ``capacity`` store events"""
+
+    def __init__(self, store, capacity=1024):
+        self._events = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        # Every change after ``_floor`` is still in the buffer
+        self._floor = store.version
+        store.subscribe(self._on_change)
+
+    def _on_change(self, event):
+        with self._lock:
+            if event["op"] == "reset":
+                self._events.clear()
+                self._floor = event["version"]
+                return
+            if len(self._events) == self._events.maxlen:
+                self._floor = self._events[0]["version"]
+            self._events.append(event)
+
+    def since(self, version):
+        """Return the changes after ``version``, oldest first
+
+        Returns ``None`` when some of those changes have already been evicted
+        (or ``version`` is unknown), meaning the caller has to resync.
+        """
+        with self._lock:
+            latest = self._events[-1]["version"] if self._events else self._floor
+            if version < self._floor or version > latest:
+                return None
+            # Versions are consecutive, so the offset is a simple subtraction
+            return list(islice(self._events, version - self._floor, None))
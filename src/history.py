@@ -0,0 +1,355 @@
+"""
+Roster history with point-in-time queries.
+
+``History`` listens to store changes and appends each one to an append-only
+log in ``directory``. The log is split into segments of at most
+``checkpoint_every`` changes, each starting from a checkpoint of every
+roster at that moment. ``as_of(t)`` loads the latest checkpoint at or before
+``t`` and replays at most one segment after it. The writer keeps only the
+current segment's string table in memory, and a new checkpoint is built from
+the previous one plus its segment, read back from disk, so memory does not
+grow with the length of the history.
+
+Log records are binary: a varint millisecond delta from the previous record,
+an op byte, and the activity and email as varint references into a
+per-segment string table. A string is spelled out only the first time a
+segment uses it, so a typical record takes five or six bytes.
+
+Each process writes to a subdirectory of its own, named after the time it
+started, so worker processes started with the same ``directory`` never write
+the same files. On close a process leaves an empty ``<time>.end`` file
+recording its last change. Every worker sees every change, so ``as_of`` can
+answer from any one worker's history. It prefers a segment known to cover
+the requested time: one followed by a later checkpoint, this process's
+current segment, or a segment whose last record is at or after that time.
+Failing that, it uses the most recent state recorded before the time.
+Processes that started after the time, or that exited before it while a
+better answer is already known, are skipped without being read.
+
+With ``retention`` (in seconds), older segments are deleted after each
+checkpoint, and earlier times are no longer answered. The history of another
+process whose last change is older than the retention period is deleted
+whole, so restarts do not accumulate directories. Without ``retention``,
+history grows by a checkpoint of every roster every ``checkpoint_every``
+changes, and by one directory per process started.
+"""
+
+import gzip
+import json
+import math
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from serialization import dumps
+
+#: Logged operations, encoded as their index
+OPS = ("signup", "unregister", "waitlist", "unwaitlist")
+
+CHECKPOINT_SUFFIX = ".ckpt"
+LOG_SUFFIX = ".log"
+END_SUFFIX = ".end"
+
+
+def _varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return out
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def decode_log(data, start_time):
+    """Yield ``(time_ms, op, activity, email)`` from one segment's log bytes
+
+    A record cut short by a crash ends the segment.
+    """
+    strings = []
+    now = start_time
+    pos = 0
+
+    def read_ref():
+        nonlocal pos
+        ref, pos = _read_varint(data, pos)
+        if ref:
+            return strings[ref - 1]
+        length, pos = _read_varint(data, pos)
+        raw = data[pos:pos + length]
+        if len(raw) < length:
+            raise IndexError("truncated string")
+        pos += length
+        strings.append(raw.decode("utf-8"))
+        return strings[-1]
+
+    while pos < len(data):
+        try:
+            delta, pos = _read_varint(data, pos)
+            op = OPS[data[pos]]
+            pos += 1
+            activity = read_ref()
+            email = read_ref()
+        except (IndexError, UnicodeDecodeError):
+            return
+        now += delta
+        yield now, op, activity, email
+
+
+def to_millis(when):
+    """Return a POSIX timestamp in seconds, or a datetime, as integer milliseconds"""
+    if hasattr(when, "timestamp"):
+        when = when.timestamp()
+    return int(when * 1000)
+
+
+class History:
+    """Append-only roster history for one store, with checkpoints"""
+
+    def __init__(self, store, directory=None, checkpoint_every=1000, retention=None,
+                 clock=time.time):
+        self.checkpoint_every = checkpoint_every
+        self.retention = retention
+        self._store = store
+        self._clock = clock
+        self._tempdir = None
+        if directory is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="mergington-history-")
+            directory = self._tempdir.name
+        self.root = Path(directory)
+        # This process's own segments; the pid may be reused after a restart
+        self.directory = self.root / f"{self._now()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue = queue.Queue()
+        self._thread = None
+        # Current segment
+        self._segment_id = 0
+        self._log = None
+        self._strings = {}
+        self._count = 0
+        self._segment_start = self._last_time = 0
+
+    def open(self):
+        """Checkpoint the store as it is now and start logging changes"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._store.subscribe(self._on_change)
+        # Changes queued ahead of this are already in the checkpoint
+        self._queue.put(("reset", self._now(), self._store.to_dict()))
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def _now(self):
+        return to_millis(self._clock())
+
+    def _on_change(self, event):
+        # Runs under the store's version lock, so events arrive in order
+        if event["op"] == "reset":
+            # Activities were replaced wholesale; to_dict() only reads
+            self._queue.put(("reset", self._now(), self._store.to_dict()))
+        elif event["op"] in OPS:
+            self._queue.put((event["op"], self._now(), event["activity"], event["email"]))
+
+    # -- writer thread -----------------------------------------------------
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    if self._log is not None:
+                        self._log.close()
+                        (self.directory / f"{self._last_time}{END_SUFFIX}").touch()
+                    return
+                if item[0] == "reset":
+                    self._checkpoint(item[1], item[2])
+                elif self._log is not None:
+                    self._append(*item)
+                    if self._count >= self.checkpoint_every:
+                        self._log.flush()
+                        activities = self._replay(self.directory, self._segment_id,
+                                                  self._segment_start)
+                        self._checkpoint(self._last_time, activities)
+                        if self.retention is not None:
+                            self._prune(self._last_time - int(self.retention * 1000))
+                if self._log is not None and self._queue.empty():
+                    self._log.flush()
+            finally:
+                self._queue.task_done()
+
+    def _append(self, op, when, activity, email):
+        # Keep times monotonic even if the wall clock steps back
+        when = max(when, self._last_time)
+        record = _varint(when - self._last_time)
+        record.append(OPS.index(op))
+        for text in (activity, email):
+            index = self._strings.get(text)
+            if index is None:
+                self._strings[text] = len(self._strings)
+                raw = text.encode("utf-8")
+                record += _varint(0) + _varint(len(raw)) + raw
+            else:
+                record += _varint(index + 1)
+        self._log.write(record)
+        self._last_time = when
+        self._count += 1
+
+    def _checkpoint(self, when, activities):
+        if self._log is not None:
+            self._log.close()
+        when = max(when, self._last_time)
+        self._segment_id += 1
+        # Another process may have taken this one for exited and deleted it
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{self._segment_id:08d}-{when}{CHECKPOINT_SUFFIX}"
+        partial = path.with_suffix(".tmp")
+        with gzip.open(partial, "wb") as f:
+            f.write(dumps({"time": when, "activities": activities}))
+        partial.replace(path)
+        self._log = open(self.directory / f"{self._segment_id:08d}{LOG_SUFFIX}", "ab")
+        self._strings = {}
+        self._count = 0
+        self._segment_start = self._last_time = when
+
+    def _prune(self, cutoff):
+        """Delete closed segments, and other processes' histories, that ended before ``cutoff``"""
+        for directory, _, ended in self._writers():
+            segments = self._checkpoints(directory)
+            if directory != self.directory and segments:
+                if ended is None:
+                    # Still running, or exited without closing its history
+                    segment_id, start_time, _ = segments[-1]
+                    ended = self._last_change(directory, segment_id, start_time)
+                if ended < cutoff:
+                    shutil.rmtree(directory, ignore_errors=True)
+                    continue
+            for (segment_id, _, path), (_, following, _) in zip(segments, segments[1:]):
+                if following >= cutoff:
+                    break
+                path.unlink(missing_ok=True)
+                (directory / f"{segment_id:08d}{LOG_SUFFIX}").unlink(missing_ok=True)
+
+    # -- queries -----------------------------------------------------------
+
+    def _writers(self):
+        """Return ``(directory, started, ended)`` for every process's history
+
+        ``ended`` is the time of the last change a process recorded before
+        closing its history, or None. This process comes first, then the
+        others still running, then the most recently closed.
+        """
+        writers = []
+        for path in self.root.iterdir():
+            if not path.is_dir():
+                continue
+            ends = [int(end.stem) for end in path.glob(f"*{END_SUFFIX}")]
+            started = int(path.name.partition("-")[0])
+            writers.append((path, started, max(ends) if ends else None))
+        writers.sort(key=lambda writer: (writer[0] != self.directory,
+                                         -math.inf if writer[2] is None else -writer[2]))
+        return writers
+
+    @staticmethod
+    def _checkpoints(directory):
+        """Return ``(segment_id, start_time, path)`` per checkpoint, oldest first"""
+        checkpoints = []
+        for path in directory.glob(f"*{CHECKPOINT_SUFFIX}"):
+            segment_id, _, when = path.stem.partition("-")
+            checkpoints.append((int(segment_id), int(when), path))
+        return sorted(checkpoints)
+
+    @staticmethod
+    def _read_log(directory, segment_id):
+        log = directory / f"{segment_id:08d}{LOG_SUFFIX}"
+        try:
+            return log.read_bytes()
+        except FileNotFoundError:
+            return b""
+
+    def _last_change(self, directory, segment_id, start_time):
+        records = decode_log(self._read_log(directory, segment_id), start_time)
+        return max((record[0] for record in records), default=start_time)
+
+    def _replay(self, directory, segment_id, start_time, until=None):
+        path = directory / f"{segment_id:08d}-{start_time}{CHECKPOINT_SUFFIX}"
+        with gzip.open(path, "rb") as f:
+            activities = json.load(f)["activities"]
+        rosters = {name: dict.fromkeys(activity["participants"])
+                   for name, activity in activities.items()}
+        data = self._read_log(directory, segment_id)
+        for when, op, name, email in decode_log(data, start_time):
+            if until is not None and when > until:
+                break
+            roster = rosters.get(name)
+            if roster is None:
+                continue
+            if op == "signup":
+                roster[email] = None
+            elif op == "unregister":
+                roster.pop(email, None)
+        for name, activity in activities.items():
+            activity["participants"] = list(rosters[name])
+        return activities
+
+    def as_of(self, when):
+        """Return every activity as it was at ``when``, or None if before history
+
+        ``when`` is a datetime or POSIX timestamp; the result has the shape of
+        ``GET /activities``.
+        """
+        until = to_millis(when)
+        if self.retention is not None and until < self._now() - self.retention * 1000:
+            return None
+        # Wait for changes already made to reach the log
+        self._queue.join()
+        best = None
+        for directory, started, ended in self._writers():
+            if started > until:
+                # Has nothing from before its process started
+                continue
+            if (ended is not None and ended < until and best is not None
+                    and best[0] >= (False, ended)):
+                # Exited before the time, and cannot beat what was found
+                continue
+            checkpoints = self._checkpoints(directory)
+            segments = [segment for segment in checkpoints if segment[1] <= until]
+            if not segments:
+                continue
+            segment_id, start_time, _ = segments[-1]
+            if directory == self.directory and segment_id == self._segment_id:
+                end = math.inf
+            elif len(segments) < len(checkpoints):
+                # A later checkpoint in the same directory
+                end = math.inf
+            elif ended is not None:
+                end = ended
+            else:
+                end = self._last_change(directory, segment_id, start_time)
+            # Prefer covering segments, starting latest; then the latest ending
+            rank = (True, start_time) if end >= until else (False, end)
+            if best is None or rank > best[0]:
+                best = (rank, directory, segment_id, start_time)
+        if best is None:
+            return None
+        return self._replay(*best[1:], until=until)
@@ -0,0 +1,159 @@
+"""
+Prometheus-style request metrics.
+
+``MetricsMiddleware`` is a plain ASGI middleware that records, per route
+template and method, a latency histogram and a count of responses by status
+code, plus the number of requests in flight. Everything is recorded on the
+event loop thread, so the counters need no locks. ``Metrics.render`` produces
+the Prometheus text exposition format, including gauges for roster sizes.
+
+Given a ``SlowRequestLog`` (see ``profiling.py``), the middleware also times
+each request up to its response headers while that log is enabled and hands
+it the slow ones.
+"""
+
+import time
+from bisect import bisect_left
+
+#: Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """Request counters and histograms, keyed by method and route template"""
+
+    def __init__(self):
+        self.latency = {}
+        self.responses = {}
+        self.in_flight = 0
+
+    def observe(self, method, route, status, seconds):
+        """Record one finished request"""
+        key = (method, route)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def render(self, stores=None):
+        """Return every metric in the Prometheus text format
+
+        ``stores`` maps school ids to activity stores; with more than one,
+        roster gauges are labelled with their ``school``.
+        """
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_responses_total Responses sent, by route and status code.",
+            "# TYPE http_responses_total counter",
+        ]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f'http_responses_total{{method="{method}",route="{_escape(route)}",'
+                         f'status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                             f'{cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+        if stores:
+            lines += [
+                "# HELP activity_participants Students signed up, by activity.",
+                "# TYPE activity_participants gauge",
+            ]
+            capacity = [
+                "# HELP activity_max_participants Capacity, by activity.",
+                "# TYPE activity_max_participants gauge",
+            ]
+            for school_id, store in stores.items():
+                school = f'school="{_escape(school_id)}",' if len(stores) > 1 else ""
+                for name in list(store):
+                    activity = store.get(name)
+                    label = f'{school}activity="{_escape(name)}"'
+                    lines.append(f"activity_participants{{{label}}} "
+                                 f"{len(activity.participants)}")
+                    capacity.append(f"activity_max_participants{{{label}}} "
+                                    f"{activity.max_participants}")
+            lines += capacity
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding :class:`Metrics`"""
+
+    def __init__(self, app, metrics, slow_requests=None):
+        self.app = app
+        self.metrics = metrics
+        self.slow_requests = slow_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        slow_requests = self.slow_requests
+        watching = slow_requests is not None and slow_requests.enabled
+        status = 500
+        headers_sent = None
+
+        async def send_with_status(message):
+            nonlocal status, headers_sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if watching:
+                    headers_sent = time.perf_counter()
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            # The router records the matched route on the scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            metrics.observe(scope["method"], path, status, elapsed)
+            if watching:
+                timings = {"total": elapsed}
+                if headers_sent is not None:
+                    timings["until_headers"] = headers_sent - start
+                    timings["body"] = elapsed - timings["until_headers"]
+                slow_requests.record(scope, status, timings)
@@ -0,0 +1,135 @@
+"""
+Response models for the activity endpoints.
+
+The hot endpoints return pre-encoded JSON and skip response validation, so
+these models only describe the responses in the OpenAPI schema.
+"""
+
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+
+class ActivityOut(BaseModel):
+    """One activity as served by ``GET /activities``"""
+
+    description: str
+    schedule: str
+    max_participants: int
+    participants: List[str]
+
+
+class ActivityFieldsOut(BaseModel):
+    """One activity in a paged listing; only the requested fields are present"""
+
+    name: Optional[str] = None
+    description: Optional[str] = None
+    schedule: Optional[str] = None
+    max_participants: Optional[int] = None
+    participants: Optional[List[str]] = None
+    participant_count: Optional[int] = None
+    spots_remaining: Optional[int] = None
+
+
+class ActivitiesPage(BaseModel):
+    """One page of a filtered or paged listing"""
+
+    activities: List[ActivityFieldsOut]
+    next_cursor: Optional[str] = None
+
+
+ActivitiesOut = Union[Dict[str, ActivityOut], ActivitiesPage]
+
+
+class ChangeOut(BaseModel):
+    """One roster change"""
+
+    version: int
+    op: str
+    activity: Optional[str] = None
+    email: Optional[str] = None
+
+
+class ChangesOut(BaseModel):
+    """Roster changes after a version, or a request to resync"""
+
+    epoch: str
+    version: int
+    resync: bool
+    changes: List[ChangeOut]
+
+
+class ActivityStatsOut(BaseModel):
+    """Enrollment counters for one activity"""
+
+    participants: int
+    max_participants: int
+    spots_remaining: int
+    fill_ratio: float
+    waitlist: int
+
+
+class StatsTotalsOut(BaseModel):
+    """Enrollment counters summed over every activity"""
+
+    activities: int
+    participants: int
+    max_participants: int
+    spots_remaining: int
+    fill_ratio: float
+    full_activities: int
+    waitlisted: int
+
+
+class TopActivityOut(BaseModel):
+    """One of the most subscribed activities"""
+
+    name: str
+    participants: int
+
+
+class StatsOut(BaseModel):
+    """Enrollment statistics for the whole school"""
+
+    totals: StatsTotalsOut
+    top: List[TopActivityOut]
+    by_day: Dict[str, int]
+    activities: Dict[str, ActivityStatsOut]
+
+
+class SearchResultOut(BaseModel):
+    """One activity matching a search"""
+
+    name: str
+    score: float
+    description: str
+    schedule: str
+    spots_remaining: int
+
+
+class SearchResultsOut(BaseModel):
+    """Activities matching a search, best first"""
+
+    query: str
+    results: List[SearchResultOut]
+
+
+class StudentActivitiesOut(BaseModel):
+    """The activities a student is signed up for"""
+
+    email: str
+    activities: List[str]
+
+
+class SchoolOut(BaseModel):
+    """One school served under ``/schools/{school_id}``"""
+
+    id: str
+    name: str
+    activities: int
+
+
+class SchoolsOut(BaseModel):
+    """Every school served"""
+
+    schools: List[SchoolOut]
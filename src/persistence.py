@@ -0,0 +1,301 @@
+"""
+Storage backends for the activity store.
+
+Every roster change is handed to a backend as a small JSON-able record. The
+in-memory backend drops them. The file backend appends them to a write-ahead
+log that is group-committed: writers queue records and wait, and a single
+flusher thread writes everything queued during a commit window with one
+``fsync``. Every ``snapshot_every`` records the log is rotated and a compacted
+snapshot of the whole store is written, so startup only replays the log
+segments written after the latest snapshot.
+
+Records only ever set a student's membership in one activity, so replaying a
+log suffix over a snapshot that already includes some of those records still
+lands on the right state.
+
+Changes are applied to memory before they are logged, so a commit that fails
+(a full or failing disk) leaves the change in memory while its writers get a
+``StorageError``: the change may or may not survive a restart. The flusher
+then snapshots memory as soon as it can, which brings the files back in line;
+until that succeeds, those changes are lost if the server stops. A failed
+snapshot is logged and retried after the next commit. If the flusher itself
+dies, every waiting and later ``append`` fails instead of waiting forever,
+and ``check`` refuses new changes before they reach memory.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+SEGMENT_PREFIX = "wal-"
+SEGMENT_SUFFIX = ".log"
+
+
+class StorageError(RuntimeError):
+    """Raised when changes can no longer be written to storage"""
+
+    #: Message shown to API clients
+    detail = "Storage is unavailable; the change may not have been saved"
+
+
+def _completed_future():
+    future = Future()
+    future.set_result(None)
+    return future
+
+
+class StorageBackend:
+    """Interface between the activity store and durable storage"""
+
+    def open(self, store):
+        """Restore ``store`` from storage and start accepting records"""
+
+    def check(self):
+        """Raise :class:`StorageError` if new records can no longer be stored"""
+
+    def append(self, record):
+        """Queue ``record``; return a future that resolves once it is durable
+
+        Never raises, so a change made of several records is always logged
+        whole; the future fails with :class:`StorageError` instead.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Flush anything pending and release resources"""
+
+
+class MemoryBackend(StorageBackend):
+    """Backend that keeps nothing; data is lost on restart"""
+
+    _done = _completed_future()
+
+    def append(self, record):
+        return self._done
+
+
+class FileBackend(StorageBackend):
+    """Write-ahead log plus periodic snapshots in ``directory``"""
+
+    def __init__(self, directory, commit_interval=0.002, snapshot_every=10000):
+        self.directory = Path(directory)
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        self._store = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = []
+        self._lsn = 0
+        self._since_snapshot = 0
+        self._segment = None
+        self._closed = False
+        self._failed = None
+        self._in_flight = []
+        # Memory holds changes whose commit failed, until a snapshot succeeds
+        self._diverged = False
+        self._flusher = None
+
+    # -- startup -----------------------------------------------------------
+
+    def open(self, store):
+        self._store = store
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        snapshot_lsn = self._load_snapshot(store)
+        self._lsn = snapshot_lsn
+        for _, path in self._segments():
+            self._lsn = max(self._lsn, self._replay_segment(store, path, snapshot_lsn))
+        self._since_snapshot = self._lsn - snapshot_lsn
+
+        if not (self.directory / SNAPSHOT_FILE).exists():
+            # First run: record the seed data so later replays start from it
+            self._write_snapshot(store.snapshot(), self._lsn)
+        self._segment = self._open_segment(self._lsn + 1)
+
+        self._flusher = threading.Thread(target=self._flush_loop,
+                                         name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _load_snapshot(self, store):
+        path = self.directory / SNAPSHOT_FILE
+        if not path.exists():
+            return 0
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        store.clear()
+        store.update(snapshot["activities"])
+        return snapshot["lsn"]
+
+    def _segments(self):
+        """Return ``(first_lsn, path)`` for each log segment, oldest first"""
+        segments = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            start = path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+            if start.isdigit():
+                segments.append((int(start), path))
+        segments.sort()
+        return segments
+
+    def _replay_segment(self, store, path, after_lsn):
+        last = after_lsn
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail of the log; nothing after it was acknowledged
+                    break
+                if record["lsn"] > after_lsn:
+                    store.apply(record)
+                last = max(last, record["lsn"])
+        return last
+
+    # -- writing -----------------------------------------------------------
+
+    def check(self):
+        if self._failed is not None:
+            raise StorageError("write-ahead log flusher stopped") from self._failed
+        if self._closed:
+            raise StorageError("storage backend is closed")
+
+    def append(self, record):
+        future = Future()
+        with self._lock:
+            try:
+                self.check()
+            except StorageError as exc:
+                future.set_exception(exc)
+                return future
+            self._lsn += 1
+            line = json.dumps({"lsn": self._lsn, **record}, separators=(",", ":"))
+            self._pending.append((line, future))
+            if len(self._pending) == 1:
+                self._wakeup.notify()
+        return future
+
+    def _flush_loop(self):
+        try:
+            self._flush()
+        except BaseException as exc:
+            logger.exception("Write-ahead log flusher stopped")
+            with self._lock:
+                self._failed = exc
+                batch, self._pending = self._in_flight + self._pending, []
+            error = StorageError("write-ahead log flusher stopped")
+            error.__cause__ = exc
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _flush(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._closed:
+                    self._wakeup.wait()
+                if self._closed and not self._pending:
+                    return
+            # Let concurrent writers join this commit
+            if self.commit_interval:
+                threading.Event().wait(self.commit_interval)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                last_lsn = self._lsn
+            self._in_flight = batch
+            if not self._commit(batch):
+                self._diverged = True
+            self._since_snapshot += len(batch)
+            if self._diverged or self._since_snapshot >= self.snapshot_every:
+                try:
+                    self._checkpoint(last_lsn)
+                except Exception:
+                    logger.exception("Snapshot failed; retrying after the next commit")
+                else:
+                    self._diverged = False
+
+    def _commit(self, batch):
+        """Write and sync ``batch``; return False if that failed"""
+        try:
+            self._segment.write("".join(line + "\n" for line, _ in batch))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+        except Exception as exc:
+            logger.exception("Write-ahead log commit failed")
+            error = StorageError("write-ahead log commit failed")
+            error.__cause__ = exc
+            for _, future in batch:
+                future.set_exception(error)
+            return False
+        for _, future in batch:
+            future.set_result(None)
+        return True
+
+    def _checkpoint(self, upto_lsn):
+        """Rotate the log and snapshot everything up to ``upto_lsn``
+
+        Called from the flusher thread. Records are applied to memory before
+        they are appended, so a snapshot taken now includes every record up
+        to ``upto_lsn`` (and possibly some newer ones, which replay safely).
+        """
+        # Only this thread writes segments; newer records are still queued
+        # and will go to the new segment. The old segments are only removed
+        # once the snapshot is safely written.
+        rotate_at = upto_lsn + 1
+        segment = self._open_segment(rotate_at)
+        self._segment.close()
+        self._segment = segment
+        self._write_snapshot(self._store.snapshot(), upto_lsn)
+        for start, path in self._segments():
+            if start < rotate_at:
+                path.unlink()
+        self._since_snapshot = 0
+
+    def _write_snapshot(self, activities, lsn):
+        path = self.directory / SNAPSHOT_FILE
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"lsn": lsn, "activities": activities}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._fsync_directory()
+
+    def _segment_name(self, start):
+        return f"{SEGMENT_PREFIX}{start:020d}{SEGMENT_SUFFIX}"
+
+    def _open_segment(self, start):
+        segment = open(self.directory / self._segment_name(start), "a", encoding="utf-8")
+        self._fsync_directory()
+        return segment
+
+    def _fsync_directory(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return
+        fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wakeup.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        if self._segment is not None:
+            self._segment.close()
+
+
+def open_backend(data_dir=None):
+    """Return the backend configured by ``data_dir`` (in-memory when unset)"""
+    if not data_dir:
+        return MemoryBackend()
+    return FileBackend(data_dir)
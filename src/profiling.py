@@ -0,0 +1,166 @@
+"""
+On-demand diagnostics for latency spikes.
+
+``SamplingProfiler`` is off until started. While running, a background
+thread wakes every ``interval`` seconds, reads every other thread's current
+stack with ``sys._current_frames()`` and counts it; nothing is hooked into
+the code being profiled, so handlers run at full speed even while sampling.
+The counts come out in the collapsed-stack format read by ``flamegraph.pl``
+and speedscope: one ``frame;frame;frame count`` line per distinct stack.
+
+``SlowRequestLog`` keeps the last ``capacity`` requests slower than a
+threshold in a ring buffer, with their route, parameters, timing breakdown
+and the size of the roster they touched. It is fed by ``MetricsMiddleware``,
+which only checks ``enabled`` while it is switched off.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qsl
+
+#: Longest profile that can be requested, in seconds
+MAX_PROFILE_SECONDS = 60.0
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another is running"""
+
+    detail = "A profile is already running"
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval while running"""
+
+    def __init__(self):
+        self._counts = {}
+        self._samples = 0
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @property
+    def samples(self):
+        """Number of times the stacks were read in the last profile"""
+        return self._samples
+
+    def start(self, interval=0.005):
+        """Start sampling every ``interval`` seconds"""
+        with self._lock:
+            if self._thread is not None:
+                raise ProfilerBusyError()
+            self._counts = {}
+            self._samples = 0
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, args=(interval,),
+                                            name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the collapsed stacks"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return ""
+            self._stopping.set()
+            thread.join()
+            self._thread = None
+            return self.collapsed()
+
+    def collapsed(self):
+        """Return the stacks counted so far, one ``a;b;c count`` line each"""
+        lines = [f"{stack} {count}" for stack, count in
+                 sorted(self._counts.items(), key=lambda item: -item[1])]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _run(self, interval):
+        me = threading.get_ident()
+        counts = self._counts
+        while not self._stopping.wait(interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            self._samples += 1
+
+
+class SlowRequestLog:
+    """Ring buffer of recent requests slower than ``threshold`` seconds"""
+
+    def __init__(self, store=None, capacity=100, threshold=0.1, schools=None):
+        # Rosters are looked up in the school named by the path, if any
+        self.store = store
+        self.schools = schools or {}
+        self.threshold = threshold
+        self.enabled = False
+        self._requests = deque(maxlen=capacity)
+
+    @property
+    def capacity(self):
+        return self._requests.maxlen
+
+    def configure(self, enabled=None, threshold=None, capacity=None):
+        """Switch recording on or off, or change its limits"""
+        if threshold is not None:
+            self.threshold = threshold
+        if capacity is not None and capacity != self.capacity:
+            self._requests = deque(self._requests, maxlen=capacity)
+        if enabled is not None:
+            self.enabled = enabled
+
+    def clear(self):
+        self._requests.clear()
+
+    def record(self, scope, status, timings):
+        """Keep a request whose ``timings["total"]`` is over the threshold
+
+        ``timings`` maps phase names to seconds.
+        """
+        if timings["total"] < self.threshold:
+            return
+        route = scope.get("route")
+        path_params = scope.get("path_params") or {}
+        self._requests.append({
+            "time": time.time(),
+            "method": scope["method"],
+            "route": getattr(route, "path", scope["path"]),
+            "path_params": dict(path_params),
+            "query": dict(parse_qsl(scope.get("query_string", b"").decode("latin-1"))),
+            "status": status,
+            "timings_ms": {phase: round(seconds * 1000, 3) for phase, seconds in timings.items()},
+            "roster": self._roster(path_params),
+        })
+
+    def _roster(self, path_params):
+        name = path_params.get("activity_name")
+        if "school_id" in path_params:
+            store = self.schools.get(path_params["school_id"])
+        else:
+            store = self.store
+        if store is None or name is None or name not in store:
+            return None
+        activity = store.get(name)
+        return {"participants": len(activity.participants),
+                "max_participants": activity.max_participants,
+                "waitlist": len(activity.waitlist)}
+
+    def slowest(self):
+        """Return the recorded requests, slowest first"""
+        return sorted(self._requests, key=lambda request: -request["timings_ms"]["total"])
@@ -0,0 +1,135 @@
+"""
+Server-Sent Events push of roster changes.
+
+Store changes arrive on whatever thread made them and are handed to a single
+asyncio task, which encodes each event once and fans it out to every
+connected client. Each client has a small bounded queue; a client that falls
+so far behind that its queue fills up is dropped rather than buffered
+without limit; its browser reconnects and catches up from the change feed.
+"""
+
+import asyncio
+import json
+
+KEEPALIVE_SECONDS = 15
+
+
+def encode_event(event, epoch):
+    """Return ``event`` as a Server-Sent Events message
+
+    The event id is ``<epoch>-<version>`` so a browser reconnecting to a
+    restarted server is not mistaken for one that is merely behind.
+    """
+    kind = "reset" if event["op"] == "reset" else "change"
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {epoch}-{event['version']}\nevent: {kind}\ndata: {data}\n\n".encode("utf-8")
+
+
+def parse_event_id(event_id, epoch):
+    """Return the version in ``event_id``, or None if it is from another epoch"""
+    event_epoch, _, version = (event_id or "").rpartition("-")
+    if event_epoch != epoch or not version.isdigit():
+        return None
+    return int(version)
+
+
+class Subscriber:
+    """One connected client"""
+
+    __slots__ = ("queue",)
+
+    def __init__(self, queue_size):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    async def next(self, timeout=KEEPALIVE_SECONDS):
+        """Return the next message, a keepalive comment, or None once dropped"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return b": keepalive\n\n"
+
+
+class Broadcaster:
+    """Fans store events out to every :class:`Subscriber`"""
+
+    def __init__(self, store, queue_size=64):
+        self.queue_size = queue_size
+        self._epoch = store.epoch
+        self._subscribers = set()
+        self._loop = None
+        self._inbox = None
+        self._task = None
+        store.subscribe(self._on_change)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def _start(self):
+        # Subscribers left from a previous loop can never be served again
+        self._subscribers.clear()
+        self._loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the broadcast loop and disconnect every subscriber"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for subscriber in list(self._subscribers):
+            self._drop(subscriber)
+        self._loop = None
+
+    def _on_change(self, event):
+        # Called from request threads; hop onto the broadcast loop
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._inbox.put_nowait, event)
+        except RuntimeError:
+            # The loop has been closed
+            pass
+
+    async def _run(self):
+        while True:
+            event = await self._inbox.get()
+            message = encode_event(event, self._epoch)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self._drop(subscriber)
+
+    def connect(self, catch_up=None):
+        """Register a new subscriber and return it
+
+        ``catch_up()`` may return messages the subscriber missed; it is
+        called once the subscriber can no longer miss live events, so
+        together they cover every change (possibly with duplicates, which
+        clients skip by event id). Must be called from the event loop
+        serving the connection.
+        """
+        if self._loop is not asyncio.get_running_loop() or self._task is None:
+            self._start()
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        for message in catch_up() if catch_up else ():
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+                break
+        return subscriber
+
+    def disconnect(self, subscriber):
+        """Forget ``subscriber``; safe to call more than once"""
+        self._subscribers.discard(subscriber)
+
+    def _drop(self, subscriber):
+        self._subscribers.discard(subscriber)
+        queue = subscriber.queue
+        while not queue.empty():
+            queue.get_nowait()
+        # Leave only the end-of-stream marker
+        queue.put_nowait(None)
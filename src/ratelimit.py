@@ -0,0 +1,169 @@
+"""
+Signup burst protection.
+
+``RateLimiter`` keeps one token bucket per key (a client, an activity) and
+sheds requests that arrive faster than the configured rate before they reach
+the activity lock. ``Coalescer`` folds duplicate submissions into the one
+already in flight: a double-clicked signup runs once and both requests get
+its response. Requests that carry an idempotency key also have their
+successful response remembered for a while, so a retry after a lost response
+is answered without signing the student up again.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class TokenBucket:
+    """Tokens refilled at a steady rate, up to a burst capacity"""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Per-key token buckets; a ``rate`` of 0 or less disables limiting"""
+
+    def __init__(self, rate, burst, max_keys=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._clock = clock
+        # Least recently used first, so idle buckets are found at the front
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def acquire(self, key):
+        """Take a token for ``key``; return 0 or the seconds until one is free"""
+        if self.rate <= 0:
+            return 0.0
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.burst, now)
+                self._evict(now)
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(self.burst,
+                                    bucket.tokens + (now - bucket.updated) * self.rate)
+                bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / self.rate
+
+    def _evict(self, now):
+        # A bucket idle long enough to refill is the same as a new one
+        refill = self.burst / self.rate
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if len(buckets) <= self.max_keys and now - oldest.updated < refill:
+                break
+            buckets.popitem(last=False)
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Raised when an idempotency key comes back with a different request"""
+
+    detail = "Idempotency key was already used for a different request"
+
+
+class _Entry:
+    __slots__ = ("future", "fingerprint", "remember")
+
+    def __init__(self, fingerprint, remember):
+        self.future = Future()
+        self.fingerprint = fingerprint
+        self.remember = remember
+
+
+class Coalescer:
+    """Run one call per key at a time and share its outcome with duplicates"""
+
+    def __init__(self, ttl=300.0, max_remembered=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_remembered = max_remembered
+        self._clock = clock
+        self._entries = {}
+        # Keys of finished, remembered calls and when they expire, oldest first
+        self._expiry = OrderedDict()
+        self._lock = threading.Lock()
+
+    def run(self, key, work, fingerprint=None, remember=False):
+        """Return ``work()``, or the outcome of the identical call already made
+
+        A call with the same ``key`` that is still running is waited on. With
+        ``remember``, a successful result also answers later calls until
+        ``ttl`` expires; failures are never remembered, so they can be
+        retried. ``fingerprint`` identifies the request behind the key.
+        """
+        entry, leader = self._join(key, fingerprint, remember)
+        if not leader:
+            return entry.future.result()
+        try:
+            result = work()
+        except BaseException as exc:
+            self._fail(key, entry, exc)
+            raise
+        self._succeed(key, entry, result)
+        return result
+
+    async def run_async(self, key, work, fingerprint=None, remember=False):
+        """:meth:`run` for an event loop, where ``work()`` returns an awaitable"""
+        entry, leader = self._join(key, fingerprint, remember)
+        if not leader:
+            return await asyncio.wrap_future(entry.future)
+        try:
+            result = await work()
+        except BaseException as exc:
+            self._fail(key, entry, exc)
+            raise
+        self._succeed(key, entry, result)
+        return result
+
+    def _join(self, key, fingerprint, remember):
+        """Return ``(entry, leader)``; the leader is the call that does the work"""
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(fingerprint, remember)
+                return entry, True
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyReusedError(key)
+            return entry, False
+
+    def _fail(self, key, entry, exc):
+        with self._lock:
+            del self._entries[key]
+        entry.future.set_exception(exc)
+
+    def _succeed(self, key, entry, result):
+        with self._lock:
+            if entry.remember:
+                self._expiry[key] = self._clock() + self.ttl
+                if len(self._expiry) > self.max_remembered:
+                    del self._entries[self._expiry.popitem(last=False)[0]]
+            else:
+                del self._entries[key]
+        entry.future.set_result(result)
+
+    def _expire(self, now):
+        expiry = self._expiry
+        while expiry:
+            key, expires = next(iter(expiry.items()))
+            if expires > now:
+                break
+            del expiry[key]
+            del self._entries[key]
@@ -0,0 +1,101 @@
+"""
+Parsing and indexing for the free-text ``schedule`` field of activities.
+
+Schedules look like "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM" or
+"Tuesdays and Thursdays, 3:30 PM - 4:30 PM". They are parsed once, when an
+activity is loaded, into a :class:`Slot`. A :class:`ScheduleIndex` keeps each
+weekday's slots sorted by start time, so the activities overlapping a slot
+are found by binary search and never by re-parsing text per request.
+"""
+
+import re
+from bisect import bisect_left
+from collections import namedtuple
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_DAY_PATTERN = re.compile(r"\b(" + "|".join(DAYS) + r")s?\b", re.IGNORECASE)
+_TIME_RANGE_PATTERN = re.compile(
+    r"(\d{1,2}):(\d{2})\s*([AP]M)\s*-\s*(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE
+)
+
+#: Weekdays an activity meets on, and its start and end in minutes after
+#: midnight (both None when the schedule has no recognizable time range)
+Slot = namedtuple("Slot", ["days", "start", "end"])
+
+
+def parse_days(schedule):
+    """Return the weekdays named in ``schedule`` as a frozenset of DAYS entries"""
+    return frozenset(match.lower() for match in _DAY_PATTERN.findall(schedule))
+
+
+def _minutes(hour, minute, meridiem):
+    hour = int(hour) % 12
+    if meridiem.upper() == "PM":
+        hour += 12
+    return hour * 60 + int(minute)
+
+
+def parse_schedule(schedule):
+    """Parse ``schedule`` into a :class:`Slot`"""
+    days = parse_days(schedule)
+    match = _TIME_RANGE_PATTERN.search(schedule)
+    if match is None:
+        return Slot(days, None, None)
+    start = _minutes(*match.group(1, 2, 3))
+    end = _minutes(*match.group(4, 5, 6))
+    return Slot(days, start, end)
+
+
+class ScheduleIndex:
+    """Per-weekday interval index over activity slots
+
+    Activities' schedules only change when activities are reloaded, so the
+    overlaps for each activity are worked out when the index is built and
+    lookups afterwards are set operations.
+    """
+
+    def __init__(self, slots):
+        """Build the index from a ``{activity name: Slot}`` mapping"""
+        # day -> (sorted starts, [(start, end, name)] in the same order)
+        self._days = {}
+        for day in DAYS:
+            entries = sorted(
+                (slot.start, slot.end, name)
+                for name, slot in slots.items()
+                if day in slot.days and slot.start is not None
+            )
+            self._days[day] = ([entry[0] for entry in entries], entries)
+        self._overlaps = {name: self._find_overlaps(name, slot) for name, slot in slots.items()}
+
+    def _find_overlaps(self, name, slot):
+        overlaps = set()
+        if slot.start is None:
+            return frozenset()
+        for day in slot.days:
+            starts, entries = self._days[day]
+            # Only slots starting before this one ends can overlap it
+            for start, end, other in entries[:bisect_left(starts, slot.end)]:
+                if end > slot.start and other != name:
+                    overlaps.add(other)
+        return frozenset(overlaps)
+
+    def overlapping(self, name):
+        """Return the names of activities whose slots overlap activity ``name``"""
+        return self._overlaps.get(name, frozenset())
+
+    def conflicts(self, names):
+        """Return the overlapping pairs among activities ``names``
+
+        Each pair is a ``(first, second)`` tuple in the order of ``names``.
+        """
+        names = list(names)
+        chosen = set(names)
+        position = {name: i for i, name in enumerate(names)}
+        pairs = []
+        for name in names:
+            for other in self.overlapping(name) & chosen:
+                if position[other] > position[name]:
+                    pairs.append((name, other))
+        pairs.sort(key=lambda pair: (position[pair[0]], position[pair[1]]))
+        return pairs
@@ -0,0 +1,115 @@
+"""
+Per-school state.
+
+A ``School`` holds everything the API keeps for one school: its activity
+store, and the change feed, statistics, history, push broadcaster and signup
+limits built on that store. Schools share nothing, so each has its own locks
+and a busy school never holds up another.
+
+Schools are configured as ``{school_id: {"name": ..., "activities": {...}}}``,
+where ``activities`` is the initial ``GET /activities`` mapping.
+``open_schools`` opens each one with the storage settings taken from the
+``MERGINGTON_*`` environment variables. With more than one school, every
+school gets its own subdirectory of ``MERGINGTON_DATA_DIR`` and
+``MERGINGTON_HISTORY_DIR``, and its own ``MERGINGTON_SHARED_DB`` file.
+"""
+
+import json
+from pathlib import Path
+
+from changes import ChangeFeed
+from history import History
+from persistence import open_backend
+from push import Broadcaster
+from ratelimit import Coalescer, RateLimiter
+from shared import SharedActivityStore
+from stats import EnrollmentStats
+from store import ActivityStore
+
+
+class School:
+    """One school's activity store and everything derived from it"""
+
+    def __init__(self, school_id, name, activities, history_dir=None, history_retention=None,
+                 client_rate=1.0, activity_rate=100.0):
+        self.id = school_id
+        self.name = name
+        self.activities = activities
+        # Recent roster changes, for clients catching up from a known version
+        self.changes = ChangeFeed(activities)
+        # Enrollment totals, fill ratios and rankings, updated on every change
+        self.stats = EnrollmentStats(activities)
+        # Every roster change with its time, for point-in-time queries
+        self.history = History(activities, history_dir, retention=history_retention)
+        self.history.open()
+        # Signup burst protection, in signups per second; a rate of 0 turns a
+        # limit off. Clients are keyed by address and email, since a whole
+        # school may share one address.
+        self.client_limiter = RateLimiter(client_rate, burst=5)
+        self.activity_limiter = RateLimiter(activity_rate, burst=200)
+        self.signups_in_flight = Coalescer()
+        # Live roster changes pushed to connected browsers
+        self.broadcaster = Broadcaster(activities)
+
+    async def close(self):
+        await self.broadcaster.stop()
+        self.history.close()
+        self.activities.close()
+
+
+def load_schools(path):
+    """Read a school configuration from the JSON file at ``path``"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _school_path(path, school_id, several):
+    if not path or not several:
+        return path
+    return str(Path(path) / school_id)
+
+
+def _school_database(path, school_id, several):
+    if not path or not several:
+        return path
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}-{school_id}{path.suffix}"))
+
+
+def open_store(activities, data_dir=None, shared_db=None):
+    """Open an activity store seeded with ``activities``
+
+    Kept in memory and, with ``data_dir``, persisted to a write-ahead log
+    there. With ``shared_db``, every worker process shares the SQLite
+    database at that path instead.
+    """
+    if shared_db:
+        store = SharedActivityStore(shared_db, activities)
+    else:
+        store = ActivityStore(activities, backend=open_backend(data_dir))
+    store.open()
+    return store
+
+
+def open_schools(config, environ):
+    """Return ``{school_id: School}`` for a school configuration, in order"""
+    several = len(config) > 1
+    days = environ.get("MERGINGTON_HISTORY_DAYS")
+    history_retention = float(days) * 86400 if days else None
+    schools = {}
+    for school_id, school in config.items():
+        store = open_store(
+            school["activities"],
+            data_dir=_school_path(environ.get("MERGINGTON_DATA_DIR"), school_id, several),
+            shared_db=_school_database(environ.get("MERGINGTON_SHARED_DB"), school_id, several),
+        )
+        schools[school_id] = School(
+            school_id,
+            school.get("name", school_id),
+            store,
+            history_dir=_school_path(environ.get("MERGINGTON_HISTORY_DIR"), school_id, several),
+            history_retention=history_retention,
+            client_rate=float(environ.get("MERGINGTON_CLIENT_RATE", 1)),
+            activity_rate=float(environ.get("MERGINGTON_ACTIVITY_RATE", 100)),
+        )
+    return schools
@@ -0,0 +1,204 @@
+"""
+Keyword search over activity names and descriptions.
+
+``SearchIndex`` is an inverted index from each lowercased word to the
+activities that contain it and how strongly: a word in the name counts
+``NAME_WEIGHT`` times as much as one in the description. Results are ranked
+by the sum, over the query words, of that weight times the word's inverse
+document frequency, so rarer words count for more.
+
+The last query word is also matched as a prefix, for typeahead. Its
+completions come from a sorted list of every indexed word, found by binary
+search, and each word keeps its ``TOP_K`` strongest activities in order, so
+a one-word query reads a few short lists however large the catalog is.
+Queries with more words intersect the postings, starting from the rarest.
+
+Activities are indexed one at a time, so adding or replacing one only
+touches the words it contains.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+
+#: Weight of a word in the activity name, relative to one in the description
+NAME_WEIGHT = 3.0
+#: Discount for a word that only matches the query as a prefix
+PREFIX_WEIGHT = 0.8
+#: Most words a prefix expands to; the most common are kept
+MAX_EXPANSIONS = 32
+#: Strongest activities kept in order for each word, and the most results
+TOP_K = 20
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Return the lowercased words in ``text``"""
+    return _WORD.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index over activity names and descriptions"""
+
+    def __init__(self):
+        # word -> {activity name: weight}
+        self._postings = {}
+        # word -> up to TOP_K (-weight, activity name), strongest first
+        self._top = {}
+        # activity name -> {word: weight}, for removal
+        self._documents = {}
+        # Every indexed word, sorted, for prefix lookups
+        self._words = []
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, name):
+        return name in self._documents
+
+    def add(self, name, description):
+        """Index activity ``name``, replacing what was indexed for it before"""
+        if name in self._documents:
+            self.remove(name)
+        weights = {}
+        for word in tokenize(name):
+            weights[word] = weights.get(word, 0.0) + NAME_WEIGHT
+        for word in tokenize(description):
+            weights[word] = weights.get(word, 0.0) + 1.0
+        self._documents[name] = weights
+        for word, weight in weights.items():
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = {}
+                self._top[word] = []
+                insort(self._words, word)
+            posting[name] = weight
+            top = self._top[word]
+            entry = (-weight, name)
+            if len(top) < TOP_K or entry < top[-1]:
+                insort(top, entry)
+                del top[TOP_K:]
+
+    def remove(self, name):
+        """Stop returning activity ``name`` in results"""
+        weights = self._documents.pop(name, None)
+        if weights is None:
+            return
+        for word, weight in weights.items():
+            posting = self._postings[word]
+            del posting[name]
+            if not posting:
+                del self._postings[word]
+                del self._top[word]
+                del self._words[bisect_left(self._words, word)]
+                continue
+            top = self._top[word]
+            entry = (-weight, name)
+            index = bisect_left(top, entry)
+            if index < len(top) and top[index] == entry:
+                del top[index]
+                # Refill from the posting when others were left out
+                if len(posting) > len(top):
+                    self._top[word] = heapq.nsmallest(
+                        TOP_K, ((-other, other_name) for other_name, other in posting.items())
+                    )
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` ``(activity name, score)`` pairs, best first
+
+        Every word of ``query`` must match, the last one possibly as a prefix.
+        Ties are broken by name. ``limit`` is capped at :data:`TOP_K`.
+        """
+        words = tokenize(query)
+        limit = min(limit, TOP_K)
+        if not words or limit < 1:
+            return []
+        total = len(self._documents)
+        # One entry per query word: the (posting, boost) pairs it can match
+        matchers = []
+        for word in words[:-1]:
+            posting = self._postings.get(word)
+            if posting is None:
+                return []
+            matchers.append([(word, posting, self._idf(posting, total))])
+        expansions = self._expand(words[-1])
+        if not expansions:
+            return []
+        matchers.append([
+            (word, self._postings[word],
+             self._idf(self._postings[word], total) * (1.0 if word == words[-1] else PREFIX_WEIGHT))
+            for word in expansions
+        ])
+
+        if len(matchers) == 1:
+            scores = self._best_of(matchers[0], limit)
+        else:
+            candidates = self._matching_all(matchers)
+            scores = dict.fromkeys(candidates, 0.0)
+            for matcher in matchers:
+                if len(matcher) == 1:
+                    _, posting, boost = matcher[0]
+                    for name in candidates:
+                        scores[name] += posting[name] * boost
+                    continue
+                for name in candidates:
+                    scores[name] += max(posting.get(name, 0.0) * boost
+                                        for _, posting, boost in matcher)
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    @staticmethod
+    def _idf(posting, total):
+        return math.log(1.0 + total / len(posting))
+
+    def _expand(self, prefix):
+        """Return the indexed words starting with ``prefix``, most common first"""
+        words = self._words
+        start = bisect_left(words, prefix)
+        end = bisect_left(words, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        if end - start <= MAX_EXPANSIONS:
+            return words[start:end]
+        postings = self._postings
+        expansions = heapq.nlargest(MAX_EXPANSIONS, words[start:end],
+                                    key=lambda word: len(postings[word]))
+        # An exact match is always worth including
+        if prefix in postings and prefix not in expansions:
+            expansions[-1] = prefix
+        return expansions
+
+    def _best_of(self, matcher, limit):
+        """Score each activity by its best match among ``matcher``'s words
+
+        With a ``limit``, only each word's strongest activities are read; an
+        activity outside all of those cannot make the top ``limit``.
+        """
+        scores = {}
+        for word, posting, boost in matcher:
+            if limit is None:
+                entries = ((name, weight) for name, weight in posting.items())
+            else:
+                entries = ((name, -weight) for weight, name in self._top[word][:limit])
+            for name, weight in entries:
+                score = weight * boost
+                if score > scores.get(name, 0.0):
+                    scores[name] = score
+        return scores
+
+    @staticmethod
+    def _matching_all(matchers):
+        """Return the names of the activities every matcher matches"""
+        # Set operations on the postings' keys run in C, smallest first
+        keys = []
+        for matcher in matchers:
+            if len(matcher) == 1:
+                keys.append(matcher[0][1].keys())
+            else:
+                keys.append(set().union(*(posting.keys() for _, posting, _ in matcher)))
+        keys.sort(key=len)
+        candidates = set(keys[0])
+        for other in keys[1:]:
+            candidates = other & candidates
+            if not candidates:
+                break
+        return candidates
@@ -0,0 +1,21 @@
+"""
+JSON encoding for API responses.
+
+Uses orjson when it is installed and falls back to the standard library,
+producing the same compact UTF-8 output either way.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+
+def dumps(value):
+    """Return ``value`` as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
@@ -0,0 +1,373 @@
+"""
+Activity store shared between uvicorn worker processes.
+
+Each worker keeps the usual in-memory :class:`~store.ActivityStore` for
+reads, but the source of truth is a SQLite database in WAL mode. Mutations
+run as short ``BEGIN IMMEDIATE`` transactions that check membership and
+capacity against the database, so limits hold across processes, and append
+to a ``changes`` table. Every worker applies those changes to its memory in
+sequence order: before each read, after each of its own writes, and from a
+background poller so pushed events from other workers arrive promptly.
+
+The store's version is the sequence number of the last change applied, and
+its epoch is stored in the database, so ETags and change-feed versions mean
+the same thing on every worker.
+
+SQLite calls block, so the async interface runs every operation on a small
+worker pool, each thread holding its own connection: a fixed-size
+connection pool that keeps database I/O off the event loop.
+"""
+
+import asyncio
+import functools
+import logging
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import MemoryBackend
+from store import (BATCH_SIZE, ActivityStore, ActivityNotFoundError, AlreadySignedUpError,
+                   NotSignedUpError, AlreadyWaitlistedError, NotWaitlistedError,
+                   ScheduleConflictError, StoreError)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS activities (
+    name TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    schedule TEXT NOT NULL,
+    max_participants INTEGER NOT NULL,
+    participant_count INTEGER NOT NULL DEFAULT 0,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS enrollments (
+    activity TEXT NOT NULL,
+    email TEXT NOT NULL,
+    UNIQUE (activity, email)
+);
+CREATE INDEX IF NOT EXISTS enrollments_by_email ON enrollments (email);
+CREATE TABLE IF NOT EXISTS waitlist (
+    activity TEXT NOT NULL,
+    email TEXT NOT NULL,
+    UNIQUE (activity, email)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    activity TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+"""
+
+
+class SharedActivityStore(ActivityStore):
+    """:class:`ActivityStore` kept in sync through a SQLite database"""
+
+    def __init__(self, path, data=None, poll_interval=0.05, keep_changes=10000, pool_size=4):
+        super().__init__(backend=MemoryBackend())
+        self.path = path
+        self.poll_interval = poll_interval
+        self.keep_changes = keep_changes
+        self._seed = data or {}
+        self._local = threading.local()
+        self._refresh_lock = threading.Lock()
+        self._applying = 0
+        self._stopped = threading.Event()
+        self._poller = None
+        self._pool = ThreadPoolExecutor(max_workers=pool_size,
+                                        thread_name_prefix="shared-store")
+
+    # -- connections -------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, work):
+        """Run ``work(conn)`` inside a write transaction and return its result"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # -- startup and shutdown ----------------------------------------------
+
+    def open(self):
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        self._transaction(self._seed_database)
+        self._reload()
+        self._poller = threading.Thread(target=self._poll, name="shared-store-poller",
+                                        daemon=True)
+        self._poller.start()
+
+    def _seed_database(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()
+        if row is not None:
+            return
+        # First worker to start creates the database contents
+        conn.execute("INSERT INTO meta VALUES ('epoch', ?)", (uuid.uuid4().hex[:8],))
+        for position, (name, fields) in enumerate(self._seed.items()):
+            participants = fields.get("participants", ())
+            conn.execute(
+                "INSERT INTO activities VALUES (?, ?, ?, ?, ?, ?)",
+                (name, fields["description"], fields["schedule"],
+                 fields["max_participants"], len(participants), position),
+            )
+            conn.executemany("INSERT INTO enrollments VALUES (?, ?)",
+                             [(name, email) for email in participants])
+            conn.executemany("INSERT INTO waitlist VALUES (?, ?)",
+                             [(name, email) for email in fields.get("waitlist", ())])
+
+    def _reload(self):
+        """Replace memory with the database contents"""
+        conn = self._connection()
+        # One read transaction gives a consistent view across the tables
+        conn.execute("BEGIN")
+        try:
+            self.epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+            data = {}
+            for name, description, schedule, max_participants in conn.execute(
+                    "SELECT name, description, schedule, max_participants "
+                    "FROM activities ORDER BY position"):
+                data[name] = {"description": description, "schedule": schedule,
+                              "max_participants": max_participants, "participants": [],
+                              "waitlist": []}
+            for activity, email in conn.execute(
+                    "SELECT activity, email FROM enrollments ORDER BY rowid"):
+                data[activity]["participants"].append(email)
+            # rowids only grow while rows remain, so rowid order is FIFO order
+            for activity, email in conn.execute(
+                    "SELECT activity, email FROM waitlist ORDER BY rowid"):
+                data[activity]["waitlist"].append(email)
+        finally:
+            conn.execute("COMMIT")
+        self._applying = seq
+        self._replace(data)
+
+    def _poll(self):
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.refresh()
+                self._trim_changes()
+            except sqlite3.Error:
+                # Busy or briefly unavailable; try again next round
+                pass
+            except Exception:
+                # Keep polling, or other workers' changes stop arriving
+                logger.exception("Applying changes from other workers failed")
+
+    def _trim_changes(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM changes WHERE seq <= ?", (self.version - self.keep_changes,))
+
+    def close(self):
+        self._stopped.set()
+        if self._poller is not None:
+            self._poller.join()
+        self._pool.shutdown()
+
+    # -- applying changes from the database --------------------------------
+
+    def _next_version(self):
+        return self._applying
+
+    def refresh(self):
+        """Apply every change other workers have committed since our version"""
+        with self._refresh_lock:
+            rows = self._connection().execute(
+                "SELECT seq, op, activity, email FROM changes WHERE seq > ? ORDER BY seq",
+                (self.version,),
+            ).fetchall()
+            if rows and rows[0][0] != self.version + 1:
+                # The changes we need have been trimmed; start over
+                self._reload()
+                return
+            for seq, op, activity, email in rows:
+                self._applying = seq
+                self.apply({"op": op, "activity": activity, "email": email})
+
+    # -- mutations ---------------------------------------------------------
+
+    def signup(self, name, email, check_conflicts=False):
+
+        def work(conn):
+            if check_conflicts:
+                # Checked in the transaction, so no other worker can enroll
+                # the student elsewhere between the check and the signup
+                self._db_check_conflicts(conn, name, email)
+            return self._db_signup(conn, name, email)
+
+        waitlisted = self._transaction(work)
+        self.refresh()
+        return self.waitlist_position(name, email) if waitlisted else None
+
+    def unregister(self, name, email):
+        promoted = self._transaction(lambda conn: self._db_unregister(conn, name, email))
+        self.refresh()
+        return promoted
+
+    def leave_waitlist(self, name, email):
+        self._transaction(lambda conn: self._db_leave_waitlist(conn, name, email))
+        self.refresh()
+
+    def waitlist_position(self, name, email):
+        self.refresh()
+        return super().waitlist_position(name, email)
+
+    def signup_many(self, name, emails):
+        results = self._db_many(self._db_signup, name, emails)
+        # _db_signup returns True when queued and False when enrolled
+        return [self.waitlist_position(name, email) if result is True
+                else (None if result is False else result)
+                for email, result in zip(emails, results)]
+
+    def unregister_many(self, name, emails):
+        return self._db_many(self._db_unregister, name, emails)
+
+    def _db_many(self, db_operation, name, emails):
+        # One transaction per batch, so other workers' writes can interleave
+
+        def work(conn, batch):
+            results = []
+            for email in batch:
+                try:
+                    results.append(db_operation(conn, name, email))
+                except ActivityNotFoundError:
+                    raise
+                except StoreError as exc:
+                    results.append(exc)
+            return results
+
+        results = []
+        for start in range(0, len(emails), BATCH_SIZE):
+            batch = emails[start:start + BATCH_SIZE]
+            results += self._transaction(lambda conn: work(conn, batch))
+        self.refresh()
+        return results
+
+    def _db_signup(self, conn, name, email):
+        """Enroll ``email``, or queue it when full; return True if queued"""
+        row = conn.execute("SELECT max_participants, participant_count FROM activities "
+                           "WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise ActivityNotFoundError(name)
+        if conn.execute("SELECT 1 FROM enrollments WHERE activity = ? AND email = ?",
+                        (name, email)).fetchone():
+            raise AlreadySignedUpError(email)
+        if conn.execute("SELECT 1 FROM waitlist WHERE activity = ? AND email = ?",
+                        (name, email)).fetchone():
+            raise AlreadyWaitlistedError(email)
+        if row[1] >= row[0]:
+            conn.execute("INSERT INTO waitlist VALUES (?, ?)", (name, email))
+            self._db_change(conn, "waitlist", name, email)
+            return True
+        conn.execute("INSERT INTO enrollments VALUES (?, ?)", (name, email))
+        conn.execute("UPDATE activities SET participant_count = participant_count + 1 "
+                     "WHERE name = ?", (name,))
+        self._db_change(conn, "signup", name, email)
+        return False
+
+    def _db_check_conflicts(self, conn, name, email):
+        overlapping = self._schedule.overlapping(name)
+        conflicting = [other for (other,) in conn.execute(
+            "SELECT activity FROM enrollments WHERE email = ? ORDER BY rowid", (email,))
+            if other in overlapping]
+        if conflicting:
+            raise ScheduleConflictError(conflicting)
+
+    def _db_unregister(self, conn, name, email):
+        """Unenroll ``email`` and return whoever was promoted, if anyone"""
+        row = conn.execute("SELECT max_participants, participant_count FROM activities "
+                           "WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise ActivityNotFoundError(name)
+        deleted = conn.execute("DELETE FROM enrollments WHERE activity = ? AND email = ?",
+                               (name, email)).rowcount
+        if not deleted:
+            raise NotSignedUpError(email)
+        self._db_change(conn, "unregister", name, email)
+        head = None
+        if row[1] - 1 < row[0]:
+            head = conn.execute("SELECT rowid, email FROM waitlist WHERE activity = ? "
+                                "ORDER BY rowid LIMIT 1", (name,)).fetchone()
+        if head is None:
+            conn.execute("UPDATE activities SET participant_count = participant_count - 1 "
+                         "WHERE name = ?", (name,))
+            return None
+        # The promoted student takes the freed spot, so the count is unchanged
+        conn.execute("DELETE FROM waitlist WHERE rowid = ?", (head[0],))
+        conn.execute("INSERT INTO enrollments VALUES (?, ?)", (name, head[1]))
+        self._db_change(conn, "signup", name, head[1])
+        return head[1]
+
+    def _db_leave_waitlist(self, conn, name, email):
+        if conn.execute("SELECT 1 FROM activities WHERE name = ?", (name,)).fetchone() is None:
+            raise ActivityNotFoundError(name)
+        deleted = conn.execute("DELETE FROM waitlist WHERE activity = ? AND email = ?",
+                               (name, email)).rowcount
+        if not deleted:
+            raise NotWaitlistedError(email)
+        self._db_change(conn, "unwaitlist", name, email)
+
+    @staticmethod
+    def _db_change(conn, op, name, email):
+        conn.execute("INSERT INTO changes (op, activity, email) VALUES (?, ?, ?)",
+                     (op, name, email))
+
+    # -- async interface ---------------------------------------------------
+
+    async def _in_pool(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool,
+                                          functools.partial(method, *args, **kwargs))
+
+    async def signup_async(self, name, email, check_conflicts=False):
+        return await self._in_pool(self.signup, name, email, check_conflicts)
+
+    async def unregister_async(self, name, email):
+        return await self._in_pool(self.unregister, name, email)
+
+    async def leave_waitlist_async(self, name, email):
+        return await self._in_pool(self.leave_waitlist, name, email)
+
+    async def waitlist_position_async(self, name, email):
+        return await self._in_pool(self.waitlist_position, name, email)
+
+    async def read_async(self, method, *args, **kwargs):
+        return await self._in_pool(method, *args, **kwargs)
+
+    # -- reads -------------------------------------------------------------
+
+    def to_json(self):
+        self.refresh()
+        return super().to_json()
+
+    def page(self, *args, **kwargs):
+        self.refresh()
+        return super().page(*args, **kwargs)
+
+    def search(self, query, limit=10):
+        self.refresh()
+        return super().search(query, limit)
+
+    def activities_for(self, email):
+        self.refresh()
+        return super().activities_for(email)
@@ -1,18 +1,46 @@
 document.addEventListener("DOMContentLoaded", () => {
-  loadActivities();
-
   const signupForm = document.getElementById("signup-form");
+  // Pages that only borrow the renderer, like the frontend benchmark, have
+  // no form and load their own data
+  if (!signupForm) {
+    return;
+  }
   signupForm.addEventListener("submit", handleSignup);
+
+  const activitiesList = document.getElementById("activities-list");
+  activitiesList.addEventListener("click", handleParticipantClick);
+
+  loadActivities();
 });
 
+// Activities as last loaded from the server, kept current by applying changes
+const state = {
+  epoch: null,
+  version: 0,
+  activities: {},
+};
+
+// Server-Sent Events connection pushing roster changes, once opened
+let eventSource = null;
+
+// Idempotency keys of signups the server has not answered yet, so a retry
+// after a network error is not applied twice
+const pendingSignupKeys = new Map();
+
 // Load activities from the server
 async function loadActivities() {
   try {
-    const response = await fetch("/activities");
+    // Revalidate with the server's ETag; unchanged data comes back as a 304
+    const response = await fetch("/activities", { cache: "no-cache" });
     const activities = await response.json();
 
+    state.epoch = response.headers.get("X-Activities-Epoch");
+    state.version = Number(response.headers.get("X-Activities-Version")) || 0;
+    state.activities = activities;
+
     displayActivities(activities);
     populateActivitySelect(activities);
+    connectStream();
   } catch (error) {
     console.error("Error loading activities:", error);
     document.getElementById("activities-list").innerHTML =
@@ -20,51 +48,345 @@ async function loadActivities() {
   }
 }
 
-// Display activities on the page
+// Rendered cards by activity name, so updates patch a card in place
+const activityCards = new Map();
+
+// Rosters longer than this render only the rows scrolled into view
+const VIRTUALIZE_AFTER = 50;
+// Height of one participant row plus its gap, in pixels; see styles.css
+const PARTICIPANT_ROW_HEIGHT = 33;
+// Extra rows rendered past each edge of the visible ones
+const OVERSCAN_ROWS = 10;
+// Height assumed for a virtual list that is not laid out yet
+const VIRTUAL_LIST_HEIGHT = 400;
+
+// Display activities on the page, reusing and reordering existing cards
 function displayActivities(activities) {
   const activitiesList = document.getElementById("activities-list");
 
   if (Object.keys(activities).length === 0) {
+    activityCards.clear();
     activitiesList.innerHTML = "<p>No activities available at this time.</p>";
     return;
   }
 
-  activitiesList.innerHTML = "";
+  if (activityCards.size === 0) {
+    // Drop the loading or error message
+    activitiesList.textContent = "";
+  }
+
+  for (const [name, card] of activityCards) {
+    if (!(name in activities)) {
+      card.element.remove();
+      activityCards.delete(name);
+    }
+  }
 
+  let previous = null;
   for (const [name, activity] of Object.entries(activities)) {
-    const activityCard = document.createElement("div");
-    activityCard.className = "activity-card";
-
-    const participantsList = activity.participants
-      .map((email) => `
-        <div class="participant-item">
-          <span class="participant-email">${email}</span>
-          <button class="delete-btn" onclick="unregisterParticipant('${name}', '${email}')"
-                  title="Remove participant">
-            <span class="delete-icon">×</span>
-          </button>
-        </div>
-      `)
-      .join("");
-
-    const spotsRemaining = activity.max_participants - activity.participants.length;
-
-    activityCard.innerHTML = `
-            <h4>${name}</h4>
-            <p><strong>Description:</strong> ${activity.description}</p>
-            <p><strong>Schedule:</strong> ${activity.schedule}</p>
-            <p><strong>Spots:</strong> ${activity.participants.length}/${activity.max_participants} filled 
-               <span class="spots-remaining">(${spotsRemaining} spots remaining)</span></p>
-            <div class="participants-section">
-                <h5>Current Participants:</h5>
-                ${activity.participants.length > 0 ? 
-                    `<div class="participants-list">${participantsList}</div>` : 
-                    '<p class="no-participants">No participants yet - be the first to sign up!</p>'
-                }
-            </div>
-        `;
-
-    activitiesList.appendChild(activityCard);
+    let card = activityCards.get(name);
+    if (!card) {
+      card = new ActivityCard(name);
+      activityCards.set(name, card);
+    }
+    card.update(activity);
+
+    // Only move cards that are out of place
+    const expected = previous ? previous.nextSibling : activitiesList.firstChild;
+    if (card.element !== expected) {
+      activitiesList.insertBefore(card.element, expected);
+    }
+    previous = card.element;
+  }
+}
+
+// Append a paragraph with a bold label and return the text node after it
+function appendLabelled(parent, label) {
+  const paragraph = document.createElement("p");
+  const strong = document.createElement("strong");
+  strong.textContent = label;
+  const value = document.createTextNode("");
+  paragraph.append(strong, " ", value);
+  parent.appendChild(paragraph);
+  return value;
+}
+
+// The card for one activity, keeping references to the parts that change
+class ActivityCard {
+  constructor(name) {
+    this.element = document.createElement("div");
+    this.element.className = "activity-card";
+    this.element.dataset.activity = name;
+
+    const title = document.createElement("h4");
+    title.textContent = name;
+    this.element.appendChild(title);
+
+    this.description = appendLabelled(this.element, "Description:");
+    this.schedule = appendLabelled(this.element, "Schedule:");
+    this.filled = appendLabelled(this.element, "Spots:");
+    this.remaining = document.createElement("span");
+    this.remaining.className = "spots-remaining";
+    this.filled.after(" ", this.remaining);
+
+    const section = document.createElement("div");
+    section.className = "participants-section";
+    const heading = document.createElement("h5");
+    heading.textContent = "Current Participants:";
+    this.empty = document.createElement("p");
+    this.empty.className = "no-participants";
+    this.empty.textContent = "No participants yet - be the first to sign up!";
+    this.participants = new ParticipantList();
+    section.append(heading, this.empty, this.participants.element);
+    this.element.appendChild(section);
+  }
+
+  update(activity) {
+    const count = activity.participants.length;
+    setText(this.description, activity.description);
+    setText(this.schedule, activity.schedule);
+    setText(this.filled, `${count}/${activity.max_participants} filled`);
+    setText(this.remaining, `(${activity.max_participants - count} spots remaining)`);
+
+    this.empty.hidden = count > 0;
+    this.participants.element.hidden = count === 0;
+    this.participants.update(activity.participants);
+  }
+}
+
+// Write text only when it differs, so unchanged nodes are left alone
+function setText(node, text) {
+  if (node.textContent !== text) {
+    node.textContent = text;
+  }
+}
+
+// Participant rows keyed by email; long rosters are virtualized, keeping
+// only the rows in and near the visible window in the document
+class ParticipantList {
+  constructor() {
+    this.element = document.createElement("div");
+    this.element.className = "participants-list";
+    this.emails = [];
+    this.rows = new Map();
+    this.virtual = false;
+    this.spacer = null;
+    this.frame = null;
+    this.element.addEventListener("scroll", () => {
+      if (this.virtual && this.frame === null) {
+        this.frame = requestAnimationFrame(() => {
+          this.frame = null;
+          this.renderWindow();
+        });
+      }
+    });
+  }
+
+  update(emails) {
+    this.emails = emails;
+    const virtual = emails.length > VIRTUALIZE_AFTER;
+    if (virtual !== this.virtual) {
+      this.virtual = virtual;
+      this.element.classList.toggle("virtual", virtual);
+      this.element.textContent = "";
+      this.rows.clear();
+      this.spacer = null;
+      if (virtual) {
+        this.spacer = document.createElement("div");
+        this.spacer.className = "participants-spacer";
+        this.element.appendChild(this.spacer);
+      }
+    }
+
+    if (virtual) {
+      this.spacer.style.height = `${emails.length * PARTICIPANT_ROW_HEIGHT}px`;
+      this.renderWindow();
+    } else {
+      this.renderAll();
+    }
+  }
+
+  // Patch every row into roster order, touching only what moved
+  renderAll() {
+    const wanted = new Set(this.emails);
+    for (const [email, row] of this.rows) {
+      if (!wanted.has(email)) {
+        row.remove();
+        this.rows.delete(email);
+      }
+    }
+
+    let previous = null;
+    for (const email of this.emails) {
+      const row = this.row(email);
+      const expected = previous ? previous.nextSibling : this.element.firstChild;
+      if (row !== expected) {
+        this.element.insertBefore(row, expected);
+      }
+      previous = row;
+    }
+  }
+
+  // Render the rows around the scroll position, positioned absolutely
+  renderWindow() {
+    const height = this.element.clientHeight || VIRTUAL_LIST_HEIGHT;
+    const first = Math.max(
+      0, Math.floor(this.element.scrollTop / PARTICIPANT_ROW_HEIGHT) - OVERSCAN_ROWS
+    );
+    const last = Math.min(
+      this.emails.length,
+      first + Math.ceil(height / PARTICIPANT_ROW_HEIGHT) + 2 * OVERSCAN_ROWS
+    );
+
+    const wanted = new Map();
+    for (let index = first; index < last; index++) {
+      wanted.set(this.emails[index], index);
+    }
+    for (const [email, row] of this.rows) {
+      if (!wanted.has(email)) {
+        row.remove();
+        this.rows.delete(email);
+      }
+    }
+    for (const [email, index] of wanted) {
+      const row = this.row(email);
+      row.style.transform = `translateY(${index * PARTICIPANT_ROW_HEIGHT}px)`;
+      if (!row.parentNode) {
+        this.element.appendChild(row);
+      }
+    }
+  }
+
+  // Return the row for an email, creating it if it is not rendered
+  row(email) {
+    let row = this.rows.get(email);
+    if (!row) {
+      row = document.createElement("div");
+      row.className = "participant-item";
+      row.dataset.email = email;
+      const label = document.createElement("span");
+      label.className = "participant-email";
+      label.textContent = email;
+      const button = document.createElement("button");
+      button.className = "delete-btn";
+      button.title = "Remove participant";
+      button.innerHTML = '<span class="delete-icon">×</span>';
+      row.append(label, button);
+      this.rows.set(email, row);
+    }
+    return row;
+  }
+}
+
+// Unregister the participant whose delete button was clicked
+function handleParticipantClick(event) {
+  const button = event.target.closest(".delete-btn");
+  if (!button) {
+    return;
+  }
+  const row = button.closest(".participant-item");
+  const card = button.closest(".activity-card");
+  unregisterParticipant(card.dataset.activity, row.dataset.email);
+}
+
+// Fetch the changes made since the last known version and apply them to the
+// page; falls back to a full reload when the server can no longer supply them
+async function syncActivities() {
+  try {
+    const response = await fetch(`/activities/changes?since=${state.version}`);
+    const feed = await response.json();
+
+    if (!response.ok || feed.resync || feed.epoch !== state.epoch) {
+      loadActivities();
+      return;
+    }
+
+    const changed = new Set();
+    for (const change of feed.changes) {
+      if (applyChange(change)) {
+        changed.add(change.activity);
+      }
+    }
+    state.version = feed.version;
+
+    for (const name of changed) {
+      updateActivityCard(name);
+    }
+  } catch (error) {
+    console.error("Error syncing activities:", error);
+    loadActivities();
+  }
+}
+
+// Subscribe to pushed roster changes so the page stays current without
+// refetching; the browser reconnects on its own if the stream drops
+function connectStream() {
+  if (eventSource || !window.EventSource) {
+    return;
+  }
+
+  const lastEventId = encodeURIComponent(`${state.epoch}-${state.version}`);
+  eventSource = new EventSource(`/activities/stream?last_event_id=${lastEventId}`);
+
+  eventSource.addEventListener("change", (event) => {
+    const change = JSON.parse(event.data);
+    const epoch = event.lastEventId.slice(0, event.lastEventId.lastIndexOf("-"));
+    if (epoch !== state.epoch) {
+      loadActivities();
+      return;
+    }
+    // Catch-up and live events can overlap; skip anything already applied
+    if (change.version <= state.version) {
+      return;
+    }
+    if (applyChange(change)) {
+      updateActivityCard(change.activity);
+    }
+    state.version = change.version;
+  });
+
+  eventSource.addEventListener("reset", () => {
+    loadActivities();
+  });
+}
+
+// Bring the page up to date after this client changed a roster
+function refreshActivities() {
+  if (eventSource && eventSource.readyState === EventSource.OPEN) {
+    // The change will arrive over the stream
+    return;
+  }
+  syncActivities();
+}
+
+// Apply one change from the feed to the local state; returns true if it
+// touched a roster
+function applyChange(change) {
+  const activity = state.activities[change.activity];
+  if (!activity) {
+    return false;
+  }
+
+  const participants = activity.participants;
+  const index = participants.indexOf(change.email);
+  if (change.op === "signup" && index === -1) {
+    participants.push(change.email);
+    return true;
+  }
+  if (change.op === "unregister" && index !== -1) {
+    participants.splice(index, 1);
+    return true;
+  }
+  return false;
+}
+
+// Patch the card of a single activity in place
+function updateActivityCard(name) {
+  const card = activityCards.get(name);
+  if (card) {
+    card.update(state.activities[name]);
+  } else {
+    displayActivities(state.activities);
   }
 }
 
@@ -96,6 +418,11 @@ async function handleSignup(event) {
     return;
   }
 
+  const pendingKey = `${activityName}\n${email}`;
+  if (!pendingSignupKeys.has(pendingKey)) {
+    pendingSignupKeys.set(pendingKey, crypto.randomUUID());
+  }
+
   try {
     const response = await fetch(
       `/activities/${encodeURIComponent(activityName)}/signup`,
@@ -103,18 +430,20 @@ async function handleSignup(event) {
         method: "POST",
         headers: {
           "Content-Type": "application/x-www-form-urlencoded",
+          "Idempotency-Key": pendingSignupKeys.get(pendingKey),
         },
         body: `email=${encodeURIComponent(email)}`,
       }
     );
+    pendingSignupKeys.delete(pendingKey);
 
     const result = await response.json();
 
     if (response.ok) {
       showMessage(result.message, "success");
       document.getElementById("signup-form").reset();
-      // Reload activities to show updated participant list
-      loadActivities();
+      // Pull in this and any other recent changes
+      refreshActivities();
     } else {
       showMessage(result.detail || "An error occurred during signup.", "error");
     }
@@ -142,8 +471,8 @@ async function unregisterParticipant(activityName, email) {
 
     if (response.ok) {
       showMessage(result.message, "success");
-      // Reload activities to show updated participant list
-      loadActivities();
+      // Pull in this and any other recent changes
+      refreshActivities();
     } else {
       showMessage(result.detail || "An error occurred during unregistration.", "error");
     }
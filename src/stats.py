@@ -0,0 +1,197 @@
+"""
+Enrollment statistics, kept current as rosters change.
+
+``EnrollmentStats`` listens to store changes and adjusts its counters by one
+for each signup, unregister and waitlist change, so reading them never walks
+a roster. Only a ``"reset"``, when activities are reloaded wholesale, counts
+everything again from the rosters' sizes.
+
+The most subscribed activities come from count buckets: a linked list of
+buckets in descending participant count, each holding the activities with
+that count. A signup or unregister moves one activity to the neighbouring
+bucket, creating or dropping buckets as needed, so updates are constant time
+and the top ``k`` are read off the front of the list.
+"""
+
+import threading
+from itertools import islice
+
+from schedule import DAYS
+
+
+class _Bucket:
+    __slots__ = ("count", "names", "higher", "lower")
+
+    def __init__(self, count):
+        self.count = count
+        # Insertion-ordered, so ties list the first to reach the count first
+        self.names = {}
+        self.higher = None
+        self.lower = None
+
+
+class _Counts:
+    """Per-activity counters"""
+
+    __slots__ = ("activity", "participants", "max_participants", "waitlist", "days", "bucket")
+
+    def __init__(self, activity):
+        self.activity = activity
+        self.participants = len(activity.participants)
+        self.max_participants = activity.max_participants
+        self.waitlist = len(activity.waitlist)
+        self.days = activity.days
+        self.bucket = None
+
+    @property
+    def spots_remaining(self):
+        return max(self.max_participants - self.participants, 0)
+
+
+class EnrollmentStats:
+    """Aggregate enrollment counters for one store"""
+
+    def __init__(self, store):
+        self._store = store
+        self._lock = threading.Lock()
+        with self._lock:
+            self._rebuild()
+        store.subscribe(self._on_change)
+
+    def _rebuild(self):
+        self._activities = {}
+        self._top = None
+        self.participants = 0
+        self.waitlisted = 0
+        self.spots_remaining = 0
+        self.max_participants = 0
+        self.full = 0
+        # Signups for activities meeting on each day; a student in two
+        # activities on the same day counts twice
+        self.by_day = dict.fromkeys(DAYS, 0)
+        for name in list(self._store):
+            counts = _Counts(self._store.get(name))
+            self._activities[name] = counts
+            self.participants += counts.participants
+            self.waitlisted += counts.waitlist
+            self.max_participants += counts.max_participants
+            self.spots_remaining += counts.spots_remaining
+            self.full += counts.spots_remaining == 0
+            for day in counts.days:
+                self.by_day[day] += counts.participants
+        # Bucket activities by count, highest first
+        bottom = None
+        for name, counts in sorted(self._activities.items(),
+                                   key=lambda item: -item[1].participants):
+            if bottom is None or bottom.count != counts.participants:
+                bucket = _Bucket(counts.participants)
+                bucket.higher = bottom
+                if bottom is None:
+                    self._top = bucket
+                else:
+                    bottom.lower = bucket
+                bottom = bucket
+            bottom.names[name] = None
+            counts.bucket = bottom
+
+    def _on_change(self, event):
+        op = event["op"]
+        with self._lock:
+            if op == "reset":
+                self._rebuild()
+                return
+            counts = self._activities.get(event.get("activity"))
+            if counts is None:
+                return
+            if op == "signup":
+                self._adjust(event["activity"], counts, 1)
+            elif op == "unregister":
+                self._adjust(event["activity"], counts, -1)
+            # A promotion off the waitlist arrives as a signup alone, so the
+            # waitlist's length is read rather than counted; it is O(1)
+            waitlist = len(counts.activity.waitlist)
+            self.waitlisted += waitlist - counts.waitlist
+            counts.waitlist = waitlist
+
+    def _adjust(self, name, counts, delta):
+        spots = counts.spots_remaining
+        counts.participants += delta
+        self.participants += delta
+        self.spots_remaining += counts.spots_remaining - spots
+        self.full += (counts.spots_remaining == 0) - (spots == 0)
+        for day in counts.days:
+            self.by_day[day] += delta
+        self._move(name, counts, delta)
+
+    def _move(self, name, counts, delta):
+        bucket = counts.bucket
+        target = bucket.higher if delta > 0 else bucket.lower
+        if target is None or target.count != counts.participants:
+            # Link a new bucket in next to the old one
+            target = _Bucket(counts.participants)
+            if delta > 0:
+                target.lower, target.higher = bucket, bucket.higher
+                if bucket.higher is not None:
+                    bucket.higher.lower = target
+                else:
+                    self._top = target
+                bucket.higher = target
+            else:
+                target.higher, target.lower = bucket, bucket.lower
+                if bucket.lower is not None:
+                    bucket.lower.higher = target
+                bucket.lower = target
+        del bucket.names[name]
+        target.names[name] = None
+        counts.bucket = target
+        if not bucket.names:
+            # Unlink the emptied bucket
+            if bucket.higher is not None:
+                bucket.higher.lower = bucket.lower
+            else:
+                self._top = bucket.lower
+            if bucket.lower is not None:
+                bucket.lower.higher = bucket.higher
+
+    def top(self, k):
+        """Return ``(name, participants)`` for the ``k`` most subscribed activities"""
+        with self._lock:
+            return list(islice(self._ranked(), k))
+
+    def _ranked(self):
+        bucket = self._top
+        while bucket is not None:
+            for name in bucket.names:
+                yield name, bucket.count
+            bucket = bucket.lower
+
+    def snapshot(self, top=5):
+        """Return every statistic, in the shape served by ``GET /stats``"""
+        with self._lock:
+            activities = {
+                name: {
+                    "participants": counts.participants,
+                    "max_participants": counts.max_participants,
+                    "spots_remaining": counts.spots_remaining,
+                    "fill_ratio": (round(counts.participants / counts.max_participants, 4)
+                                   if counts.max_participants else 1.0),
+                    "waitlist": counts.waitlist,
+                }
+                for name, counts in self._activities.items()
+            }
+            return {
+                "totals": {
+                    "activities": len(self._activities),
+                    "participants": self.participants,
+                    "max_participants": self.max_participants,
+                    "spots_remaining": self.spots_remaining,
+                    "fill_ratio": (round(self.participants / self.max_participants, 4)
+                                   if self.max_participants else 0.0),
+                    "full_activities": self.full,
+                    "waitlisted": self.waitlisted,
+                },
+                "top": [{"name": name, "participants": count}
+                        for name, count in islice(self._ranked(), top)],
+                "by_day": dict(self.by_day),
+                "activities": activities,
+            }
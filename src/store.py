@@ -0,0 +1,677 @@
+"""
+Activity store for the Mergington High School API.
+
+Student emails are interned once per store and numbered (see
+``students.py``). Each activity keeps its roster as a compact insertion-ordered
+set of those numbers, and the store keeps a reverse index from student number
+to the activities that student belongs to. "Which activities is this
+student in" is constant time. Roster membership checks are a binary search,
+and a signup or unregister shifts part of the roster's sorted id array: a
+couple of microseconds up to rosters of 10,000, rising to under a
+millisecond at a million (see ``benchmarks/bench_memory.py``). That is the
+price of a third of the memory of dict rosters.
+
+Once an activity is full, further signups join its FIFO waitlist (see
+``waitlist.py``), and unregistering a participant promotes the head of the
+waitlist in the same locked step.
+
+Every roster change is also handed to a storage backend (see
+``persistence.py``) before the call returns. When the backend cannot store
+it, the call raises ``StorageError``; a backend that has stopped accepting
+changes is checked first, so nothing is changed in memory.
+
+Each activity has its own lock, held only while its roster is checked and
+changed, so signups for unrelated activities never contend and capacity is
+enforced exactly under concurrent requests. The reverse index is guarded by
+a small set of striped locks keyed by email.
+
+The store's ``version`` is bumped on every change, and listeners registered
+with ``subscribe`` are told about each change in version order. ``to_json``
+caches the serialized ``GET /activities`` body for the current version, so
+repeated reads of an unchanged store cost no serialization. Each activity
+also caches its own JSON fragment per roster revision, so after a change
+only that activity is encoded again and the body is spliced together.
+
+Names and descriptions are kept in a keyword index (see ``search.py``) that
+is updated one activity at a time as activities are added or replaced.
+"""
+
+import asyncio
+import threading
+import uuid
+
+from persistence import MemoryBackend
+from schedule import ScheduleIndex, parse_schedule
+from search import SearchIndex
+from serialization import dumps
+from students import Roster, StudentRegistry
+from waitlist import Waitlist
+
+INDEX_LOCK_STRIPES = 64
+
+#: Changes made per hold of an activity lock by the ``*_many`` methods
+BATCH_SIZE = 256
+
+
+class StoreError(Exception):
+    """Base class for errors raised by the activity store"""
+
+    #: Message shown to API clients
+    detail = "Invalid request"
+
+
+class ActivityNotFoundError(StoreError):
+    """Raised when an activity name is not in the store"""
+
+    detail = "Activity not found"
+
+
+class AlreadySignedUpError(StoreError):
+    """Raised when a student is already on an activity's roster"""
+
+    detail = "Student already signed up for this activity"
+
+
+class NotSignedUpError(StoreError):
+    """Raised when a student is not on an activity's roster"""
+
+    detail = "Student is not registered for this activity"
+
+
+class AlreadyWaitlistedError(StoreError):
+    """Raised when a student is already on an activity's waitlist"""
+
+    detail = "Student is already on the waitlist for this activity"
+
+
+class NotWaitlistedError(StoreError):
+    """Raised when a student is not on an activity's waitlist"""
+
+    detail = "Student is not on the waitlist for this activity"
+
+
+class ScheduleConflictError(StoreError):
+    """Raised when a signup overlaps another activity the student is in"""
+
+    def __init__(self, conflicting):
+        super().__init__(conflicting)
+        self.conflicting = conflicting
+        self.detail = f"Schedule conflicts with {', '.join(conflicting)}"
+
+
+class Activity:
+    """A single activity and its roster"""
+
+    __slots__ = ("name", "description", "schedule", "max_participants", "participants", "lock",
+                 "slot", "waitlist", "revision", "_fragment")
+
+    #: Fields that :meth:`project` can return
+    FIELDS = ("name", "description", "schedule", "max_participants", "participants",
+              "participant_count", "spots_remaining")
+
+    def __init__(self, name, description, schedule, max_participants, participants=(),
+                 waitlist=(), students=None):
+        self.name = name
+        self.description = description
+        self.schedule = schedule
+        self.max_participants = max_participants
+        self.participants = Roster(students if students is not None else StudentRegistry(),
+                                   participants)
+        self.lock = threading.Lock()
+        self.slot = parse_schedule(schedule)
+        self.waitlist = Waitlist(waitlist)
+        # Bumped whenever to_dict() would change
+        self.revision = 0
+        self._fragment = (None, b"")
+
+    @property
+    def is_full(self):
+        return len(self.participants) >= self.max_participants
+
+    @property
+    def days(self):
+        return self.slot.days
+
+    @property
+    def spots_remaining(self):
+        return max(self.max_participants - len(self.participants), 0)
+
+    def project(self, fields):
+        """Return only ``fields`` (names from :attr:`FIELDS`) of the activity"""
+        projected = {}
+        for field in fields:
+            if field == "participants":
+                projected[field] = list(self.participants)
+            elif field == "participant_count":
+                projected[field] = len(self.participants)
+            else:
+                projected[field] = getattr(self, field)
+        return projected
+
+    def to_dict(self):
+        """Return the activity in the shape served by ``GET /activities``"""
+        return {
+            "description": self.description,
+            "schedule": self.schedule,
+            "max_participants": self.max_participants,
+            "participants": list(self.participants),
+        }
+
+    def json_fragment(self):
+        """Return ``"name":{...}`` as JSON bytes, cached per revision"""
+        revision, fragment = self._fragment
+        if revision != self.revision:
+            revision = self.revision
+            fragment = dumps(self.name) + b":" + dumps(self.to_dict())
+            # Only cache if the roster did not change while encoding
+            if self.revision == revision:
+                self._fragment = (revision, fragment)
+        return fragment
+
+    def to_record(self):
+        """Return everything needed to restore the activity, waitlist included
+
+        Takes the activity lock, since storage snapshots call this from the
+        flusher thread while signups change the roster and waitlist.
+        """
+        with self.lock:
+            record = self.to_dict()
+            if self.waitlist:
+                record["waitlist"] = list(self.waitlist)
+        return record
+
+
+class ActivityStore:
+    """In-memory activities keyed by name, with a student reverse index"""
+
+    def __init__(self, data=None, backend=None):
+        self._activities = {}
+        # Activity names in order, and each name's position, for paging
+        self._names = []
+        self._positions = {}
+        self._schedule = ScheduleIndex({})
+        self._search = SearchIndex()
+        self.students = StudentRegistry()
+        # Indexed by student id: a tuple of the activities they are in, in
+        # signup order. Grown under _grow_lock as students are interned.
+        self._student_index = []
+        self._grow_lock = threading.Lock()
+        self._index_locks = [threading.Lock() for _ in range(INDEX_LOCK_STRIPES)]
+        # Taken after an activity lock by signups that check for conflicts
+        self._conflict_locks = [threading.Lock() for _ in range(INDEX_LOCK_STRIPES)]
+        self._backend = backend if backend is not None else MemoryBackend()
+        # Distinguishes versions across restarts, where the counter starts over
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._version_lock = threading.Lock()
+        self._json_cache = (None, b"")
+        self._listeners = []
+        if data:
+            self.update(data)
+
+    def open(self):
+        """Restore state from the storage backend"""
+        self._backend.open(self)
+
+    def close(self):
+        """Flush and close the storage backend"""
+        self._backend.close()
+
+    def __contains__(self, name):
+        return name in self._activities
+
+    def __iter__(self):
+        return iter(self._activities)
+
+    def __len__(self):
+        return len(self._activities)
+
+    def get(self, name):
+        """Return the :class:`Activity` called ``name``"""
+        try:
+            return self._activities[name]
+        except KeyError:
+            raise ActivityNotFoundError(name) from None
+
+    def clear(self):
+        """Remove every activity and roster"""
+        self._activities.clear()
+        self._student_index = []
+        self.students = StudentRegistry()
+        self._search = SearchIndex()
+        self._reindex()
+        self._bump("reset")
+
+    def update(self, data):
+        """Load activities from a ``{name: fields}`` mapping
+
+        ``fields`` uses the same keys as the ``GET /activities`` response,
+        plus an optional ``waitlist`` list. Activities that already exist are
+        replaced.
+        """
+        for name, fields in data.items():
+            if name in self._activities:
+                self._remove_activity(name)
+            activity = Activity(
+                name,
+                fields["description"],
+                fields["schedule"],
+                fields["max_participants"],
+                fields.get("participants", ()),
+                fields.get("waitlist", ()),
+                self.students,
+            )
+            self._activities[name] = activity
+            self._search.add(name, activity.description)
+            for student_id in activity.participants.ids():
+                self._index(student_id, name)
+        self._reindex()
+        self._bump("reset")
+
+    def _replace(self, data):
+        """Swap in activities loaded from ``data`` in one step
+
+        The new activities and indexes are built on the side, so readers on
+        other threads see either the old activities or the new ones, never a
+        cleared or half-loaded store.
+        """
+        fresh = ActivityStore(data)
+        # A single dict update runs without releasing the GIL
+        self.__dict__.update({
+            "_activities": fresh._activities,
+            "_names": fresh._names,
+            "_positions": fresh._positions,
+            "_schedule": fresh._schedule,
+            "_search": fresh._search,
+            "students": fresh.students,
+            "_student_index": fresh._student_index,
+            "_json_cache": (None, b""),
+        })
+        self._bump("reset")
+
+    def _reindex(self):
+        # Rebuild the indexes that only change when activities are reloaded
+        names = list(self._activities)
+        self._positions = {name: position for position, name in enumerate(names)}
+        self._names = names
+        self._schedule = ScheduleIndex(
+            {name: activity.slot for name, activity in self._activities.items()}
+        )
+
+    def _remove_activity(self, name):
+        activity = self._activities.pop(name)
+        self._search.remove(name)
+        for student_id in activity.participants.ids():
+            self._unindex(student_id, name)
+
+    def _index_lock(self, student_id):
+        return self._index_locks[student_id % INDEX_LOCK_STRIPES]
+
+    def _memberships(self, student_id):
+        index = self._student_index
+        return index[student_id] if student_id < len(index) else ()
+
+    def _index(self, student_id, name):
+        index = self._student_index
+        if student_id >= len(index):
+            with self._grow_lock:
+                index.extend(() for _ in range(len(index), student_id + 1))
+        # Memberships are short tuples, replaced on change, to keep them small
+        with self._index_lock(student_id):
+            memberships = index[student_id]
+            if name not in memberships:
+                index[student_id] = memberships + (name,)
+
+    def _unindex(self, student_id, name):
+        with self._index_lock(student_id):
+            memberships = self._memberships(student_id)
+            if name in memberships:
+                self._student_index[student_id] = tuple(
+                    other for other in memberships if other != name)
+
+    def signup(self, name, email, check_conflicts=False):
+        """Add ``email`` to the roster of activity ``name``
+
+        If the activity is full the student joins its waitlist instead.
+        Returns None when enrolled, or the student's 1-based waitlist position.
+
+        With ``check_conflicts``, the signup is refused if the activity's
+        schedule overlaps one the student is already in.
+        """
+        pending = []
+        position = self._signup(name, email, check_conflicts, pending)
+        # Wait for the group commit without holding the activity lock
+        self._wait(pending)
+        return position
+
+    def unregister(self, name, email):
+        """Remove ``email`` from the roster of activity ``name``
+
+        Returns the email promoted from the waitlist into the freed spot, if
+        any.
+        """
+        pending = []
+        promoted = self._unregister(name, email, pending)
+        self._wait(pending)
+        return promoted
+
+    def leave_waitlist(self, name, email):
+        """Remove ``email`` from the waitlist of activity ``name``"""
+        pending = []
+        self._leave_waitlist(name, email, pending)
+        self._wait(pending)
+
+    # The async variants change memory inline when the activity lock is
+    # free, and await durability without blocking the loop
+
+    async def signup_async(self, name, email, check_conflicts=False):
+        """:meth:`signup` for use on an event loop"""
+        pending = []
+        activity = self.get(name)
+        position = await self._locked_async(activity, self._signup_checked, activity, email,
+                                            check_conflicts, pending)
+        await self._wait_async(pending)
+        return position
+
+    async def unregister_async(self, name, email):
+        """:meth:`unregister` for use on an event loop"""
+        pending = []
+        activity = self.get(name)
+        promoted = await self._locked_async(activity, self._unregister_locked, activity, email,
+                                            pending)
+        await self._wait_async(pending)
+        return promoted
+
+    async def leave_waitlist_async(self, name, email):
+        """:meth:`leave_waitlist` for use on an event loop"""
+        pending = []
+        activity = self.get(name)
+        await self._locked_async(activity, self._leave_waitlist_locked, activity, email, pending)
+        await self._wait_async(pending)
+
+    async def waitlist_position_async(self, name, email):
+        """:meth:`waitlist_position` for use on an event loop"""
+        activity = self.get(name)
+        return await self._locked_async(activity, activity.waitlist.position, email)
+
+    @staticmethod
+    async def _locked_async(activity, function, *args):
+        """Call ``function(*args)`` under ``activity.lock`` without blocking the loop"""
+        if activity.lock.acquire(blocking=False):
+            try:
+                return function(*args)
+            finally:
+                activity.lock.release()
+
+        # Held by another thread, such as a bulk import; wait in a worker
+        def locked():
+            with activity.lock:
+                return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, locked)
+
+    async def read_async(self, method, *args, **kwargs):
+        """Call the read ``method(*args, **kwargs)`` from an event loop
+
+        Reads only touch memory here, so they run inline. Stores that read
+        from blocking storage override this to use a worker pool.
+        """
+        return method(*args, **kwargs)
+
+    def _signup(self, name, email, check_conflicts, pending):
+        activity = self.get(name)
+        with activity.lock:
+            return self._signup_checked(activity, email, check_conflicts, pending)
+
+    def _signup_checked(self, activity, email, check_conflicts, pending):
+        if not check_conflicts:
+            return self._signup_locked(activity, email, pending)
+        # Held from the check to the signup, so two checked signups for one
+        # student into overlapping activities cannot both pass the check
+        with self._conflict_locks[hash(email) % INDEX_LOCK_STRIPES]:
+            overlapping = self._schedule.overlapping(activity.name)
+            conflicting = [other for other in self.activities_for(email)
+                           if other in overlapping]
+            if conflicting:
+                raise ScheduleConflictError(conflicting)
+            return self._signup_locked(activity, email, pending)
+
+    def _unregister(self, name, email, pending):
+        activity = self.get(name)
+        with activity.lock:
+            return self._unregister_locked(activity, email, pending)
+
+    def _leave_waitlist(self, name, email, pending):
+        activity = self.get(name)
+        with activity.lock:
+            self._leave_waitlist_locked(activity, email, pending)
+
+    def _leave_waitlist_locked(self, activity, email, pending):
+        self._backend.check()
+        if email not in activity.waitlist:
+            raise NotWaitlistedError(email)
+        activity.waitlist.remove(email)
+        self._bump("unwaitlist", activity.name, email)
+        pending.append(self._log("unwaitlist", activity, email))
+
+    def waitlist_position(self, name, email):
+        """Return the 1-based waitlist position of ``email``, or None"""
+        activity = self.get(name)
+        with activity.lock:
+            return activity.waitlist.position(email)
+
+    def signup_many(self, name, emails):
+        """Sign up each of ``emails`` for activity ``name``, in locked batches
+
+        The activity lock is released every ``BATCH_SIZE`` emails so single
+        signups are never held up behind a whole import.
+
+        Returns one entry per email: what :meth:`signup` would have returned,
+        or the :class:`StoreError` it would have raised.
+        """
+        return self._many(self._signup_locked, name, emails)
+
+    def unregister_many(self, name, emails):
+        """Unregister each of ``emails`` from activity ``name``, in locked batches
+
+        Returns results in the same form as :meth:`signup_many`.
+        """
+        return self._many(self._unregister_locked, name, emails)
+
+    def _many(self, operation, name, emails):
+        activity = self.get(name)
+        results = []
+        pending = []
+        for start in range(0, len(emails), BATCH_SIZE):
+            with activity.lock:
+                for email in emails[start:start + BATCH_SIZE]:
+                    try:
+                        results.append(operation(activity, email, pending))
+                    except StoreError as exc:
+                        results.append(exc)
+        self._wait(pending)
+        return results
+
+    def _signup_locked(self, activity, email, pending):
+        # Refuse before changing memory, rather than leave a change unlogged
+        self._backend.check()
+        if email in activity.participants:
+            raise AlreadySignedUpError(email)
+        if email in activity.waitlist:
+            raise AlreadyWaitlistedError(email)
+        if activity.is_full:
+            position = activity.waitlist.push(email)
+            self._bump("waitlist", activity.name, email)
+            pending.append(self._log("waitlist", activity, email))
+            return position
+        self._add(activity, email)
+        pending.append(self._log("signup", activity, email))
+        return None
+
+    def _unregister_locked(self, activity, email, pending):
+        self._backend.check()
+        if email not in activity.participants:
+            raise NotSignedUpError(email)
+        self._remove(activity, email)
+        pending.append(self._log("unregister", activity, email))
+        if activity.is_full or not activity.waitlist:
+            return None
+        promoted = activity.waitlist.pop()
+        self._add(activity, promoted)
+        pending.append(self._log("signup", activity, promoted))
+        return promoted
+
+    def _log(self, op, activity, email):
+        return self._backend.append({"op": op, "activity": activity.name, "email": email})
+
+    @staticmethod
+    def _wait(pending):
+        for durable in pending:
+            durable.result()
+
+    @staticmethod
+    async def _wait_async(pending):
+        for durable in pending:
+            if not durable.done():
+                await asyncio.wrap_future(durable)
+            durable.result()
+
+    def apply(self, record):
+        """Replay a change record from the storage backend
+
+        Records that are already reflected in memory are ignored.
+        """
+        activity = self._activities.get(record["activity"])
+        if activity is None:
+            return
+        op = record["op"]
+        email = record["email"]
+        with activity.lock:
+            waiting = email in activity.waitlist
+            if op == "signup":
+                # A signup record also covers promotion off the waitlist
+                if waiting:
+                    activity.waitlist.remove(email)
+                if email not in activity.participants:
+                    self._add(activity, email)
+            elif op == "unregister" and email in activity.participants:
+                self._remove(activity, email)
+            elif op == "waitlist" and not waiting and email not in activity.participants:
+                activity.waitlist.push(email)
+                self._bump("waitlist", activity.name, email)
+            elif op == "unwaitlist" and waiting:
+                activity.waitlist.remove(email)
+                self._bump("unwaitlist", activity.name, email)
+
+    def _add(self, activity, email):
+        student_id = activity.participants.add(email)
+        activity.revision += 1
+        self._index(student_id, activity.name)
+        self._bump("signup", activity.name, email)
+
+    def _remove(self, activity, email):
+        student_id = activity.participants.remove(email)
+        activity.revision += 1
+        self._unindex(student_id, activity.name)
+        self._bump("unregister", activity.name, email)
+
+    def _bump(self, op, activity=None, email=None):
+        # Listeners run under the version lock so they see changes in order
+        with self._version_lock:
+            self.version = self._next_version()
+            if self._listeners:
+                event = {"version": self.version, "op": op}
+                if activity is not None:
+                    event["activity"] = activity
+                    event["email"] = email
+                for listener in self._listeners:
+                    listener(event)
+
+    def _next_version(self):
+        return self.version + 1
+
+    def subscribe(self, listener):
+        """Call ``listener(event)`` after every change
+
+        ``event`` has ``version`` and ``op`` (``"signup"``, ``"unregister"``,
+        ``"waitlist"``, ``"unwaitlist"`` or ``"reset"``), plus ``activity``
+        and ``email`` for roster changes. A promotion off the waitlist is a
+        ``"signup"``. A ``"reset"`` means activities were reloaded wholesale.
+        Listeners must be quick and must not call back into the store.
+        """
+        self._listeners.append(listener)
+
+    def page(self, after=None, limit=None, day=None, min_spots=None):
+        """Return ``(activities, last_name)`` for one page of activities
+
+        The page starts after the activity named ``after`` and holds up to
+        ``limit`` activities that meet on ``day`` (a ``schedule.DAYS`` entry)
+        and have at least ``min_spots`` spots left. ``last_name`` is where the
+        next page should start, or None once the listing is exhausted.
+        """
+        names = self._names
+        position = 0 if after is None else self.position(after) + 1
+        found = []
+        while position < len(names) and (limit is None or len(found) < limit):
+            activity = self._activities[names[position]]
+            position += 1
+            if day is not None and day not in activity.days:
+                continue
+            if min_spots is not None and activity.spots_remaining < min_spots:
+                continue
+            found.append(activity)
+        last_name = found[-1].name if found and position < len(names) else None
+        return found, last_name
+
+    def position(self, name):
+        """Return the position of activity ``name`` in listing order"""
+        try:
+            return self._positions[name]
+        except KeyError:
+            raise ActivityNotFoundError(name) from None
+
+    def search(self, query, limit=10):
+        """Return up to ``limit`` ``(activity, score)`` pairs matching ``query``
+
+        See ``search.py`` for how words are matched and ranked.
+        """
+        activities = self._activities
+        return [(activities[name], score)
+                for name, score in self._search.search(query, limit) if name in activities]
+
+    def activities_for(self, email):
+        """Return the names of the activities ``email`` is signed up for"""
+        student_id = self.students.find(email)
+        if student_id is None:
+            return []
+        with self._index_lock(student_id):
+            return list(self._memberships(student_id))
+
+    def conflicts_for(self, email):
+        """Return pairs of activities ``email`` is in whose schedules overlap"""
+        return self._schedule.conflicts(self.activities_for(email))
+
+    def to_dict(self):
+        """Return every activity in the shape served by ``GET /activities``"""
+        # list() over a dict runs without releasing the GIL, so each copy
+        # is consistent even though writers may run between activities
+        return {activity.name: activity.to_dict()
+                for activity in list(self._activities.values())}
+
+    def to_json(self):
+        """Return ``(version, body)`` for ``GET /activities``, cached per version"""
+        version = self.version
+        cached_version, body = self._json_cache
+        if cached_version != version:
+            fragments = [activity.json_fragment()
+                         for activity in list(self._activities.values())]
+            body = b"{" + b",".join(fragments) + b"}"
+            # Only cache if nothing changed while serializing; otherwise the
+            # body may already include changes newer than ``version``
+            if self.version == version:
+                self._json_cache = (version, body)
+        return version, body
+
+    def snapshot(self):
+        """Return every activity with its waitlist, for storage snapshots"""
+        return {activity.name: activity.to_record()
+                for activity in list(self._activities.values())}
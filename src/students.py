@@ -0,0 +1,140 @@
+"""
+Interned student emails and compact rosters.
+
+A ``StudentRegistry`` stores each email once and numbers students from 0 in
+the order they are first seen, so a student in five activities costs one
+string rather than five. Ids are never reused; a registry only grows until
+its store is reloaded.
+
+A ``Roster`` holds student ids rather than emails, in ``array``s: the ids in
+signup order, and the same ids sorted, with each one's place in the signup
+order alongside, for binary-search membership checks. That is 12 bytes per
+enrollment, against a dict entry and an email string before. A removed
+student leaves a tombstone in the signup order, swept out once tombstones
+outnumber students. Emails are only looked up again when a roster is listed.
+
+Membership is O(log n). Adding or removing a student is O(n) in the worst
+case, since the sorted arrays shift to make room, but that is a ``memmove``
+of four bytes per later id. New students get the highest ids and are
+appended without shifting anything.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+
+# Marks a removed student in a roster's signup order
+_TOMBSTONE = 0xFFFFFFFF
+
+
+class StudentRegistry:
+    """Every student email seen, stored once and numbered"""
+
+    def __init__(self):
+        # email -> id, and id -> email
+        self._ids = {}
+        self._emails = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._emails)
+
+    def intern(self, email):
+        """Return the id of ``email``, numbering it if it is new"""
+        student_id = self._ids.get(email)
+        if student_id is None:
+            with self._lock:
+                student_id = self._ids.get(email)
+                if student_id is None:
+                    student_id = len(self._emails)
+                    # Listed before it can be looked up, so email() never misses
+                    self._emails.append(email)
+                    self._ids[email] = student_id
+        return student_id
+
+    def find(self, email):
+        """Return the id of ``email``, or None if it was never interned"""
+        return self._ids.get(email)
+
+    def email(self, student_id):
+        """Return the email of ``student_id``"""
+        return self._emails[student_id]
+
+    def emails(self, student_ids):
+        """Return the emails of ``student_ids`` as a list"""
+        emails = self._emails
+        return [emails[student_id] for student_id in student_ids]
+
+
+class Roster:
+    """Insertion-ordered set of students, stored as ids and read as emails
+
+    Changes must be serialized by the caller (the activity lock); reads may
+    run alongside them.
+    """
+
+    __slots__ = ("students", "_order", "_sorted", "_positions")
+
+    def __init__(self, students, emails=()):
+        self.students = students
+        # Ids in signup order, with tombstones
+        self._order = array("I")
+        # Ids ascending, and each one's index in _order
+        self._sorted = array("I")
+        self._positions = array("I")
+        for email in emails:
+            if email not in self:
+                self.add(email)
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def __contains__(self, email):
+        student_id = self.students.find(email)
+        return student_id is not None and self._find(student_id) is not None
+
+    def __iter__(self):
+        return iter(self.students.emails(self.ids()))
+
+    def ids(self):
+        """Return the student ids in signup order"""
+        # tolist() copies in one step, so a concurrent change is all or nothing
+        order = self._order.tolist()
+        if _TOMBSTONE in order:
+            return [student_id for student_id in order if student_id != _TOMBSTONE]
+        return order
+
+    def _find(self, student_id):
+        index = bisect_left(self._sorted, student_id)
+        if index < len(self._sorted) and self._sorted[index] == student_id:
+            return index
+        return None
+
+    def add(self, email):
+        """Add ``email``, which must not be present, at the end; return its id"""
+        student_id = self.students.intern(email)
+        index = bisect_left(self._sorted, student_id)
+        self._positions.insert(index, len(self._order))
+        self._sorted.insert(index, student_id)
+        self._order.append(student_id)
+        return student_id
+
+    def remove(self, email):
+        """Remove ``email`` and return its id; raise KeyError if not present"""
+        student_id = self.students.find(email)
+        index = None if student_id is None else self._find(student_id)
+        if index is None:
+            raise KeyError(email)
+        self._order[self._positions[index]] = _TOMBSTONE
+        del self._sorted[index]
+        del self._positions[index]
+        tombstones = len(self._order) - len(self._sorted)
+        if tombstones > 32 and tombstones > len(self._sorted):
+            self._sweep()
+        return student_id
+
+    def _sweep(self):
+        order = array("I", self.ids())
+        for position, student_id in enumerate(order):
+            self._positions[self._find(student_id)] = position
+        self._order = order
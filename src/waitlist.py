@@ -0,0 +1,78 @@
+"""
+FIFO waitlist for full activities.
+
+Every student joining the waitlist gets the next ticket number. The queue is a
+deque of ``(ticket, email)`` plus a dict from email to ticket, so joining,
+promoting the head and checking membership are O(1). A student's position is
+their ticket minus the head's ticket, corrected for students ahead of them
+who left early; those are kept in a sorted list that is usually empty, so
+position lookups are O(1) in practice and O(log k) with k early leavers.
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+
+
+class Waitlist:
+    """Insertion-ordered queue of emails with constant-time positions"""
+
+    __slots__ = ("_queue", "_tickets", "_left", "_next_ticket")
+
+    def __init__(self, emails=()):
+        self._queue = deque()
+        self._tickets = {}
+        # Tickets of students who left while not at the head, ascending
+        self._left = []
+        self._next_ticket = 0
+        for email in emails:
+            self.push(email)
+
+    def __len__(self):
+        return len(self._tickets)
+
+    def __contains__(self, email):
+        return email in self._tickets
+
+    def __iter__(self):
+        return (email for ticket, email in self._queue if self._tickets.get(email) == ticket)
+
+    def push(self, email):
+        """Add ``email`` at the back and return its 1-based position"""
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._tickets[email] = ticket
+        self._queue.append((ticket, email))
+        return len(self._tickets)
+
+    def pop(self):
+        """Remove and return the email at the front, or None if empty"""
+        self._skip_departed()
+        if not self._queue:
+            return None
+        ticket, email = self._queue.popleft()
+        del self._tickets[email]
+        return email
+
+    def remove(self, email):
+        """Take ``email`` out of the queue wherever it is"""
+        ticket = self._tickets.pop(email)
+        # The deque entry is skipped lazily once it reaches the front
+        insort(self._left, ticket)
+        self._skip_departed()
+
+    def position(self, email):
+        """Return the 1-based position of ``email``, or None if not waiting"""
+        ticket = self._tickets.get(email)
+        if ticket is None:
+            return None
+        head = self._queue[0][0]
+        departed_ahead = bisect_left(self._left, ticket)
+        return ticket - head - departed_ahead + 1
+
+    def _skip_departed(self):
+        queue = self._queue
+        while queue and self._tickets.get(queue[0][1]) != queue[0][0]:
+            ticket = queue.popleft()[0]
+            # Its ticket is now behind the head and no longer counts
+            if self._left and self._left[0] == ticket:
+                del self._left[0]
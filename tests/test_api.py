@@ -18,7 +18,7 @@ class TestRootEndpoint:
 class TestActivitiesEndpoint:
     """Test cases for the activities endpoints"""
     
-    def test_get_activities_success(self, client: TestClient, reset_activities):
+    def test_get_activities_success(self, client: TestClient):
         """Test successful retrieval of activities"""
         response = client.get("/activities")
         assert response.status_code == 200
@@ -40,10 +40,130 @@ class TestActivitiesEndpoint:
         assert isinstance(chess_club["participants"], list)
 
 
+class TestActivitiesCaching:
+    """Test cases for conditional GET on the activities endpoint"""
+    
+    def test_etag_returned(self, client: TestClient):
+        """Test that the activities response carries an ETag"""
+        response = client.get("/activities")
+        assert response.status_code == 200
+        assert response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+    
+    def test_not_modified(self, client: TestClient):
+        """Test that a matching If-None-Match returns 304 with no body"""
+        etag = client.get("/activities").headers["etag"]
+        
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        
+        response = client.get("/activities", headers={"If-None-Match": f'"other", W/{etag}'})
+        assert response.status_code == 304
+    
+    def test_etag_changes_after_signup(self, client: TestClient):
+        """Test that a mutation invalidates the cached response"""
+        etag = client.get("/activities").headers["etag"]
+        client.post("/activities/Chess Club/signup", data={"email": "etag@mergington.edu"})
+        
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert "etag@mergington.edu" in response.json()["Chess Club"]["participants"]
+
+
+class TestActivitiesListing:
+    """Test cases for paging, filtering and projecting the activities list"""
+    
+    def test_pages_cover_every_activity(self, client: TestClient):
+        """Test that following next_cursor visits every activity once"""
+        names = []
+        url = "/activities?limit=4&fields=name"
+        while url:
+            data = client.get(url).json()
+            assert len(data["activities"]) <= 4
+            names.extend(item["name"] for item in data["activities"])
+            cursor = data["next_cursor"]
+            url = f"/activities?limit=4&fields=name&cursor={cursor}" if cursor else None
+        
+        assert names == list(client.get("/activities").json())
+    
+    def test_field_projection(self, client: TestClient):
+        """Test that only the requested fields are returned"""
+        response = client.get("/activities?fields=name,spots_remaining&limit=1")
+        assert response.status_code == 200
+        assert response.json()["activities"] == [{"name": "Chess Club", "spots_remaining": 10}]
+    
+    def test_filter_by_day(self, client: TestClient):
+        """Test filtering activities by the day they meet"""
+        data = client.get("/activities?day=Friday&fields=name").json()
+        assert [item["name"] for item in data["activities"]] == [
+            "Chess Club", "Gym Class", "Science Olympiad"
+        ]
+        assert data["next_cursor"] is None
+    
+    def test_filter_by_spots(self, client: TestClient):
+        """Test filtering activities by remaining capacity"""
+        data = client.get("/activities?min_spots=20&fields=name,spots_remaining").json()
+        assert data["activities"] == [
+            {"name": "Gym Class", "spots_remaining": 28},
+            {"name": "Track and Field", "spots_remaining": 23},
+        ]
+    
+    def test_default_fields(self, client: TestClient):
+        """Test that paging without a projection returns the usual fields"""
+        item = client.get("/activities?limit=1").json()["activities"][0]
+        assert set(item) == {"name", "description", "schedule", "max_participants", "participants"}
+    
+    def test_invalid_parameters(self, client: TestClient):
+        """Test that bad listing parameters are rejected"""
+        assert client.get("/activities?fields=name,secret").status_code == 400
+        assert client.get("/activities?day=Someday").status_code == 400
+        assert client.get("/activities?cursor=bm9wZQ==").status_code == 400
+        assert client.get("/activities?limit=0").status_code == 422
+
+
+class TestChangesEndpoint:
+    """Test cases for the activity changes feed"""
+    
+    def test_changes_since_version(self, client: TestClient):
+        """Test that the feed returns the changes after a version"""
+        response = client.get("/activities")
+        version = int(response.headers["x-activities-version"])
+        epoch = response.headers["x-activities-epoch"]
+        
+        client.post("/activities/Chess Club/signup", data={"email": "feed@mergington.edu"})
+        client.delete("/activities/Chess Club/unregister?email=michael@mergington.edu")
+        
+        response = client.get(f"/activities/changes?since={version}")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["epoch"] == epoch
+        assert data["resync"] is False
+        assert data["version"] == version + 2
+        assert [(c["op"], c["activity"], c["email"]) for c in data["changes"]] == [
+            ("signup", "Chess Club", "feed@mergington.edu"),
+            ("unregister", "Chess Club", "michael@mergington.edu"),
+        ]
+    
+    def test_changes_resync(self, client: TestClient):
+        """Test that an unknown version asks the client to resync"""
+        response = client.get("/activities/changes?since=-1")
+        assert response.status_code == 200
+        assert response.json()["resync"] is True
+    
+    def test_changes_missing_since(self, client: TestClient):
+        """Test that the since parameter is required"""
+        response = client.get("/activities/changes")
+        assert response.status_code == 422
+
+
 class TestSignupEndpoint:
     """Test cases for the signup endpoint"""
     
-    def test_signup_success(self, client: TestClient, reset_activities):
+    def test_signup_success(self, client: TestClient):
         """Test successful signup for an activity"""
         response = client.post(
             "/activities/Chess Club/signup",
@@ -61,7 +181,7 @@ class TestSignupEndpoint:
         activities_data = activities_response.json()
         assert "newstudent@mergington.edu" in activities_data["Chess Club"]["participants"]
     
-    def test_signup_activity_not_found(self, client: TestClient, reset_activities):
+    def test_signup_activity_not_found(self, client: TestClient):
         """Test signup for non-existent activity"""
         response = client.post(
             "/activities/NonExistent Activity/signup",
@@ -72,7 +192,7 @@ class TestSignupEndpoint:
         data = response.json()
         assert data["detail"] == "Activity not found"
     
-    def test_signup_already_registered(self, client: TestClient, reset_activities):
+    def test_signup_already_registered(self, client: TestClient):
         """Test signup when student is already registered"""
         response = client.post(
             "/activities/Chess Club/signup",
@@ -83,12 +203,12 @@ class TestSignupEndpoint:
         data = response.json()
         assert data["detail"] == "Student already signed up for this activity"
     
-    def test_signup_missing_email(self, client: TestClient, reset_activities):
+    def test_signup_missing_email(self, client: TestClient):
         """Test signup without email parameter"""
         response = client.post("/activities/Chess Club/signup")
         assert response.status_code == 422  # Unprocessable Entity
     
-    def test_signup_empty_email(self, client: TestClient, reset_activities):
+    def test_signup_empty_email(self, client: TestClient):
         """Test signup with empty email"""
         response = client.post(
             "/activities/Chess Club/signup",
@@ -96,7 +216,7 @@ class TestSignupEndpoint:
         )
         assert response.status_code == 200  # API currently accepts empty emails
     
-    def test_signup_multiple_students(self, client: TestClient, reset_activities):
+    def test_signup_multiple_students(self, client: TestClient):
         """Test signing up multiple students for the same activity"""
         emails = ["student1@mergington.edu", "student2@mergington.edu", "student3@mergington.edu"]
         
@@ -116,10 +236,75 @@ class TestSignupEndpoint:
             assert email in participants
 
 
+class TestStudentActivities:
+    """Test cases for the per-student activities endpoint"""
+    
+    def test_student_activities(self, client: TestClient):
+        """Test that the endpoint follows signups and unregisters"""
+        email = "sophia@mergington.edu"
+        response = client.get(f"/students/{email}/activities")
+        assert response.status_code == 200
+        assert response.json() == {
+            "email": email,
+            "activities": ["Programming Class", "Debate Team"],
+        }
+        
+        client.post("/activities/Art Studio/signup", data={"email": email})
+        client.delete(f"/activities/Programming Class/unregister?email={email}")
+        
+        response = client.get(f"/students/{email}/activities")
+        assert response.json()["activities"] == ["Debate Team", "Art Studio"]
+    
+    def test_unknown_student(self, client: TestClient):
+        """Test a student who is in no activities"""
+        response = client.get("/students/nobody@mergington.edu/activities")
+        assert response.status_code == 200
+        assert response.json()["activities"] == []
+
+
+class TestScheduleConflicts:
+    """Test cases for schedule conflict detection"""
+    
+    def test_student_conflicts(self, client: TestClient):
+        """Test listing a student's overlapping activities"""
+        email = "busy@mergington.edu"
+        for activity in ["Programming Class", "Chess Club", "Track and Field"]:
+            client.post(f"/activities/{activity}/signup", data={"email": email})
+        
+        response = client.get(f"/students/{email}/conflicts")
+        assert response.status_code == 200
+        assert response.json() == {
+            "email": email,
+            "conflicts": [
+                {"activities": ["Programming Class", "Track and Field"],
+                 "days": ["tuesday", "thursday"]}
+            ],
+        }
+    
+    def test_no_conflicts(self, client: TestClient):
+        """Test a student without overlapping activities"""
+        response = client.get("/students/michael@mergington.edu/conflicts")
+        assert response.json()["conflicts"] == []
+    
+    def test_signup_rejects_conflict_when_asked(self, client: TestClient):
+        """Test the optional signup-time conflict check"""
+        email = "michael@mergington.edu"  # In Chess Club, Fridays 3:30 - 5:00
+        response = client.post(
+            "/activities/Science Olympiad/signup?check_conflicts=true",
+            data={"email": email}
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Schedule conflicts with Chess Club"
+        
+        # Without the flag the signup goes through
+        response = client.post("/activities/Science Olympiad/signup", data={"email": email})
+        assert response.status_code == 200
+
+
 class TestUnregisterEndpoint:
     """Test cases for the unregister endpoint"""
     
-    def test_unregister_success(self, client: TestClient, reset_activities):
+    def test_unregister_success(self, client: TestClient):
         """Test successful unregistration from an activity"""
         response = client.delete(
             "/activities/Chess Club/unregister?email=michael@mergington.edu"
@@ -136,7 +321,7 @@ class TestUnregisterEndpoint:
         activities_data = activities_response.json()
         assert "michael@mergington.edu" not in activities_data["Chess Club"]["participants"]
     
-    def test_unregister_activity_not_found(self, client: TestClient, reset_activities):
+    def test_unregister_activity_not_found(self, client: TestClient):
         """Test unregister from non-existent activity"""
         response = client.delete(
             "/activities/NonExistent Activity/unregister?email=student@mergington.edu"
@@ -146,7 +331,7 @@ class TestUnregisterEndpoint:
         data = response.json()
         assert data["detail"] == "Activity not found"
     
-    def test_unregister_student_not_registered(self, client: TestClient, reset_activities):
+    def test_unregister_student_not_registered(self, client: TestClient):
         """Test unregister when student is not registered"""
         response = client.delete(
             "/activities/Chess Club/unregister?email=notregistered@mergington.edu"
@@ -156,17 +341,17 @@ class TestUnregisterEndpoint:
         data = response.json()
         assert data["detail"] == "Student is not registered for this activity"
     
-    def test_unregister_missing_email(self, client: TestClient, reset_activities):
+    def test_unregister_missing_email(self, client: TestClient):
         """Test unregister without email parameter"""
         response = client.delete("/activities/Chess Club/unregister")
         assert response.status_code == 422  # Missing required query parameter
     
-    def test_unregister_empty_email(self, client: TestClient, reset_activities):
+    def test_unregister_empty_email(self, client: TestClient):
         """Test unregister with empty email parameter"""
         response = client.delete("/activities/Chess Club/unregister?email=")
         assert response.status_code == 400  # API returns 400 for empty email (student not registered)
     
-    def test_signup_then_unregister(self, client: TestClient, reset_activities):
+    def test_signup_then_unregister(self, client: TestClient):
         """Test complete workflow: signup then unregister"""
         email = "workflow@mergington.edu"
         activity = "Chess Club"
@@ -198,7 +383,7 @@ class TestUnregisterEndpoint:
 class TestActivityConstraints:
     """Test cases for activity constraints and edge cases"""
     
-    def test_activity_capacity_limits(self, client: TestClient, reset_activities):
+    def test_activity_capacity_limits(self, client: TestClient):
         """Test that activities respect their maximum participant limits"""
         # Get current participant count for Chess Club
         activities_response = client.get("/activities")
@@ -216,16 +401,18 @@ class TestActivityConstraints:
             )
             assert response.status_code == 200
         
-        # Try to add one more (should still work as the API doesn't enforce limits)
-        # Note: The current implementation doesn't enforce max_participants
-        # This test documents the current behavior
+        # One more goes onto the waitlist instead of the roster
         response = client.post(
             "/activities/Chess Club/signup",
             data={"email": "overflow@mergington.edu"}
         )
-        assert response.status_code == 200  # Current behavior allows overflow
+        assert response.status_code == 200
+        assert response.json()["waitlisted"] is True
+        assert response.json()["position"] == 1
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert "overflow@mergington.edu" not in participants
     
-    def test_special_characters_in_emails(self, client: TestClient, reset_activities):
+    def test_special_characters_in_emails(self, client: TestClient):
         """Test handling of special characters in email addresses"""
         special_email = "test+special.email@mergington.edu"
         
@@ -240,7 +427,7 @@ class TestActivityConstraints:
         activities_data = activities_response.json()
         assert special_email in activities_data["Chess Club"]["participants"]
     
-    def test_url_encoded_activity_names(self, client: TestClient, reset_activities):
+    def test_url_encoded_activity_names(self, client: TestClient):
         """Test handling of URL-encoded activity names"""
         # Test with space in activity name (should be URL encoded as %20)
         response = client.post(
@@ -0,0 +1,81 @@
+"""
+Test cases for fingerprinted, precompressed static assets
+"""
+import gzip
+import re
+
+from fastapi.testclient import TestClient
+
+from assets import IMMUTABLE, fingerprint, load_assets
+
+
+def hashed_names(client):
+    html = client.get("/static/index.html").text
+    return re.findall(r'(?:href|src)="([^"]+)"', html)
+
+
+class TestStaticAssets:
+    """Test cases for serving static files"""
+
+    def test_index_references_hashed_names(self, client: TestClient):
+        """Test that index.html points at fingerprinted assets"""
+        names = hashed_names(client)
+        assert re.fullmatch(r"styles\.[0-9a-f]{10}\.css", names[0])
+        assert re.fullmatch(r"app\.[0-9a-f]{10}\.js", names[1])
+
+    def test_hashed_assets_are_immutable(self, client: TestClient):
+        """Test that hashed assets may be cached forever"""
+        for name in hashed_names(client):
+            response = client.get(f"/static/{name}")
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == IMMUTABLE
+
+    def test_index_is_revalidated(self, client: TestClient):
+        """Test that the page itself is revalidated with its ETag"""
+        response = client.get("/static/index.html")
+        assert response.headers["cache-control"] == "no-cache"
+        cached = client.get("/static/index.html",
+                            headers={"If-None-Match": response.headers["etag"]})
+        assert cached.status_code == 304
+
+    def test_gzip_negotiation(self, client: TestClient):
+        """Test that gzip is served only to clients that accept it"""
+        name = hashed_names(client)[1]
+        plain = client.get(f"/static/{name}", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["vary"] == "Accept-Encoding"
+
+        compressed = client.get(f"/static/{name}", headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["etag"] != plain.headers["etag"]
+        # The test client decodes the body transparently
+        assert compressed.content == plain.content
+
+    def test_refused_encoding(self, client: TestClient):
+        """Test that q=0 turns an encoding off"""
+        name = hashed_names(client)[1]
+        response = client.get(f"/static/{name}", headers={"Accept-Encoding": "gzip;q=0"})
+        assert "content-encoding" not in response.headers
+
+    def test_unknown_asset(self, client: TestClient):
+        """Test that unknown paths are a 404"""
+        assert client.get("/static/missing.js").status_code == 404
+        assert client.get("/static/../app.py").status_code == 404
+
+
+class TestLoadAssets:
+    """Test cases for load_assets"""
+
+    def test_rewrites_and_compresses(self, tmp_path):
+        """Test that pages are rewritten and large assets get a gzip variant"""
+        script = b"console.log('hello');\n" * 50
+        (tmp_path / "app.js").write_bytes(script)
+        (tmp_path / "index.html").write_text('<script src="app.js"></script>'
+                                             '<a href="https://example.com/">x</a>')
+        assets = load_assets(tmp_path)
+
+        hashed = fingerprint("app.js", script)
+        assert assets["index.html"].body.decode() == (
+            f'<script src="{hashed}"></script><a href="https://example.com/">x</a>')
+        assert gzip.decompress(assets[hashed].encoded["gzip"]) == script
+        assert assets["app.js"].cache_control == "no-cache"
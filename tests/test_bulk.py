@@ -0,0 +1,131 @@
+"""
+Test cases for the bulk signup and unregister endpoint
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from app import create_app
+from bulk import CHUNK_ROWS
+
+
+class TestBulkEndpoint:
+    """Test cases for POST /activities/bulk"""
+
+    def test_csv_signup(self, client: TestClient):
+        """Test a CSV import with a header row and mixed outcomes"""
+        body = (
+            "activity,email\n"
+            "Chess Club,new1@mergington.edu\n"
+            "Art Studio,new1@mergington.edu\n"
+            "Chess Club,michael@mergington.edu\n"
+            "Nope,new2@mergington.edu\n"
+            "\"Chess Club\",new2@mergington.edu\n"
+            "just one column\n"
+        )
+        response = client.post("/activities/bulk", content=body,
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["processed"] == 6
+        assert data["succeeded"] == 3
+        assert data["failed"] == 3
+        assert [r["status"] for r in data["results"]] == ["ok", "ok", "error", "error", "ok", "error"]
+        assert data["results"][2]["detail"] == "Student already signed up for this activity"
+        assert data["results"][3]["detail"] == "Activity not found"
+
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert participants[-2:] == ["new1@mergington.edu", "new2@mergington.edu"]
+
+    def test_ndjson_unregister(self, client: TestClient):
+        """Test a newline-delimited JSON unregister"""
+        rows = [
+            {"activity": "Chess Club", "email": "michael@mergington.edu"},
+            {"activity": "Chess Club", "email": "nobody@mergington.edu"},
+            {"email": "missing-activity@mergington.edu"},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows)
+        response = client.post("/activities/bulk?action=unregister", content=body,
+                               headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+
+        results = response.json()["results"]
+        assert results[0]["status"] == "ok"
+        assert results[1]["detail"] == "Student is not registered for this activity"
+        assert results[2]["status"] == "error"
+
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert "michael@mergington.edu" not in participants
+
+    def test_capacity_applies_to_bulk(self, client: TestClient):
+        """Test that a bulk import past max_participants fills the waitlist"""
+        body = "".join(f"Chess Club,bulk{i}@mergington.edu\n" for i in range(20))
+        response = client.post("/activities/bulk", content=body,
+                               headers={"Content-Type": "text/csv"})
+        data = response.json()
+        # Chess Club holds 12 and starts with 2
+        assert data["succeeded"] == 10
+        assert data["waitlisted"] == 10
+        assert data["failed"] == 0
+        assert [r["position"] for r in data["results"][10:]] == list(range(1, 11))
+
+    def test_bulk_unregister_promotes(self, client: TestClient):
+        """Test that bulk unregisters promote students off the waitlist"""
+        body = "".join(f"Chess Club,bulk{i}@mergington.edu\n" for i in range(11))
+        client.post("/activities/bulk", content=body, headers={"Content-Type": "text/csv"})
+        response = client.post("/activities/bulk?action=unregister",
+                               content="Chess Club,bulk0@mergington.edu\n",
+                               headers={"Content-Type": "text/csv"})
+        assert response.json()["results"][0]["promoted"] == "bulk10@mergington.edu"
+
+    def test_invalid_utf8_row(self, client: TestClient):
+        """Test that a row that is not UTF-8 is reported as malformed"""
+        body = b"Chess Club,\xff\xfe@x\nChess Club,valid@mergington.edu\n"
+        response = client.post("/activities/bulk", content=body,
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["detail"] == "Row must have an activity and an email"
+        assert results[1]["status"] == "ok"
+
+    def test_rows_applied_in_chunks(self, client: TestClient):
+        """Test that rows past the first chunk keep their numbering and order"""
+        body = "".join(f"Gym Class,bulk{i}@mergington.edu\n" for i in range(CHUNK_ROWS + 5))
+        response = client.post("/activities/bulk", content=body,
+                               headers={"Content-Type": "text/csv"})
+        results = response.json()["results"]
+        assert [r["row"] for r in results] == list(range(CHUNK_ROWS + 5))
+        assert results[-1]["email"] == f"bulk{CHUNK_ROWS + 4}@mergington.edu"
+        # Gym Class holds 30 and starts with 2
+        assert results[-1]["position"] == CHUNK_ROWS + 5 - 28
+
+    def test_invalid_action(self, client: TestClient):
+        """Test that an unknown action is rejected"""
+        response = client.post("/activities/bulk?action=delete", content="",
+                               headers={"Content-Type": "text/csv"})
+        assert response.status_code == 400
+
+
+class TestSharedBulk:
+    """Test cases for bulk imports against the store shared between workers"""
+
+    def test_capacity_applies_to_bulk(self, tmp_path):
+        """Test that enrolled rows are ok and only rows past capacity are waitlisted"""
+        config = {"main": {"name": "Main", "activities": {
+            "Chess Club": {
+                "description": "Chess",
+                "schedule": "Fridays, 3:30 PM - 5:00 PM",
+                "max_participants": 2,
+                "participants": [],
+            },
+        }}}
+        environ = {"MERGINGTON_SHARED_DB": str(tmp_path / "activities.db")}
+        body = "".join(f"Chess Club,bulk{i}@mergington.edu\n" for i in range(3))
+        with TestClient(create_app(config, environ=environ)) as client:
+            response = client.post("/activities/bulk", content=body,
+                                   headers={"Content-Type": "text/csv"})
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["ok", "ok", "waitlisted"]
+        assert "position" not in results[0]
+        assert results[2]["position"] == 1
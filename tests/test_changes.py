@@ -0,0 +1,48 @@
+"""
+Test cases for the change feed
+"""
+from changes import ChangeFeed
+
+
+class TestChangeFeed:
+    """Test cases for ChangeFeed"""
+
+    def test_returns_changes_after_version(self, make_store):
+        """Test that only changes newer than the given version are returned"""
+        store = make_store(50)
+        feed = ChangeFeed(store)
+        start = store.version
+        store.signup("Chess Club", "a@mergington.edu")
+        store.signup("Chess Club", "b@mergington.edu")
+        store.unregister("Chess Club", "a@mergington.edu")
+
+        events = feed.since(start + 1)
+        assert [(e["op"], e["email"]) for e in events] == [
+            ("signup", "b@mergington.edu"),
+            ("unregister", "a@mergington.edu"),
+        ]
+        assert events[-1]["version"] == store.version
+        assert feed.since(store.version) == []
+
+    def test_evicted_versions_need_resync(self, make_store):
+        """Test that asking for evicted changes returns None"""
+        store = make_store(50)
+        feed = ChangeFeed(store, capacity=3)
+        start = store.version
+        for i in range(5):
+            store.signup("Chess Club", f"s{i}@mergington.edu")
+
+        assert feed.since(start) is None
+        assert len(feed.since(store.version - 3)) == 3
+
+    def test_reset_and_unknown_versions_need_resync(self, make_store):
+        """Test that a wholesale reload or a future version forces a resync"""
+        store = make_store(50)
+        feed = ChangeFeed(store)
+        start = store.version
+        store.signup("Chess Club", "a@mergington.edu")
+        assert feed.since(store.version + 10) is None
+
+        store.clear()
+        assert feed.since(start) is None
+        assert feed.since(store.version) == []
@@ -0,0 +1,175 @@
+"""
+Stress tests for concurrent signups and unregisters
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from store import (AlreadySignedUpError, AlreadyWaitlistedError, NotSignedUpError,
+                   ScheduleConflictError)
+
+
+CAPACITY = 200
+
+
+QUIET = {
+    "Quiet Activity": {
+        "description": "Nobody is looking",
+        "schedule": "Mondays, 3:30 PM - 5:00 PM",
+        "max_participants": 10,
+        "participants": []
+    },
+}
+
+
+class TestConcurrentSignup:
+    """Hammer one activity from many threads and check the final roster"""
+
+    def test_capacity_is_never_exceeded(self, make_store):
+        """Test that racing signups fill the activity exactly once"""
+        store = make_store(CAPACITY, name="Hot Activity", others=QUIET)
+        # Every email is submitted three times to race duplicate checks too
+        emails = [f"student{i}@mergington.edu" for i in range(CAPACITY * 2)] * 3
+        start = threading.Barrier(32)
+        outcomes = {"ok": 0, "duplicate": 0, "waitlisted": 0}
+        outcomes_lock = threading.Lock()
+
+        def worker(chunk):
+            start.wait()
+            for email in chunk:
+                try:
+                    position = store.signup("Hot Activity", email)
+                    result = "ok" if position is None else "waitlisted"
+                except (AlreadySignedUpError, AlreadyWaitlistedError):
+                    result = "duplicate"
+                with outcomes_lock:
+                    outcomes[result] += 1
+
+        chunks = [emails[i::32] for i in range(32)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(worker, chunks))
+
+        activity = store.get("Hot Activity")
+        roster = list(activity.participants)
+        assert outcomes["ok"] == CAPACITY
+        assert outcomes["waitlisted"] == CAPACITY
+        assert len(roster) == CAPACITY
+        assert len(set(roster)) == CAPACITY
+        assert len(activity.waitlist) == CAPACITY
+        assert not set(activity.waitlist) & set(roster)
+        assert sum(outcomes.values()) == len(emails)
+        for email in roster:
+            assert store.activities_for(email) == ["Hot Activity"]
+
+    def test_signup_and_unregister_race(self, make_store):
+        """Test that interleaved signups and unregisters keep the index consistent"""
+        store = make_store(CAPACITY, name="Hot Activity", others=QUIET)
+        emails = [f"student{i}@mergington.edu" for i in range(50)]
+        start = threading.Barrier(16)
+
+        def worker(seed):
+            start.wait()
+            for round_ in range(200):
+                email = emails[(seed * 7 + round_) % len(emails)]
+                try:
+                    if (seed + round_) % 2:
+                        store.signup("Hot Activity", email)
+                    else:
+                        store.unregister("Hot Activity", email)
+                except (AlreadySignedUpError, AlreadyWaitlistedError, NotSignedUpError):
+                    pass
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(worker, range(16)))
+
+        roster = store.get("Hot Activity").participants
+        assert len(roster) <= CAPACITY
+        for email in emails:
+            expected = ["Hot Activity"] if email in roster else []
+            assert store.activities_for(email) == expected
+
+    def test_unrelated_activity_is_not_blocked(self, make_store):
+        """Test that a held activity lock does not block other activities"""
+        store = make_store(CAPACITY, name="Hot Activity", others=QUIET)
+        with store.get("Hot Activity").lock:
+            store.signup("Quiet Activity", "free@mergington.edu")
+        assert "free@mergington.edu" in store.get("Quiet Activity").participants
+
+    def test_conflict_checks_race(self, make_store):
+        """Test that racing checked signups into overlapping activities let one through"""
+        store = make_store(10, name="First", others={"Second": {
+            "description": "Second",
+            "schedule": "Fridays, 4:00 PM - 5:00 PM",
+            "max_participants": 10,
+            "participants": []
+        }})
+        activities_for = store.activities_for
+
+        def slow_activities_for(email):
+            # Widen the gap between the check and the signup
+            found = activities_for(email)
+            time.sleep(0.05)
+            return found
+        store.activities_for = slow_activities_for
+
+        def sign_up(name):
+            try:
+                store.signup(name, "both@mergington.edu", check_conflicts=True)
+                return True
+            except ScheduleConflictError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(sign_up, ["First", "Second"]))
+        assert sorted(results) == [False, True]
+        assert store.conflicts_for("both@mergington.edu") == []
+
+
+class TestEventLoopResponsiveness:
+    """Check that async changes never block the event loop on a held lock"""
+
+    def test_loop_runs_while_bulk_import_holds_lock(self, make_store):
+        """Test that a signup waiting behind a bulk import lets the loop run"""
+        store = make_store(CAPACITY, name="Hot Activity", others=QUIET)
+        emails = [f"bulk{i}@mergington.edu" for i in range(20000)]
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            ticks = 0
+            longest = 0.0
+            done = False
+
+            async def ticker():
+                nonlocal ticks, longest
+                last = time.perf_counter()
+                while not done:
+                    await asyncio.sleep(0.001)
+                    now = time.perf_counter()
+                    longest = max(longest, now - last)
+                    last = now
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            bulk = loop.run_in_executor(None, store.signup_many, "Hot Activity", emails)
+            # Holding the lock here stands in for one batch of the import
+            lock = store.get("Hot Activity").lock
+            await loop.run_in_executor(None, lock.acquire)
+            signup = asyncio.create_task(store.signup_async("Hot Activity", "late@mergington.edu"))
+            before = ticks
+            await asyncio.sleep(0.2)
+            ticks_while_held = ticks - before
+            lock.release()
+            await signup
+            await bulk
+            done = True
+            await task
+            return ticks_while_held, longest
+
+        ticks, longest = asyncio.run(main())
+        assert ticks > 10
+        assert longest < 1.0
+        activity = store.get("Hot Activity")
+        assert len(activity.participants) + len(activity.waitlist) == 20001
+        assert ("late@mergington.edu" in activity.participants
+                or "late@mergington.edu" in activity.waitlist)
@@ -0,0 +1,268 @@
+"""
+Test cases for roster history and point-in-time queries
+"""
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from history import History, decode_log
+
+PARTICIPANTS = ["michael@mergington.edu"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def recorded(tmp_path, clock, make_store):
+    store = make_store(participants=PARTICIPANTS)
+    history = History(store, tmp_path, checkpoint_every=3, clock=clock)
+    history.open()
+    yield store, history
+    history.close()
+
+
+def roster(history, when):
+    return history.as_of(when)["Chess Club"]["participants"]
+
+
+class TestHistory:
+    """Test cases for History"""
+
+    def test_as_of_between_changes(self, recorded, clock):
+        """Test that each point in time sees the rosters of that moment"""
+        store, history = recorded
+        for i in range(7):
+            clock.now += 10
+            store.signup("Chess Club", f"s{i}@mergington.edu")
+        clock.now += 10
+        store.unregister("Chess Club", "s0@mergington.edu")
+
+        assert roster(history, 1000) == ["michael@mergington.edu"]
+        assert roster(history, 1025) == ["michael@mergington.edu", "s0@mergington.edu",
+                                         "s1@mergington.edu"]
+        assert len(roster(history, 1070)) == 8
+        assert "s0@mergington.edu" not in roster(history, 1080)
+        assert history.as_of(999) is None
+
+    def test_replay_is_bounded_by_checkpoints(self, recorded, clock):
+        """Test that segments never hold more than checkpoint_every changes"""
+        store, history = recorded
+        for i in range(10):
+            clock.now += 1
+            store.signup("Chess Club", f"s{i}@mergington.edu")
+        history.as_of(clock.now)
+        checkpoints = sorted(history.directory.glob("*.ckpt"))
+        assert len(checkpoints) == 4
+        for log in history.directory.glob("*.log"):
+            assert len(list(decode_log(log.read_bytes(), 0))) <= 3
+
+    def test_reset_starts_a_checkpoint(self, recorded, clock):
+        """Test that replacing activities is captured in history"""
+        store, history = recorded
+        clock.now += 10
+        store.clear()
+        assert history.as_of(clock.now) == {}
+        assert roster(history, clock.now - 5) == ["michael@mergington.edu"]
+
+    def test_log_is_compact(self, recorded, clock):
+        """Test that repeated strings are written once per segment"""
+        store, history = recorded
+        clock.now += 1
+        store.signup("Chess Club", "emma@mergington.edu")
+        store.unregister("Chess Club", "emma@mergington.edu")
+        history.as_of(clock.now)
+        log = max(history.directory.glob("*.log"))
+        # The second record refers back to both strings
+        assert log.read_bytes().endswith(bytes([0, 1, 1, 2]))
+
+    def test_truncated_record_is_ignored(self, recorded, clock):
+        """Test that a record cut short by a crash ends the segment"""
+        store, history = recorded
+        clock.now += 1
+        store.signup("Chess Club", "emma@mergington.edu")
+        history.as_of(clock.now)
+        data = max(history.directory.glob("*.log")).read_bytes()
+        assert list(decode_log(data[:-3], 0)) == []
+
+    def test_reopen_continues_history(self, tmp_path, clock, make_store):
+        """Test that a restarted server keeps earlier history"""
+        store = make_store(participants=PARTICIPANTS)
+        history = History(store, tmp_path, clock=clock)
+        history.open()
+        clock.now += 10
+        store.signup("Chess Club", "emma@mergington.edu")
+        history.close()
+
+        clock.now += 10
+        reopened = History(make_store(participants=PARTICIPANTS), tmp_path, clock=clock)
+        reopened.open()
+        try:
+            assert "emma@mergington.edu" in roster(reopened, 1015)
+            assert "emma@mergington.edu" not in roster(reopened, clock.now)
+        finally:
+            reopened.close()
+
+    def test_workers_write_separate_directories(self, tmp_path, clock, make_store):
+        """Test that processes sharing a directory never share files"""
+        first_store = make_store(participants=PARTICIPANTS)
+        second_store = make_store(participants=PARTICIPANTS)
+        first = History(first_store, tmp_path, checkpoint_every=2, clock=clock)
+        second = History(second_store, tmp_path, checkpoint_every=2, clock=clock)
+        first.open()
+        second.open()
+        try:
+            # Both workers see every change, as with the shared store
+            for i in range(5):
+                clock.now += 10
+                for store in (first_store, second_store):
+                    store.signup("Chess Club", f"s{i}@mergington.edu")
+            # The writer threads create the logs
+            first._queue.join()
+            second._queue.join()
+            assert first.directory != second.directory
+            assert {path.parent for path in tmp_path.glob("*/*.log")} == {
+                first.directory, second.directory}
+            assert roster(first, 1025) == roster(second, 1025) == [
+                "michael@mergington.edu", "s0@mergington.edu", "s1@mergington.edu"]
+        finally:
+            first.close()
+            second.close()
+
+    def test_exited_worker_history_is_used_while_it_covers(self, tmp_path, clock, make_store):
+        """Test that an exited worker's last segment only answers up to its last change"""
+        gone_store = make_store(participants=PARTICIPANTS)
+        live_store = make_store(participants=PARTICIPANTS)
+        gone = History(gone_store, tmp_path, clock=clock)
+        gone.open()
+        clock.now += 10
+        gone_store.signup("Chess Club", "early@mergington.edu")
+        gone.close()
+
+        clock.now += 10
+        live_store.signup("Chess Club", "early@mergington.edu")
+        live = History(live_store, tmp_path, clock=clock)
+        live.open()
+        try:
+            clock.now += 10
+            live_store.signup("Chess Club", "late@mergington.edu")
+            assert roster(live, 1015) == ["michael@mergington.edu", "early@mergington.edu"]
+            assert "late@mergington.edu" in roster(live, clock.now)
+        finally:
+            live.close()
+
+    def test_retention_prunes_old_segments(self, tmp_path, clock, make_store):
+        """Test that segments older than the retention period are deleted"""
+        store = make_store(participants=PARTICIPANTS)
+        history = History(store, tmp_path, checkpoint_every=2, retention=30, clock=clock)
+        history.open()
+        try:
+            for i in range(12):
+                clock.now += 10
+                store.signup("Chess Club", f"s{i}@mergington.edu")
+            history.as_of(clock.now)
+            starts = [start for _, start, _ in history._checkpoints(history.directory)]
+            # Every segment kept ends within the last 30 seconds
+            assert len(starts) < 7
+            assert starts[1] >= (clock.now - 30) * 1000
+            assert history.as_of(clock.now - 60) is None
+            assert len(roster(history, clock.now - 25)) == 10
+        finally:
+            history.close()
+
+    def test_retention_removes_exited_workers(self, tmp_path, clock, make_store):
+        """Test that an exited worker's history goes once it is past retention"""
+        gone_store = make_store(participants=PARTICIPANTS)
+        live_store = make_store(participants=PARTICIPANTS)
+        gone = History(gone_store, tmp_path, retention=30, clock=clock)
+        gone.open()
+        clock.now += 10
+        gone_store.signup("Chess Club", "early@mergington.edu")
+        gone.close()
+
+        live = History(live_store, tmp_path, checkpoint_every=2, retention=30, clock=clock)
+        live.open()
+        try:
+            for i in range(2):
+                clock.now += 10
+                live_store.signup("Chess Club", f"s{i}@mergington.edu")
+            live.as_of(clock.now)
+            assert gone.directory.exists()
+            for i in range(2, 6):
+                clock.now += 10
+                live_store.signup("Chess Club", f"s{i}@mergington.edu")
+            live.as_of(clock.now)
+            assert not gone.directory.exists()
+        finally:
+            live.close()
+
+    def test_as_of_skips_workers_that_cannot_cover(self, tmp_path, clock, monkeypatch, make_store):
+        """Test that closed workers' logs are not read when a covering segment exists"""
+        for _ in range(3):
+            store = make_store(participants=PARTICIPANTS)
+            gone = History(store, tmp_path, clock=clock)
+            gone.open()
+            clock.now += 10
+            store.signup("Chess Club", "early@mergington.edu")
+            gone.close()
+
+        store = make_store(participants=PARTICIPANTS)
+        live = History(store, tmp_path, clock=clock)
+        live.open()
+        try:
+            clock.now += 10
+            store.signup("Chess Club", "late@mergington.edu")
+            read = []
+            read_log = History._read_log
+            monkeypatch.setattr(History, "_read_log", staticmethod(
+                lambda directory, segment_id: read.append(directory)
+                or read_log(directory, segment_id)))
+            assert "late@mergington.edu" in roster(live, clock.now)
+            assert read == [live.directory]
+        finally:
+            live.close()
+
+
+class TestAsOfEndpoints:
+    """Test cases for as_of queries on the API"""
+
+    def test_activities_as_of(self, client: TestClient):
+        """Test reading rosters from before an unregister"""
+        client.post("/activities/Chess Club/signup", data={"email": "past@mergington.edu"})
+        time.sleep(0.01)
+        moment = datetime.now(timezone.utc).isoformat()
+        time.sleep(0.01)
+        client.delete("/activities/Chess Club/unregister",
+                      params={"email": "past@mergington.edu"})
+
+        response = client.get("/activities", params={"as_of": moment})
+        assert response.status_code == 200
+        assert "past@mergington.edu" in response.json()["Chess Club"]["participants"]
+        response = client.get("/students/past@mergington.edu/activities",
+                              params={"as_of": moment})
+        assert response.json()["activities"] == ["Chess Club"]
+        response = client.get("/students/past@mergington.edu/activities")
+        assert response.json()["activities"] == []
+
+    def test_as_of_before_history(self, client: TestClient):
+        """Test that a time before any history is a 404"""
+        response = client.get("/activities", params={"as_of": "2000-01-01T00:00:00Z"})
+        assert response.status_code == 404
+
+    def test_as_of_with_paging(self, client: TestClient):
+        """Test that as_of cannot be combined with a paged listing"""
+        response = client.get("/activities", params={"as_of": "2000-01-01T00:00:00Z",
+                                                     "limit": 2})
+        assert response.status_code == 400
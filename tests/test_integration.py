@@ -8,7 +8,7 @@ from fastapi.testclient import TestClient
 class TestIntegration:
     """Integration test cases"""
     
-    def test_complete_user_journey(self, client: TestClient, reset_activities):
+    def test_complete_user_journey(self, client: TestClient):
         """Test a complete user journey through the application"""
         # 1. Get list of activities
         response = client.get("/activities")
@@ -50,7 +50,7 @@ class TestIntegration:
         final_activities = response.json()
         assert new_email not in final_activities[activity_name]["participants"]
     
-    def test_multiple_activities_signup(self, client: TestClient, reset_activities):
+    def test_multiple_activities_signup(self, client: TestClient):
         """Test signing up for multiple activities"""
         email = "multisport@mergington.edu"
         activities_to_join = ["Chess Club", "Programming Class", "Art Studio"]
@@ -86,7 +86,7 @@ class TestIntegration:
         assert email in updated_activities["Programming Class"]["participants"]
         assert email in updated_activities["Art Studio"]["participants"]
     
-    def test_concurrent_operations(self, client: TestClient, reset_activities):
+    def test_concurrent_operations(self, client: TestClient):
         """Test handling of concurrent-like operations"""
         # Simulate multiple users signing up for the same activity
         emails = [
@@ -0,0 +1,55 @@
+"""
+Test cases for request metrics
+"""
+from fastapi.testclient import TestClient
+
+from metrics import BUCKETS, Histogram, Metrics
+
+
+class TestHistogram:
+    """Test cases for Histogram"""
+
+    def test_observe_buckets(self):
+        """Test that observations land in the first bucket that fits"""
+        histogram = Histogram()
+        histogram.observe(0.0001)
+        histogram.observe(0.001)
+        histogram.observe(100)
+        assert histogram.counts[0] == 1
+        assert histogram.counts[BUCKETS.index(0.001)] == 1
+        assert histogram.counts[-1] == 1
+        assert histogram.count == 3
+
+
+class TestMetricsEndpoint:
+    """Test cases for /metrics"""
+
+    def test_records_routes_and_statuses(self, client: TestClient):
+        """Test that requests are recorded under their route template"""
+        client.get("/activities")
+        client.post("/activities/Chess Club/signup", data={"email": "michael@mergington.edu"})
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        text = response.text
+        assert 'http_responses_total{method="GET",route="/activities",status="200"}' in text
+        assert ('http_responses_total{method="POST",route="/activities/{activity_name}/signup",'
+                'status="400"}') in text
+        assert 'http_request_duration_seconds_count{method="GET",route="/activities"}' in text
+        assert 'le="+Inf"' in text
+        # The /metrics request itself is still in flight while rendering
+        assert "http_requests_in_flight 1" in text
+
+    def test_roster_gauges(self, client: TestClient):
+        """Test that roster sizes and capacities are exported"""
+        text = client.get("/metrics").text
+        assert 'activity_participants{activity="Chess Club"} 2' in text
+        assert 'activity_max_participants{activity="Chess Club"} 12' in text
+
+    def test_label_escaping(self):
+        """Test that label values are escaped"""
+        metrics = Metrics()
+        metrics.observe("GET", 'a"b', 404, 0.001)
+        assert 'route="a\\"b"' in metrics.render()
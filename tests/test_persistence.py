@@ -0,0 +1,254 @@
+"""
+Test cases for the write-ahead log storage backend
+"""
+import asyncio
+import errno
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import persistence
+from app import create_app
+from persistence import FileBackend, SNAPSHOT_FILE, StorageError
+from store import ActivityStore
+
+
+SEED = {
+    "Chess Club": {
+        "description": "Chess",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 12,
+        "participants": ["michael@mergington.edu"]
+    },
+    "Art Studio": {
+        "description": "Art",
+        "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
+        "max_participants": 16,
+        "participants": []
+    },
+}
+
+
+def open_store(directory, **kwargs):
+    store = ActivityStore(SEED, backend=FileBackend(directory, **kwargs))
+    store.open()
+    return store
+
+
+class TestFileBackend:
+    """Test cases for FileBackend"""
+
+    def test_changes_survive_restart(self, tmp_path):
+        """Test that signups and unregisters are replayed on startup"""
+        store = open_store(tmp_path)
+        store.signup("Chess Club", "emma@mergington.edu")
+        store.signup("Art Studio", "emma@mergington.edu")
+        store.unregister("Chess Club", "michael@mergington.edu")
+        store.close()
+
+        reopened = open_store(tmp_path)
+        try:
+            assert reopened.to_dict() == store.to_dict()
+            assert reopened.activities_for("emma@mergington.edu") == ["Chess Club", "Art Studio"]
+        finally:
+            reopened.close()
+
+    def test_snapshot_compacts_log(self, tmp_path):
+        """Test that a snapshot removes the log segments it covers"""
+        store = open_store(tmp_path, commit_interval=0, snapshot_every=5)
+        for i in range(12):
+            store.signup("Art Studio", f"student{i}@mergington.edu")
+        store.close()
+
+        segments = sorted(tmp_path.glob("wal-*.log"))
+        assert (tmp_path / SNAPSHOT_FILE).exists()
+        # Only the segment written after the latest snapshot is kept
+        assert len(segments) == 1
+        assert segments[0].read_text().count("\n") < 5
+
+        reopened = open_store(tmp_path)
+        try:
+            assert len(reopened.get("Art Studio").participants) == 12
+        finally:
+            reopened.close()
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """Test that a partially written last record does not break replay"""
+        store = open_store(tmp_path)
+        store.signup("Chess Club", "emma@mergington.edu")
+        store.close()
+
+        segment = sorted(tmp_path.glob("wal-*.log"))[-1]
+        with open(segment, "a") as f:
+            f.write('{"lsn": 99, "op": "sig')
+
+        reopened = open_store(tmp_path)
+        try:
+            assert "emma@mergington.edu" in reopened.get("Chess Club").participants
+        finally:
+            reopened.close()
+
+    def test_concurrent_writers_share_commits(self, tmp_path):
+        """Test that writers waiting at the same time are all made durable"""
+        store = open_store(tmp_path, commit_interval=0.01)
+        threads = [
+            threading.Thread(target=store.signup, args=("Art Studio", f"s{i}@mergington.edu"))
+            for i in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.close()
+
+        reopened = open_store(tmp_path)
+        try:
+            assert len(reopened.get("Art Studio").participants) == 10
+        finally:
+            reopened.close()
+
+
+class TestAsyncDurability:
+    """Test cases for awaiting commits from an event loop"""
+
+    def test_async_signup_does_not_block_the_loop(self, tmp_path):
+        """Test that waiting for a group commit lets other tasks run"""
+        store = open_store(tmp_path, commit_interval=0.1)
+
+        async def main():
+            ticks = 0
+            done = False
+
+            async def ticker():
+                nonlocal ticks
+                while not done:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            await store.signup_async("Chess Club", "emma@mergington.edu")
+            promoted = await store.unregister_async("Chess Club", "michael@mergington.edu")
+            done = True
+            await task
+            return ticks, promoted
+
+        try:
+            ticks, promoted = asyncio.run(main())
+        finally:
+            store.close()
+        # Two commit windows of 0.1s passed while the loop kept ticking
+        assert ticks >= 10
+        assert promoted is None
+
+        reopened = open_store(tmp_path)
+        try:
+            assert list(reopened.get("Chess Club").participants) == ["emma@mergington.edu"]
+        finally:
+            reopened.close()
+
+
+def fail_once(function):
+    """Wrap ``function`` to raise ENOSPC on its first call"""
+    calls = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(None)
+        if len(calls) == 1:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return function(*args, **kwargs)
+    return wrapper
+
+
+class TestStorageFailures:
+    """Test cases for disk errors while logging"""
+
+    def test_failed_snapshot_keeps_flushing(self, tmp_path):
+        """Test that writes keep committing after a snapshot fails"""
+        store = open_store(tmp_path, commit_interval=0, snapshot_every=2)
+        backend = store._backend
+        backend._write_snapshot = fail_once(backend._write_snapshot)
+        for i in range(6):
+            store.signup("Art Studio", f"student{i}@mergington.edu")
+        store.close()
+
+        reopened = open_store(tmp_path)
+        try:
+            assert len(reopened.get("Art Studio").participants) == 6
+        finally:
+            reopened.close()
+
+    def test_failed_commit_is_snapshotted(self, tmp_path, monkeypatch):
+        """Test that a change whose commit failed is saved by the next snapshot"""
+        store = open_store(tmp_path, commit_interval=0)
+        monkeypatch.setattr(persistence.os, "fsync", fail_once(persistence.os.fsync))
+        with pytest.raises(StorageError):
+            store.signup("Art Studio", "lost@mergington.edu")
+        # The change stays in memory
+        assert "lost@mergington.edu" in store.get("Art Studio").participants
+        store.signup("Art Studio", "next@mergington.edu")
+        store.close()
+
+        reopened = open_store(tmp_path)
+        try:
+            assert list(reopened.get("Art Studio").participants) == [
+                "lost@mergington.edu", "next@mergington.edu"]
+        finally:
+            reopened.close()
+
+    def test_dead_flusher_fails_writers(self, tmp_path):
+        """Test that writers get an error rather than waiting forever"""
+        store = open_store(tmp_path, commit_interval=0)
+        backend = store._backend
+
+        def crash(batch):
+            raise MemoryError()
+        backend._commit = crash
+        with pytest.raises(StorageError):
+            store.signup("Art Studio", "first@mergington.edu")
+        backend._flusher.join(timeout=5)
+        assert not backend._flusher.is_alive()
+        with pytest.raises(StorageError):
+            store.signup("Art Studio", "second@mergington.edu")
+        # Refused before memory was changed
+        assert "second@mergington.edu" not in store.get("Art Studio").participants
+        assert backend.append({"op": "signup"}).exception() is not None
+        store.close()
+
+    def test_dead_flusher_leaves_promotions_whole(self, tmp_path):
+        """Test that an unregister refused by storage neither frees a spot nor promotes"""
+        store = open_store(tmp_path, commit_interval=0)
+        for i in range(12):
+            store.signup("Chess Club", f"student{i}@mergington.edu")
+        backend = store._backend
+
+        def crash(batch):
+            raise MemoryError()
+        backend._commit = crash
+        with pytest.raises(StorageError):
+            store.signup("Art Studio", "first@mergington.edu")
+        backend._flusher.join(timeout=5)
+        with pytest.raises(StorageError):
+            store.unregister("Chess Club", "michael@mergington.edu")
+        activity = store.get("Chess Club")
+        assert "michael@mergington.edu" in activity.participants
+        assert list(activity.waitlist) == ["student11@mergington.edu"]
+        store.close()
+
+    def test_api_reports_storage_failures(self, tmp_path):
+        """Test that writes refused by storage are a 503, not a 500"""
+        environ = {"MERGINGTON_DATA_DIR": str(tmp_path)}
+        with TestClient(create_app(environ=environ)) as client:
+            backend = client.app.state.default_school.activities._backend
+            backend._failed = MemoryError()
+            response = client.post("/activities/Chess Club/signup",
+                                   data={"email": "new@mergington.edu"})
+            assert response.status_code == 503
+            assert response.json()["detail"] == StorageError.detail
+            response = client.delete("/activities/Chess Club/unregister",
+                                     params={"email": "michael@mergington.edu"})
+            assert response.status_code == 503
+            response = client.post("/activities/bulk", content="Chess Club,new@mergington.edu\n",
+                                   headers={"Content-Type": "text/csv"})
+            assert response.status_code == 503
+            backend._failed = None
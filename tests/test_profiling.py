@@ -0,0 +1,122 @@
+"""
+Test cases for the sampling profiler and slow-request capture
+"""
+import threading
+import time
+
+import pytest
+
+from profiling import ProfilerBusyError, SamplingProfiler, SlowRequestLog
+
+TOKEN = "test-admin-token"
+ADMIN = {"X-Admin-Token": TOKEN}
+
+
+@pytest.fixture
+def admin(client):
+    client.app.state.admin_token = TOKEN
+
+
+def spin_until(event):
+    while not event.is_set():
+        sum(range(100))
+
+
+class TestSamplingProfiler:
+    """Test cases for SamplingProfiler"""
+
+    def test_collapsed_stacks(self):
+        """Test that a busy thread's functions show up root first"""
+        done = threading.Event()
+        worker = threading.Thread(target=spin_until, args=(done,), name="busy-worker")
+        worker.start()
+        profiler = SamplingProfiler()
+        profiler.start(interval=0.001)
+        time.sleep(0.1)
+        stacks = profiler.stop()
+        done.set()
+        worker.join()
+
+        assert profiler.samples > 0
+        busy = [line for line in stacks.splitlines() if line.startswith("busy-worker;")]
+        assert busy
+        stack, count = busy[0].rsplit(" ", 1)
+        assert "spin_until (test_profiling.py:" in stack
+        assert int(count) > 0
+        assert not profiler.running
+
+    def test_one_profile_at_a_time(self):
+        """Test that starting a second profile is refused"""
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            with pytest.raises(ProfilerBusyError):
+                profiler.start()
+        finally:
+            profiler.stop()
+        assert profiler.stop() == ""
+
+
+class TestSlowRequestLog:
+    """Test cases for SlowRequestLog"""
+
+    def test_keeps_last_slow_requests(self):
+        """Test that only requests over the threshold are kept, up to capacity"""
+        log = SlowRequestLog(capacity=2, threshold=0.01)
+        scope = {"method": "GET", "path": "/activities", "query_string": b"limit=5"}
+        for total in (0.02, 0.001, 0.05, 0.03):
+            log.record(scope, 200, {"total": total})
+        assert [request["timings_ms"]["total"] for request in log.slowest()] == [50.0, 30.0]
+        assert log.slowest()[0]["query"] == {"limit": "5"}
+        log.configure(capacity=1)
+        assert len(log.slowest()) == 1
+
+
+class TestAdminEndpoints:
+    """Test cases for the /admin endpoints"""
+
+    def test_unavailable_without_configured_token(self, client):
+        """Test that admin endpoints do not exist unless a token is set"""
+        assert client.get("/admin/slow-requests", headers=ADMIN).status_code == 404
+
+    def test_requires_token(self, client, admin):
+        """Test that a missing or wrong token is refused"""
+        assert client.get("/admin/slow-requests").status_code == 403
+        response = client.get("/admin/slow-requests", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 403
+
+    def test_profile(self, client, admin):
+        """Test that a short profile returns collapsed stacks"""
+        response = client.post("/admin/profile", params={"seconds": 0.05, "interval_ms": 1},
+                               headers=ADMIN)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["X-Profile-Samples"]) > 0
+        for line in response.text.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert ";" in stack and int(count) > 0
+
+    def test_slow_requests_recorded_while_enabled(self, client, admin):
+        """Test that requests are captured with route, parameters and roster size"""
+        client.get("/activities")
+        response = client.put("/admin/slow-requests",
+                              params={"enabled": "true", "threshold_ms": 0}, headers=ADMIN)
+        assert response.json()["enabled"] is True
+        client.delete("/activities/Chess%20Club/unregister",
+                      params={"email": "michael@mergington.edu"})
+
+        requests = client.get("/admin/slow-requests", headers=ADMIN).json()["requests"]
+        [unregister] = [request for request in requests if request["method"] == "DELETE"]
+        assert unregister["route"] == "/activities/{activity_name}/unregister"
+        assert unregister["path_params"] == {"activity_name": "Chess Club"}
+        assert unregister["query"] == {"email": "michael@mergington.edu"}
+        assert unregister["roster"] == {"participants": 1, "max_participants": 12,
+                                        "waitlist": 0}
+        assert unregister["timings_ms"]["total"] >= unregister["timings_ms"]["until_headers"]
+        # Nothing was recorded before recording was switched on
+        assert not [request for request in requests if request["route"] == "/activities"]
+
+        client.put("/admin/slow-requests", params={"enabled": "false"}, headers=ADMIN)
+        client.delete("/admin/slow-requests", headers=ADMIN)
+        client.get("/activities")
+        assert client.get("/admin/slow-requests", headers=ADMIN).json()["requests"] == []
@@ -0,0 +1,101 @@
+"""
+Test cases for Server-Sent Events push of roster changes
+"""
+import asyncio
+import tracemalloc
+
+from push import Broadcaster, encode_event, parse_event_id
+
+
+async def settle():
+    """Let the broadcast loop drain its inbox"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestBroadcaster:
+    """Test cases for Broadcaster"""
+
+    def test_event_ids(self):
+        """Test that event ids round-trip only within the same epoch"""
+        message = encode_event({"version": 7, "op": "signup"}, "abc")
+        assert message.startswith(b"id: abc-7\nevent: change\n")
+        assert parse_event_id("abc-7", "abc") == 7
+        assert parse_event_id("old-7", "abc") is None
+        assert parse_event_id("garbage", "abc") is None
+
+    def test_fan_out(self, make_store):
+        """Test that every subscriber receives each change once"""
+        store = make_store(100000)
+        broadcaster = Broadcaster(store)
+
+        async def scenario():
+            first = broadcaster.connect()
+            second = broadcaster.connect()
+            await asyncio.to_thread(store.signup, "Chess Club", "a@mergington.edu")
+            await settle()
+            for subscriber in (first, second):
+                message = await subscriber.next(timeout=1)
+                assert b'"email":"a@mergington.edu"' in message
+                assert subscriber.queue.empty()
+            await broadcaster.stop()
+
+        asyncio.run(scenario())
+
+    def test_catch_up_comes_before_live_events(self, make_store):
+        """Test that catch-up messages are queued ahead of new changes"""
+        store = make_store(100000)
+        broadcaster = Broadcaster(store)
+
+        async def scenario():
+            subscriber = broadcaster.connect(lambda: [b"catch-up\n\n"])
+            store.signup("Chess Club", "a@mergington.edu")
+            await settle()
+            assert await subscriber.next(timeout=1) == b"catch-up\n\n"
+            assert b"a@mergington.edu" in await subscriber.next(timeout=1)
+            await broadcaster.stop()
+
+        asyncio.run(scenario())
+
+    def test_slow_consumer_is_dropped(self, make_store):
+        """Test that a subscriber whose queue fills up is disconnected"""
+        store = make_store(100000)
+        broadcaster = Broadcaster(store, queue_size=2)
+
+        async def scenario():
+            slow = broadcaster.connect()
+            for i in range(3):
+                store.signup("Chess Club", f"s{i}@mergington.edu")
+            await settle()
+            assert len(broadcaster) == 0
+            assert await slow.next(timeout=1) is None
+            await broadcaster.stop()
+
+        asyncio.run(scenario())
+
+    def test_idle_connections_stay_bounded(self, make_store):
+        """Test memory with thousands of subscribers that never read"""
+        store = make_store(100000)
+        broadcaster = Broadcaster(store, queue_size=16)
+        clients = 5000
+
+        async def scenario():
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            subscribers = [broadcaster.connect() for _ in range(clients)]
+            for i in range(200):
+                store.signup("Chess Club", f"s{i}@mergington.edu")
+                if i % 10 == 0:
+                    await settle()
+            await settle()
+            used = tracemalloc.get_traced_memory()[0] - before
+            tracemalloc.stop()
+
+            # Nobody read, so everyone was dropped once their queue filled
+            assert len(broadcaster) == 0
+            assert all(s.queue.qsize() == 1 for s in subscribers)
+            # Messages are shared between queues; per-client cost is small
+            assert used / clients < 4096
+            await broadcaster.stop()
+
+        asyncio.run(scenario())
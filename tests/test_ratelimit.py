@@ -0,0 +1,213 @@
+"""
+Test cases for signup rate limiting and request coalescing
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ratelimit import Coalescer, IdempotencyKeyReusedError, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter"""
+
+    def test_burst_then_refill(self):
+        """Test that a key may burst and then waits for refills"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, clock=clock)
+        assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire("a") == pytest.approx(0.5)
+        clock.now = 0.5
+        assert limiter.acquire("a") == 0
+        # Other keys have their own bucket
+        assert limiter.acquire("b") == 0
+
+    def test_zero_rate_disables(self):
+        """Test that a rate of 0 never limits"""
+        limiter = RateLimiter(rate=0, burst=1)
+        assert all(limiter.acquire("a") == 0 for _ in range(100))
+
+    def test_idle_buckets_are_evicted(self):
+        """Test that refilled buckets do not accumulate"""
+        clock = FakeClock()
+        limiter = RateLimiter(rate=1, burst=2, clock=clock)
+        for i in range(100):
+            limiter.acquire(i)
+        clock.now = 10
+        limiter.acquire("new")
+        assert len(limiter) == 1
+
+    def test_key_count_is_bounded(self):
+        """Test that max_keys caps the number of buckets"""
+        limiter = RateLimiter(rate=1, burst=2, max_keys=10, clock=FakeClock())
+        for i in range(100):
+            limiter.acquire(i)
+        assert len(limiter) == 10
+
+
+class TestCoalescer:
+    """Test cases for Coalescer"""
+
+    def test_duplicates_share_one_call(self):
+        """Test that calls arriving while the first runs are not repeated"""
+        coalescer = Coalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "done"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(coalescer.run("k", work)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(coalescer.run("k", work)))
+                     for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+        assert results == ["done"] * 4
+        assert len(calls) == 1
+
+    def test_async_duplicates_share_one_call(self):
+        """Test that coroutines with the same key await one call"""
+        coalescer = Coalescer()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "done"
+
+        async def main():
+            return await asyncio.gather(*(coalescer.run_async("k", work) for _ in range(5)))
+
+        assert asyncio.run(main()) == ["done"] * 5
+        assert len(calls) == 1
+
+    def test_finished_calls_run_again(self):
+        """Test that without remember a later call is not deduplicated"""
+        coalescer = Coalescer()
+        calls = []
+        coalescer.run("k", lambda: calls.append(1))
+        coalescer.run("k", lambda: calls.append(1))
+        assert len(calls) == 2
+
+    def test_remembered_until_ttl(self):
+        """Test that remembered results answer repeats until they expire"""
+        clock = FakeClock()
+        coalescer = Coalescer(ttl=10, clock=clock)
+        counter = iter(range(10))
+        assert coalescer.run("k", lambda: next(counter), remember=True) == 0
+        assert coalescer.run("k", lambda: next(counter), remember=True) == 0
+        clock.now = 11
+        assert coalescer.run("k", lambda: next(counter), remember=True) == 1
+
+    def test_failures_are_not_remembered(self):
+        """Test that a failed call can be retried with the same key"""
+        coalescer = Coalescer()
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            coalescer.run("k", fail, remember=True)
+        assert coalescer.run("k", lambda: "ok", remember=True) == "ok"
+
+    def test_fingerprint_mismatch(self):
+        """Test that a key reused for another request is rejected"""
+        coalescer = Coalescer()
+        coalescer.run("k", lambda: 1, fingerprint="a", remember=True)
+        with pytest.raises(IdempotencyKeyReusedError):
+            coalescer.run("k", lambda: 1, fingerprint="b", remember=True)
+
+
+class TestSignupProtection:
+    """Test cases for rate limits and idempotency keys on the signup endpoint"""
+
+    def test_idempotent_retry(self, client: TestClient):
+        """Test that a retried request is answered without reapplying it"""
+        headers = {"Idempotency-Key": "retry-1"}
+        first = client.post("/activities/Chess Club/signup",
+                            data={"email": "retry@mergington.edu"}, headers=headers)
+        second = client.post("/activities/Chess Club/signup",
+                             data={"email": "retry@mergington.edu"}, headers=headers)
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+
+    def test_reused_key(self, client: TestClient):
+        """Test that an idempotency key cannot be reused for another student"""
+        headers = {"Idempotency-Key": "reused-1"}
+        client.post("/activities/Chess Club/signup",
+                    data={"email": "first@mergington.edu"}, headers=headers)
+        response = client.post("/activities/Chess Club/signup",
+                               data={"email": "second@mergington.edu"}, headers=headers)
+        assert response.status_code == 400
+
+    def test_concurrent_duplicates_with_different_options(self, client: TestClient, monkeypatch):
+        """Test that requests without a key only share a response if identical"""
+        activities = client.app.state.default_school.activities
+        signup_async = activities.signup_async
+        started = threading.Semaphore(0)
+        release = threading.Event()
+
+        async def held_signup(*args, **kwargs):
+            started.release()
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+            return await signup_async(*args, **kwargs)
+
+        monkeypatch.setattr(activities, "signup_async", held_signup)
+        responses = {}
+
+        def post(check_conflicts):
+            responses[check_conflicts] = client.post(
+                "/activities/Chess Club/signup", data={"email": "twice@mergington.edu"},
+                params={"check_conflicts": check_conflicts})
+
+        threads = [threading.Thread(target=post, args=(check,)) for check in (False, True)]
+        try:
+            for thread in threads:
+                thread.start()
+                # Both must reach the store, rather than one joining the other
+                assert started.acquire(timeout=5)
+        finally:
+            release.set()
+            for thread in threads:
+                thread.join()
+        statuses = sorted(response.status_code for response in responses.values())
+        assert statuses == [200, 400]
+        details = [response.json().get("detail") for response in responses.values()]
+        assert "Student already signed up for this activity" in details
+
+    def test_activity_rate_limit(self, client: TestClient, monkeypatch):
+        """Test that a burst past the activity limit gets 429 with Retry-After"""
+        monkeypatch.setattr(client.app.state.default_school, "activity_limiter",
+                            RateLimiter(rate=0.1, burst=2))
+        statuses = [
+            client.post("/activities/Chess Club/signup",
+                        data={"email": f"burst{i}@mergington.edu"}).status_code
+            for i in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        response = client.post("/activities/Chess Club/signup",
+                               data={"email": "late@mergington.edu"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert "late@mergington.edu" not in participants
@@ -0,0 +1,60 @@
+"""
+Test cases for schedule parsing and the schedule index
+"""
+from schedule import ScheduleIndex, Slot, parse_schedule
+
+
+class TestParseSchedule:
+    """Test cases for parse_schedule"""
+
+    def test_list_of_days(self):
+        """Test a comma-separated list of days"""
+        slot = parse_schedule("Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM")
+        assert slot == Slot(frozenset({"monday", "wednesday", "friday"}), 14 * 60, 15 * 60)
+
+    def test_days_joined_with_and(self):
+        """Test days joined with 'and' and half-hour times"""
+        slot = parse_schedule("Tuesdays and Thursdays, 3:30 PM - 4:30 PM")
+        assert slot == Slot(frozenset({"tuesday", "thursday"}), 15 * 60 + 30, 16 * 60 + 30)
+
+    def test_noon_and_morning(self):
+        """Test 12 PM and AM times"""
+        slot = parse_schedule("Saturday, 11:00 AM - 12:30 PM")
+        assert slot == Slot(frozenset({"saturday"}), 11 * 60, 12 * 60 + 30)
+
+    def test_unparseable_time(self):
+        """Test a schedule without a time range"""
+        slot = parse_schedule("Fridays, after school")
+        assert slot == Slot(frozenset({"friday"}), None, None)
+
+
+class TestScheduleIndex:
+    """Test cases for ScheduleIndex"""
+
+    def make_index(self):
+        return ScheduleIndex({
+            "Early": parse_schedule("Mondays, 2:00 PM - 3:00 PM"),
+            "Late": parse_schedule("Mondays and Wednesdays, 3:00 PM - 4:00 PM"),
+            "Overlap": parse_schedule("Wednesdays, 3:30 PM - 5:00 PM"),
+            "Other Day": parse_schedule("Tuesdays, 2:00 PM - 6:00 PM"),
+            "Unknown": parse_schedule("Mondays, whenever"),
+        })
+
+    def test_back_to_back_slots_do_not_overlap(self):
+        """Test that a slot ending as another starts is not a conflict"""
+        index = self.make_index()
+        assert index.overlapping("Early") == frozenset()
+
+    def test_overlap_on_shared_day(self):
+        """Test overlaps are found per weekday"""
+        index = self.make_index()
+        assert index.overlapping("Late") == {"Overlap"}
+        assert index.overlapping("Overlap") == {"Late"}
+        assert index.overlapping("Other Day") == frozenset()
+        assert index.overlapping("Unknown") == frozenset()
+
+    def test_conflicting_pairs(self):
+        """Test that conflicts lists each overlapping pair once"""
+        index = self.make_index()
+        assert index.conflicts(["Overlap", "Early", "Late"]) == [("Overlap", "Late")]
+        assert index.conflicts(["Early", "Other Day"]) == []
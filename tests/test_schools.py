@@ -0,0 +1,117 @@
+"""
+Test cases for serving several schools from isolated stores
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import create_app
+
+
+def school_activities(prefix):
+    return {
+        f"{prefix} Chess": {
+            "description": "Chess for everyone",
+            "schedule": "Fridays, 3:30 PM - 5:00 PM",
+            "max_participants": 2,
+            "participants": [f"first@{prefix.lower()}.edu"],
+        },
+    }
+
+
+@pytest.fixture
+def schools():
+    config = {
+        "north": {"name": "North High", "activities": school_activities("North")},
+        "south": {"name": "South High", "activities": school_activities("South")},
+    }
+    with TestClient(create_app(config, environ={})) as client:
+        yield client
+
+
+class TestSchools:
+    """Test cases for the /schools routes"""
+
+    def test_list_schools(self, schools):
+        """Test that every configured school is listed in order"""
+        response = schools.get("/schools")
+        assert response.status_code == 200
+        assert response.json() == {"schools": [
+            {"id": "north", "name": "North High", "activities": 1},
+            {"id": "south", "name": "South High", "activities": 1},
+        ]}
+
+    def test_first_school_is_default(self, schools):
+        """Test that unprefixed routes serve the first school"""
+        assert list(schools.get("/activities").json()) == ["North Chess"]
+        assert list(schools.get("/schools/south/activities").json()) == ["South Chess"]
+
+    def test_unknown_school(self, schools):
+        """Test that a school that is not configured is a 404"""
+        response = schools.get("/schools/west/activities")
+        assert response.status_code == 404
+        assert response.json()["detail"] == "School not found"
+
+    def test_schools_are_isolated(self, schools):
+        """Test that a signup at one school changes nothing at another"""
+        response = schools.post("/schools/south/activities/South Chess/signup",
+                                data={"email": "new@south.edu"})
+        assert response.status_code == 200
+        assert schools.post("/schools/north/activities/South Chess/signup",
+                            data={"email": "new@south.edu"}).status_code == 404
+
+        south = schools.get("/schools/south/stats").json()["totals"]
+        north = schools.get("/schools/north/stats").json()["totals"]
+        assert south["participants"] == 2
+        assert north["participants"] == 1
+        assert schools.get("/schools/north/activities/changes",
+                           params={"since": 0}).json()["changes"] == []
+        assert schools.get("/schools/south/students/new@south.edu/activities").json() == {
+            "email": "new@south.edu", "activities": ["South Chess"]}
+        assert schools.get("/schools/north/students/new@south.edu/activities").json() == {
+            "email": "new@south.edu", "activities": []}
+
+    def test_metrics_labelled_by_school(self, schools):
+        """Test that roster gauges carry the school they belong to"""
+        body = schools.get("/metrics").text
+        assert 'activity_participants{school="north",activity="North Chess"} 1' in body
+        assert 'activity_participants{school="south",activity="South Chess"} 1' in body
+
+
+class TestCreateApp:
+    """Test cases for create_app"""
+
+    def test_apps_share_no_state(self):
+        """Test that two apps in one process keep separate rosters"""
+        with TestClient(create_app(environ={})) as first, \
+                TestClient(create_app(environ={})) as second:
+            first.post("/activities/Chess Club/signup", data={"email": "only@mergington.edu"})
+            assert "only@mergington.edu" in \
+                first.get("/activities").json()["Chess Club"]["participants"]
+            assert "only@mergington.edu" not in \
+                second.get("/activities").json()["Chess Club"]["participants"]
+
+    def test_data_dir_per_school(self, tmp_path):
+        """Test that each school persists to its own subdirectory"""
+        config = {
+            "north": {"name": "North High", "activities": school_activities("North")},
+            "south": {"name": "South High", "activities": school_activities("South")},
+        }
+        environ = {"MERGINGTON_DATA_DIR": str(tmp_path)}
+        with TestClient(create_app(config, environ=environ)) as client:
+            client.post("/schools/south/activities/South Chess/signup",
+                        data={"email": "kept@south.edu"})
+        assert {path.name for path in tmp_path.iterdir()} == {"north", "south"}
+
+        with TestClient(create_app(config, environ=environ)) as client:
+            participants = client.get("/schools/south/activities").json()[
+                "South Chess"]["participants"]
+            assert participants == ["first@south.edu", "kept@south.edu"]
+
+    def test_schools_file(self, tmp_path):
+        """Test that MERGINGTON_SCHOOLS names a JSON school configuration"""
+        path = tmp_path / "schools.json"
+        path.write_text('{"east": {"name": "East High", "activities": {}}}')
+        with TestClient(create_app(environ={"MERGINGTON_SCHOOLS": str(path)})) as client:
+            assert client.get("/schools").json() == {"schools": [
+                {"id": "east", "name": "East High", "activities": 0}]}
+            assert client.get("/activities").json() == {}
@@ -0,0 +1,137 @@
+"""
+Test cases for keyword search over activities
+"""
+import pytest
+
+import search
+from search import SearchIndex, tokenize
+from store import ActivityStore
+
+
+def make_activity(description):
+    return {
+        "description": description,
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 10,
+        "participants": [],
+    }
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add("Chess Club", "Learn strategies and compete in chess tournaments")
+    index.add("Programming Class", "Learn programming fundamentals and build software projects")
+    index.add("Debate Team", "Competitive debating and public speaking skills")
+    index.add("Basketball Team", "Competitive basketball team with games and tournaments")
+    return index
+
+
+def names(results):
+    return [name for name, score in results]
+
+
+class TestSearchIndex:
+    """Test cases for SearchIndex"""
+
+    def test_tokenize(self):
+        """Test that words are lowercased and punctuation dropped"""
+        assert tokenize("Painting, drawing & STEM!") == ["painting", "drawing", "stem"]
+
+    def test_word_in_name_ranks_first(self, index):
+        """Test that a name match outranks a description-only match"""
+        assert names(index.search("chess")) == ["Chess Club"]
+        assert names(index.search("team")) == ["Basketball Team", "Debate Team"]
+
+    def test_last_word_matches_as_prefix(self, index):
+        """Test typeahead on the word being typed"""
+        assert names(index.search("ch")) == ["Chess Club"]
+        assert names(index.search("learn prog")) == ["Programming Class"]
+        # Only the last word is a prefix
+        assert index.search("lea programming") == []
+
+    def test_every_word_must_match(self, index):
+        """Test that results match all of the query's words"""
+        assert names(index.search("competitive tournaments")) == ["Basketball Team"]
+        assert index.search("chess basketball") == []
+        assert index.search("") == []
+
+    def test_exact_word_outranks_prefix(self, index):
+        """Test that a completed word scores more than a longer word it starts"""
+        index.add("Comp Club", "comp")
+        index.add("Compete Club", "compete")
+        results = dict(index.search("comp"))
+        assert results["Comp Club"] > results["Compete Club"]
+
+    def test_rarer_words_score_higher(self, index):
+        """Test that inverse document frequency weighs the query words"""
+        scores = dict(index.search("competitive"))
+        assert scores["Debate Team"] < dict(index.search("debating"))["Debate Team"]
+
+    def test_replace_and_remove(self, index):
+        """Test that re-indexing an activity drops its old words"""
+        index.add("Chess Club", "Board games after school")
+        assert index.search("strategies") == []
+        assert names(index.search("board")) == ["Chess Club"]
+        index.remove("Chess Club")
+        assert index.search("chess") == []
+        assert "Chess Club" not in index
+        assert len(index) == 3
+
+    def test_one_word_results_match_full_ranking(self, monkeypatch):
+        """Test that the per-word top lists give the same ranking as scoring everything"""
+        monkeypatch.setattr(search, "TOP_K", 5)
+        index = SearchIndex()
+        for i in range(40):
+            index.add(f"Activity {i}", "robot " * (i % 7) + "robotics " * (i % 3))
+        for i in range(0, 40, 3):
+            index.remove(f"Activity {i}")
+        for query in ("robot", "rob", "robotics"):
+            found = index.search(query, limit=5)
+            everything = index._best_of(
+                [(word, index._postings[word], 1.0 if word == query else search.PREFIX_WEIGHT)
+                 for word in index._expand(query)], None)
+            expected = sorted(everything.items(), key=lambda item: (-item[1], item[0]))[:5]
+            assert names(found) == names(expected)
+
+
+class TestStoreSearch:
+    """Test cases for ActivityStore.search"""
+
+    def test_update_keeps_index_current(self):
+        """Test that added and replaced activities are searchable at once"""
+        store = ActivityStore({"Chess Club": make_activity("Board games")})
+        store.update({"Robotics Club": make_activity("Build robots")})
+        assert [activity.name for activity, score in store.search("club")] == [
+            "Chess Club", "Robotics Club"]
+        store.update({"Chess Club": make_activity("Strategy")})
+        assert store.search("board") == []
+        store.clear()
+        assert store.search("club") == []
+
+
+class TestSearchEndpoint:
+    """Test cases for GET /activities/search"""
+
+    def test_search(self, client):
+        """Test that results carry what a typeahead list shows"""
+        response = client.get("/activities/search", params={"q": "chess tour"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["query"] == "chess tour"
+        [result] = data["results"]
+        assert result["name"] == "Chess Club"
+        assert result["spots_remaining"] == 10
+        assert result["score"] > 0
+
+    def test_limit(self, client):
+        """Test that limit caps the results, best first"""
+        response = client.get("/activities/search", params={"q": "c", "limit": 2})
+        assert len(response.json()["results"]) == 2
+        response = client.get("/activities/search", params={"q": "c", "limit": 0})
+        assert response.status_code == 422
+
+    def test_no_match(self, client):
+        """Test that an unmatched query returns no results"""
+        response = client.get("/activities/search", params={"q": "quidditch"})
+        assert response.json()["results"] == []
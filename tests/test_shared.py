@@ -0,0 +1,239 @@
+"""
+Test cases for the store shared between worker processes
+"""
+import asyncio
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from shared import SharedActivityStore
+from store import AlreadySignedUpError, ScheduleConflictError
+
+
+SEED = {
+    "Chess Club": {
+        "description": "Chess",
+        "schedule": "Fridays, 3:30 PM - 5:00 PM",
+        "max_participants": 40,
+        "participants": ["michael@mergington.edu"]
+    },
+    "Science Olympiad": {
+        "description": "Science",
+        "schedule": "Fridays, 4:00 PM - 6:00 PM",
+        "max_participants": 20,
+        "participants": []
+    },
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "activities.db")
+
+
+def open_store(path):
+    store = SharedActivityStore(path, SEED, poll_interval=0.01)
+    store.open()
+    return store
+
+
+def sign_up_many(path, worker, count, results):
+    store = open_store(path)
+    ok = 0
+    for i in range(count):
+        if store.signup("Chess Club", f"w{worker}-{i}@mergington.edu") is None:
+            ok += 1
+    store.close()
+    results.put(ok)
+
+
+class TestSharedActivityStore:
+    """Test cases for SharedActivityStore"""
+
+    def test_workers_see_each_others_changes(self, db_path):
+        """Test that a change made by one worker is served by another"""
+        first = open_store(db_path)
+        second = open_store(db_path)
+        try:
+            first.signup("Chess Club", "emma@mergington.edu")
+            assert second.activities_for("emma@mergington.edu") == ["Chess Club"]
+
+            version, body = second.to_json()
+            assert (version, body) == first.to_json()
+            assert first.epoch == second.epoch
+
+            with pytest.raises(AlreadySignedUpError):
+                second.signup("Chess Club", "emma@mergington.edu")
+
+            second.unregister("Chess Club", "michael@mergington.edu")
+            first.refresh()
+            assert list(first.get("Chess Club").participants) == ["emma@mergington.edu"]
+        finally:
+            first.close()
+            second.close()
+
+    def test_restart_keeps_state(self, db_path):
+        """Test that the database outlives the workers"""
+        store = open_store(db_path)
+        store.signup("Chess Club", "emma@mergington.edu")
+        store.close()
+
+        reopened = open_store(db_path)
+        try:
+            assert list(reopened.get("Chess Club").participants) == [
+                "michael@mergington.edu", "emma@mergington.edu"
+            ]
+        finally:
+            reopened.close()
+
+    def test_capacity_across_processes(self, db_path):
+        """Test that racing processes never overbook an activity"""
+        open_store(db_path).close()
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [context.Process(target=sign_up_many, args=(db_path, w, 20, results))
+                   for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # One seat is taken by the seed participant
+        assert sum(results.get() for _ in workers) == 39
+        store = open_store(db_path)
+        try:
+            assert len(store.get("Chess Club").participants) == 40
+            assert len(store.get("Chess Club").waitlist) == 80 - 39
+        finally:
+            store.close()
+
+    def test_unregister_promotes_across_workers(self, db_path):
+        """Test that a promotion made by one worker is seen by another"""
+        seed = {"Tiny Club": {"description": "Tiny", "schedule": "Fridays, 3:30 PM - 5:00 PM",
+                              "max_participants": 1, "participants": ["a@mergington.edu"],
+                              "waitlist": ["b@mergington.edu"]}}
+        first = SharedActivityStore(db_path, seed, poll_interval=0.01)
+        first.open()
+        second = SharedActivityStore(db_path, seed, poll_interval=0.01)
+        second.open()
+        try:
+            assert second.signup("Tiny Club", "c@mergington.edu") == 2
+            assert first.unregister("Tiny Club", "a@mergington.edu") == "b@mergington.edu"
+            second.refresh()
+            assert list(second.get("Tiny Club").participants) == ["b@mergington.edu"]
+            assert second.waitlist_position("Tiny Club", "c@mergington.edu") == 1
+        finally:
+            first.close()
+            second.close()
+
+    def test_trimmed_changes_force_reload(self, db_path):
+        """Test that a worker too far behind reloads from the tables"""
+        behind = open_store(db_path)
+        behind.close()  # stop its poller so it falls behind
+        ahead = SharedActivityStore(db_path, SEED, poll_interval=0.01, keep_changes=2)
+        ahead.open()
+        try:
+            for i in range(6):
+                ahead.signup("Chess Club", f"s{i}@mergington.edu")
+            ahead._trim_changes()
+            behind.refresh()
+            assert behind.version == ahead.version
+            assert len(behind.get("Chess Club").participants) == 7
+        finally:
+            ahead.close()
+
+    def test_async_interface_uses_the_pool(self, db_path):
+        """Test that async calls run on the store's worker pool"""
+        store = open_store(db_path)
+
+        async def main():
+            await store.signup_async("Chess Club", "emma@mergington.edu")
+            names = await store.read_async(store.activities_for, "emma@mergington.edu")
+            await store.unregister_async("Chess Club", "emma@mergington.edu")
+            return names
+
+        try:
+            assert asyncio.run(main()) == ["Chess Club"]
+            assert store.activities_for("emma@mergington.edu") == []
+        finally:
+            store.close()
+
+    def test_reload_is_never_seen_half_done(self, db_path):
+        """Test that readers never see an emptied store while it reloads"""
+        seed = {f"Activity {i}": {"description": "", "schedule": "Fridays",
+                                  "max_participants": 5, "participants": ["a@mergington.edu"]}
+                for i in range(500)}
+        store = SharedActivityStore(db_path, seed)
+        store.open()
+        store.close()  # no poller; reloads are driven below
+        events = []
+        store.subscribe(events.append)
+        seen = set()
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    seen.add((len(store), store.position("Activity 499"),
+                              len(store.get("Activity 499").participants)))
+                except Exception as exc:
+                    seen.add(type(exc).__name__)
+
+        reader = threading.Thread(target=read)
+        interval = sys.getswitchinterval()
+        # Switch threads as often as possible to catch a half-done reload
+        sys.setswitchinterval(1e-5)
+        reader.start()
+        try:
+            for _ in range(20):
+                store._reload()
+        finally:
+            stop.set()
+            reader.join()
+            sys.setswitchinterval(interval)
+        assert seen == {(500, 499, 1)}
+        assert [event["op"] for event in events] == ["reset"] * 20
+
+    def test_poller_survives_listener_errors(self, db_path):
+        """Test that a failing listener does not stop changes arriving"""
+        watcher = open_store(db_path)
+        writer = open_store(db_path)
+        failures = []
+
+        def flaky(event):
+            if not failures:
+                failures.append(event)
+                raise RuntimeError("listener failed")
+
+        watcher.subscribe(flaky)
+        try:
+            writer.signup("Chess Club", "first@mergington.edu")
+            writer.signup("Chess Club", "second@mergington.edu")
+            for _ in range(200):
+                if watcher._poller.is_alive() and failures and \
+                        "second@mergington.edu" in watcher.get("Chess Club").participants:
+                    break
+                threading.Event().wait(0.01)
+            assert failures
+            assert watcher._poller.is_alive()
+            assert "second@mergington.edu" in watcher.get("Chess Club").participants
+        finally:
+            watcher.close()
+            writer.close()
+
+    def test_conflicts_checked_against_the_database(self, db_path):
+        """Test that a conflict made by another worker is caught before memory catches up"""
+        first = open_store(db_path)
+        second = open_store(db_path)
+        try:
+            first.signup("Chess Club", "emma@mergington.edu")
+            # Pretend the second worker has not heard about it yet
+            second.activities_for = lambda email: []
+            with pytest.raises(ScheduleConflictError):
+                second.signup("Science Olympiad", "emma@mergington.edu", check_conflicts=True)
+            assert second.get("Science Olympiad").participants.ids() == []
+        finally:
+            first.close()
+            second.close()
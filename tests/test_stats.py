@@ -0,0 +1,117 @@
+"""
+Test cases for enrollment statistics
+"""
+import random
+
+import pytest
+
+from stats import EnrollmentStats
+from store import ActivityStore, StoreError
+
+
+# Alongside a Chess Club with three seats, one taken
+OTHERS = {
+    "Gym Class": {
+        "description": "Gym",
+        "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
+        "max_participants": 2,
+        "participants": ["b@mergington.edu", "c@mergington.edu"]
+    },
+    "Art Studio": {
+        "description": "Art",
+        "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
+        "max_participants": 4,
+        "participants": []
+    },
+}
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store(3, ["a@mergington.edu"], others=OTHERS)
+
+
+def recount(store, top):
+    """Statistics worked out from scratch, for comparison"""
+    return EnrollmentStats(ActivityStore(store.snapshot())).snapshot(top)
+
+
+class TestEnrollmentStats:
+    """Test cases for EnrollmentStats"""
+
+    def test_initial_counts(self, store):
+        """Test totals, fill ratios, ranking and days from loaded rosters"""
+        snapshot = EnrollmentStats(store).snapshot(top=2)
+        assert snapshot["totals"] == {
+            "activities": 3, "participants": 3, "max_participants": 9, "spots_remaining": 6,
+            "fill_ratio": 0.3333, "full_activities": 1, "waitlisted": 0,
+        }
+        assert snapshot["top"] == [{"name": "Gym Class", "participants": 2},
+                                   {"name": "Chess Club", "participants": 1}]
+        assert snapshot["by_day"]["friday"] == 3
+        assert snapshot["by_day"]["wednesday"] == 2
+        assert snapshot["activities"]["Gym Class"]["fill_ratio"] == 1.0
+
+    def test_follows_signups_waitlist_and_promotion(self, store):
+        """Test that changes, including promotion off a waitlist, are counted"""
+        stats = EnrollmentStats(store)
+        store.signup("Gym Class", "d@mergington.edu")
+        assert stats.snapshot()["totals"]["waitlisted"] == 1
+        store.signup("Art Studio", "a@mergington.edu")
+        store.signup("Art Studio", "b@mergington.edu")
+        store.unregister("Gym Class", "b@mergington.edu")
+        snapshot = stats.snapshot(top=3)
+        assert snapshot["totals"]["waitlisted"] == 0
+        assert snapshot["activities"]["Gym Class"]["participants"] == 2
+        # Ties list the activity that reached the count first
+        assert snapshot["top"] == [{"name": "Art Studio", "participants": 2},
+                                   {"name": "Gym Class", "participants": 2},
+                                   {"name": "Chess Club", "participants": 1}]
+        expected = recount(store, 3)
+        for key in ("totals", "by_day", "activities"):
+            assert snapshot[key] == expected[key]
+
+    def test_random_changes_match_recount(self, store):
+        """Test that counters updated one change at a time match a fresh count"""
+        stats = EnrollmentStats(store)
+        rng = random.Random(7)
+        names = list(store)
+        for _ in range(500):
+            name = rng.choice(names)
+            email = f"s{rng.randrange(8)}@mergington.edu"
+            try:
+                if rng.random() < 0.6:
+                    store.signup(name, email)
+                elif rng.random() < 0.5:
+                    store.unregister(name, email)
+                else:
+                    store.leave_waitlist(name, email)
+            except StoreError:
+                pass
+            assert stats.snapshot(top=3)["totals"] == recount(store, 3)["totals"]
+        assert [entry["participants"] for entry in stats.snapshot(top=3)["top"]] == sorted(
+            (len(store.get(name).participants) for name in names), reverse=True)
+
+    def test_reset(self, store):
+        """Test that reloading activities recounts everything"""
+        stats = EnrollmentStats(store)
+        activities = store.to_dict()
+        store.clear()
+        assert stats.snapshot()["totals"]["activities"] == 0
+        assert stats.snapshot()["top"] == []
+        store.update(activities)
+        assert stats.snapshot(top=3) == recount(store, 3)
+
+
+class TestStatsEndpoint:
+    """Test cases for GET /stats"""
+
+    def test_stats(self, client):
+        """Test that the endpoint reflects a signup"""
+        before = client.get("/stats").json()
+        client.post("/activities/Chess%20Club/signup", data={"email": "new@mergington.edu"})
+        after = client.get("/stats", params={"top": 1}).json()
+        assert after["totals"]["participants"] == before["totals"]["participants"] + 1
+        assert after["activities"]["Chess Club"]["participants"] == 3
+        assert after["by_day"]["friday"] == before["by_day"]["friday"] + 1
+        assert len(after["top"]) == 1
@@ -0,0 +1,136 @@
+"""
+Test cases for the activity store
+"""
+import json
+import threading
+
+import pytest
+
+from store import (BATCH_SIZE, ActivityStore, ActivityNotFoundError, AlreadySignedUpError,
+                   NotSignedUpError)
+
+
+@pytest.fixture
+def store():
+    """Small store with two activities"""
+    return ActivityStore({
+        "Chess Club": {
+            "description": "Chess",
+            "schedule": "Fridays, 3:30 PM - 5:00 PM",
+            "max_participants": 12,
+            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        },
+        "Art Studio": {
+            "description": "Art",
+            "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
+            "max_participants": 16,
+            "participants": ["michael@mergington.edu"]
+        },
+    })
+
+
+class TestActivityStore:
+    """Test cases for ActivityStore"""
+
+    def test_to_dict_keeps_roster_order(self, store):
+        """Test that rosters serialize in signup order"""
+        store.signup("Chess Club", "zoe@mergington.edu")
+        store.signup("Chess Club", "adam@mergington.edu")
+        assert store.to_dict()["Chess Club"]["participants"] == [
+            "michael@mergington.edu",
+            "daniel@mergington.edu",
+            "zoe@mergington.edu",
+            "adam@mergington.edu",
+        ]
+
+    def test_reverse_index_follows_signup_and_unregister(self, store):
+        """Test that activities_for tracks roster changes"""
+        assert store.activities_for("michael@mergington.edu") == ["Chess Club", "Art Studio"]
+
+        store.unregister("Chess Club", "michael@mergington.edu")
+        assert store.activities_for("michael@mergington.edu") == ["Art Studio"]
+
+        store.unregister("Art Studio", "michael@mergington.edu")
+        assert store.activities_for("michael@mergington.edu") == []
+
+        store.signup("Art Studio", "michael@mergington.edu")
+        assert store.activities_for("michael@mergington.edu") == ["Art Studio"]
+
+    def test_errors(self, store):
+        """Test the errors raised for invalid operations"""
+        with pytest.raises(ActivityNotFoundError):
+            store.signup("Nope", "a@mergington.edu")
+        with pytest.raises(AlreadySignedUpError):
+            store.signup("Chess Club", "daniel@mergington.edu")
+        with pytest.raises(NotSignedUpError):
+            store.unregister("Chess Club", "a@mergington.edu")
+
+    def test_update_replaces_activity_and_index(self, store):
+        """Test that reloading an activity drops its old roster from the index"""
+        store.update({
+            "Chess Club": {
+                "description": "Chess",
+                "schedule": "Fridays, 3:30 PM - 5:00 PM",
+                "max_participants": 12,
+                "participants": ["new@mergington.edu"]
+            }
+        })
+        assert store.activities_for("daniel@mergington.edu") == []
+        assert store.activities_for("new@mergington.edu") == ["Chess Club"]
+
+    def test_clear(self, store):
+        """Test that clear empties activities and the reverse index"""
+        store.clear()
+        assert len(store) == 0
+        assert store.activities_for("michael@mergington.edu") == []
+
+
+class CountingLock:
+    """Lock that counts how often it was taken"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquired = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        self.acquired += 1
+
+    def __exit__(self, *exc):
+        self.lock.release()
+
+
+class TestBulkChanges:
+    """Test cases for signup_many and unregister_many"""
+
+    def test_lock_released_between_batches(self, store):
+        """Test that a large import takes the activity lock once per batch"""
+        activity = store.get("Art Studio")
+        activity.lock = CountingLock()
+        emails = [f"s{i}@mergington.edu" for i in range(2 * BATCH_SIZE + 1)]
+        results = store.signup_many("Art Studio", emails)
+        assert activity.lock.acquired == 3
+        assert results[:15] == [None] * 15
+        assert results[-1] == len(emails) - 15
+
+
+class TestActivityJson:
+    """Test cases for the cached JSON body and per-activity fragments"""
+
+    def test_body_matches_to_dict(self, store):
+        """Test that the spliced body is the JSON of to_dict()"""
+        store.signup("Chess Club", "zoë@mergington.edu")
+        version, body = store.to_json()
+        assert version == store.version
+        assert json.loads(body) == store.to_dict()
+
+    def test_unchanged_fragments_are_reused(self, store):
+        """Test that a change only re-encodes the activity it touched"""
+        store.to_json()
+        art = store.get("Art Studio").json_fragment()
+        chess = store.get("Chess Club").json_fragment()
+        store.signup("Chess Club", "zoe@mergington.edu")
+        store.to_json()
+        assert store.get("Art Studio").json_fragment() is art
+        assert store.get("Chess Club").json_fragment() is not chess
+        assert b"zoe@mergington.edu" in store.get("Chess Club").json_fragment()
@@ -0,0 +1,80 @@
+"""
+Test cases for interned student emails and compact rosters
+"""
+import pytest
+
+from students import Roster, StudentRegistry
+from store import ActivityStore
+
+
+class TestStudentRegistry:
+    """Test cases for StudentRegistry"""
+
+    def test_intern_numbers_each_email_once(self):
+        """Test that an email keeps the id it was first given"""
+        students = StudentRegistry()
+        assert students.intern("a@mergington.edu") == 0
+        assert students.intern("b@example.com") == 1
+        assert students.intern("a@mergington.edu") == 0
+        assert len(students) == 2
+        assert students.find("c@mergington.edu") is None
+        assert students.emails([1, 0]) == ["b@example.com", "a@mergington.edu"]
+
+
+class TestRoster:
+    """Test cases for Roster"""
+
+    def test_keeps_signup_order(self):
+        """Test that a roster lists emails in the order they were added"""
+        students = StudentRegistry()
+        students.intern("late@mergington.edu")
+        roster = Roster(students, ["b@mergington.edu", "a@mergington.edu",
+                                   "late@mergington.edu", "a@mergington.edu"])
+        assert list(roster) == ["b@mergington.edu", "a@mergington.edu", "late@mergington.edu"]
+        assert len(roster) == 3
+        assert "late@mergington.edu" in roster
+        assert "never@mergington.edu" not in roster
+
+    def test_remove_and_sweep(self):
+        """Test that removals keep order and tombstones are swept out"""
+        roster = Roster(StudentRegistry(), [f"s{i}@mergington.edu" for i in range(100)])
+        for i in range(0, 100, 3):
+            roster.remove(f"s{i}@mergington.edu")
+        for i in range(1, 100, 3):
+            roster.remove(f"s{i}@mergington.edu")
+        roster.add("s0@mergington.edu")
+        expected = [f"s{i}@mergington.edu" for i in range(2, 100, 3)] + ["s0@mergington.edu"]
+        assert list(roster) == expected
+        assert len(roster._order) < 100
+        assert "s1@mergington.edu" not in roster
+
+    def test_remove_missing(self):
+        """Test that removing an absent email raises KeyError"""
+        roster = Roster(StudentRegistry(), ["a@mergington.edu"])
+        roster.remove("a@mergington.edu")
+        with pytest.raises(KeyError):
+            roster.remove("a@mergington.edu")
+        with pytest.raises(KeyError):
+            roster.remove("b@mergington.edu")
+        assert list(roster) == []
+
+
+class TestStoreInterning:
+    """Test cases for rosters sharing one registry per store"""
+
+    def test_student_in_many_activities_is_stored_once(self):
+        """Test that every roster refers to the same interned email"""
+        store = ActivityStore({
+            name: {"description": "", "schedule": "Fridays", "max_participants": 5,
+                   "participants": []}
+            for name in ("A", "B", "C")
+        })
+        for name in ("C", "A", "B"):
+            # A new string each time, as from separate requests
+            store.signup(name, "".join(["emma", "@mergington.edu"]))
+        assert len(store.students) == 1
+        first, *others = (next(iter(store.get(name).participants)) for name in "ABC")
+        assert all(other is first for other in others)
+        assert store.activities_for("emma@mergington.edu") == ["C", "A", "B"]
+        store.unregister("A", "emma@mergington.edu")
+        assert store.activities_for("emma@mergington.edu") == ["C", "B"]
@@ -0,0 +1,194 @@
+"""
+Test cases for activity waitlists
+"""
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from persistence import FileBackend
+from store import AlreadySignedUpError, AlreadyWaitlistedError, NotWaitlistedError
+from waitlist import Waitlist
+
+# Tiny Club's two seats, taken from the start
+TAKEN = ["a@mergington.edu", "b@mergington.edu"]
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store(2, TAKEN, name="Tiny Club")
+
+
+class TestWaitlist:
+    """Test cases for the Waitlist queue"""
+
+    def test_positions_follow_arrival_order(self):
+        """Test that positions count from the front"""
+        waitlist = Waitlist(["a", "b", "c"])
+        assert [waitlist.position(email) for email in "abc"] == [1, 2, 3]
+        assert waitlist.position("z") is None
+
+    def test_removal_shifts_later_positions(self):
+        """Test that leaving early moves everyone behind forward"""
+        waitlist = Waitlist(["a", "b", "c", "d"])
+        waitlist.remove("b")
+        assert [waitlist.position(email) for email in "acd"] == [1, 2, 3]
+        assert list(waitlist) == ["a", "c", "d"]
+        assert waitlist.pop() == "a"
+        assert [waitlist.position(email) for email in "cd"] == [1, 2]
+
+    def test_pop_skips_departed(self):
+        """Test that students who left are never promoted"""
+        waitlist = Waitlist(["a", "b", "c"])
+        waitlist.remove("b")
+        waitlist.remove("a")
+        assert waitlist.pop() == "c"
+        assert waitlist.pop() is None
+        assert len(waitlist) == 0
+
+    def test_rejoining_goes_to_the_back(self):
+        """Test that a student who leaves and rejoins loses their place"""
+        waitlist = Waitlist(["a", "b"])
+        waitlist.remove("a")
+        assert waitlist.push("a") == 2
+        assert list(waitlist) == ["b", "a"]
+
+
+class TestStoreWaitlist:
+    """Test cases for waitlists in ActivityStore"""
+
+    def test_full_activity_queues_signups(self, store):
+        """Test that signups past capacity return a waitlist position"""
+        assert store.signup("Tiny Club", "c@mergington.edu") == 1
+        assert store.signup("Tiny Club", "d@mergington.edu") == 2
+        assert list(store.get("Tiny Club").participants) == ["a@mergington.edu",
+                                                             "b@mergington.edu"]
+        assert store.activities_for("c@mergington.edu") == []
+
+    def test_duplicate_waitlist_signup(self, store):
+        """Test that a student cannot queue twice or queue while enrolled"""
+        store.signup("Tiny Club", "c@mergington.edu")
+        with pytest.raises(AlreadyWaitlistedError):
+            store.signup("Tiny Club", "c@mergington.edu")
+        with pytest.raises(AlreadySignedUpError):
+            store.signup("Tiny Club", "a@mergington.edu")
+
+    def test_unregister_promotes_head(self, store):
+        """Test that a freed spot goes to the head of the waitlist"""
+        store.signup("Tiny Club", "c@mergington.edu")
+        store.signup("Tiny Club", "d@mergington.edu")
+        events = []
+        store.subscribe(events.append)
+
+        assert store.unregister("Tiny Club", "a@mergington.edu") == "c@mergington.edu"
+        assert list(store.get("Tiny Club").participants) == ["b@mergington.edu",
+                                                             "c@mergington.edu"]
+        assert store.activities_for("c@mergington.edu") == ["Tiny Club"]
+        assert store.waitlist_position("Tiny Club", "d@mergington.edu") == 1
+        assert [event["op"] for event in events] == ["unregister", "signup"]
+
+    def test_unregister_without_waitlist(self, store):
+        """Test that unregistering with nobody waiting promotes nobody"""
+        assert store.unregister("Tiny Club", "a@mergington.edu") is None
+
+    def test_leave_waitlist(self, store):
+        """Test that leaving the waitlist moves later students forward"""
+        store.signup("Tiny Club", "c@mergington.edu")
+        store.signup("Tiny Club", "d@mergington.edu")
+        store.leave_waitlist("Tiny Club", "c@mergington.edu")
+        assert store.waitlist_position("Tiny Club", "c@mergington.edu") is None
+        assert store.waitlist_position("Tiny Club", "d@mergington.edu") == 1
+        with pytest.raises(NotWaitlistedError):
+            store.leave_waitlist("Tiny Club", "c@mergington.edu")
+
+    def test_waitlist_survives_restart(self, tmp_path, make_store):
+        """Test that the waitlist and promotions are replayed from the log"""
+        store = make_store(2, TAKEN, name="Tiny Club", backend=FileBackend(tmp_path))
+        store.open()
+        store.signup("Tiny Club", "c@mergington.edu")
+        store.signup("Tiny Club", "d@mergington.edu")
+        store.signup("Tiny Club", "e@mergington.edu")
+        store.leave_waitlist("Tiny Club", "d@mergington.edu")
+        store.unregister("Tiny Club", "a@mergington.edu")
+        store.close()
+
+        reopened = make_store(2, TAKEN, name="Tiny Club", backend=FileBackend(tmp_path))
+        reopened.open()
+        try:
+            activity = reopened.get("Tiny Club")
+            assert list(activity.participants) == ["b@mergington.edu", "c@mergington.edu"]
+            assert list(activity.waitlist) == ["e@mergington.edu"]
+        finally:
+            reopened.close()
+
+    def test_snapshot_during_waitlist_churn(self, store):
+        """Test that snapshots taken while the waitlist changes never fail"""
+        done = threading.Event()
+
+        def churn():
+            while not done.is_set():
+                for i in range(50):
+                    store.signup("Tiny Club", f"w{i}@mergington.edu")
+                for i in range(50):
+                    store.leave_waitlist("Tiny Club", f"w{i}@mergington.edu")
+
+        thread = threading.Thread(target=churn)
+        thread.start()
+        try:
+            for _ in range(2000):
+                record = store.snapshot()["Tiny Club"]
+                assert len(record["participants"]) == 2
+        finally:
+            done.set()
+            thread.join()
+
+
+class TestWaitlistEndpoints:
+    """Test cases for the waitlist endpoints"""
+
+    def fill_chess_club(self, client):
+        # Chess Club holds 12 and starts with 2
+        for i in range(10):
+            client.post("/activities/Chess Club/signup", data={"email": f"s{i}@mergington.edu"})
+
+    def test_position_endpoint(self, client: TestClient):
+        """Test looking up a student's waitlist position"""
+        self.fill_chess_club(client)
+        client.post("/activities/Chess Club/signup", data={"email": "w1@mergington.edu"})
+        client.post("/activities/Chess Club/signup", data={"email": "w2@mergington.edu"})
+
+        response = client.get("/activities/Chess Club/waitlist",
+                              params={"email": "w2@mergington.edu"})
+        assert response.status_code == 200
+        assert response.json() == {"activity": "Chess Club", "email": "w2@mergington.edu",
+                                   "position": 2, "waitlist_length": 2}
+
+    def test_position_not_waitlisted(self, client: TestClient):
+        """Test that a student not on the waitlist is a 404"""
+        response = client.get("/activities/Chess Club/waitlist",
+                              params={"email": "nobody@mergington.edu"})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Student is not on the waitlist for this activity"
+
+    def test_unregister_reports_promotion(self, client: TestClient):
+        """Test that unregistering names the promoted student"""
+        self.fill_chess_club(client)
+        client.post("/activities/Chess Club/signup", data={"email": "w1@mergington.edu"})
+
+        response = client.delete("/activities/Chess Club/unregister",
+                                 params={"email": "s0@mergington.edu"})
+        assert response.json()["promoted"] == "w1@mergington.edu"
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert participants[-1] == "w1@mergington.edu"
+
+    def test_leave_waitlist_endpoint(self, client: TestClient):
+        """Test leaving a waitlist"""
+        self.fill_chess_club(client)
+        client.post("/activities/Chess Club/signup", data={"email": "w1@mergington.edu"})
+
+        response = client.delete("/activities/Chess Club/waitlist",
+                                 params={"email": "w1@mergington.edu"})
+        assert response.status_code == 200
+        response = client.delete("/activities/Chess Club/waitlist",
+                                 params={"email": "w1@mergington.edu"})
+        assert response.status_code == 400